@@ -2,14 +2,16 @@ from __future__ import annotations
 import asyncio
 from fastapi import APIRouter, HTTPException, Depends, Request
 from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 from typing import Any, Dict, List, AsyncIterator
-import json, time
+import gzip, json, time
 from pathlib import Path
 
 from adaos.apps.api.auth import require_token
 from adaos.services.agent_context import get_ctx
-from adaos.services.observe import _log_path, BROADCAST, pass_filters
+from adaos.services.observe import _log_path, _write_local, BROADCAST, pass_filters
+from adaos.services.handler_stats import HANDLER_STATS
+from adaos.services.skill.runtime import skill_handler_stats
 from adaos.sdk.data import bus
 
 router = APIRouter(tags=["observe"], dependencies=[Depends(require_token)])
@@ -21,20 +23,31 @@ class IngestBatch(BaseModel):
 
 
 @router.post("/ingest", dependencies=[Depends(require_token)])
-async def observe_ingest(batch: IngestBatch):
-    """Приём батчей логов с member-нод (hub-only). Также публикуем в SSE."""
+async def observe_ingest(request: Request):
+    """
+    Приём батчей логов с member-нод (hub-only). Также публикуем в SSE.
+    Тело может быть сжато (Content-Encoding: gzip).
+    """
     conf = get_ctx().config
     if conf.role != "hub":
         raise HTTPException(status_code=403, detail="only hub accepts logs")
+    raw = await request.body()
+    if "gzip" in (request.headers.get("content-encoding") or "").lower():
+        try:
+            raw = gzip.decompress(raw)
+        except Exception:
+            raise HTTPException(status_code=400, detail="invalid gzip body")
+    try:
+        batch = IngestBatch.model_validate_json(raw)
+    except ValidationError as exc:
+        raise HTTPException(status_code=422, detail=exc.errors(include_url=False, include_context=False))
 
-    logf = _log_path()
     ingested = 0
-    with logf.open("a", encoding="utf-8") as f:
-        for e in batch.events:
-            # гарантируем наличие node_id (берём из батча — доверяем member)
-            e.setdefault("node_id", batch.node_id)
-            f.write(json.dumps(e, ensure_ascii=False) + "\n")
-            ingested += 1
+    for e in batch.events:
+        # гарантируем наличие node_id (берём из батча — доверяем member)
+        e.setdefault("node_id", batch.node_id)
+        _write_local(e)
+        ingested += 1
     # Публикуем полученные события (чтобы зрители SSE видели ленту)
     for e in batch.events:
         await BROADCAST.publish(e)
@@ -73,37 +86,54 @@ async def observe_tail(lines: int = 200, topic_prefix: str | None = None, node_i
     return {"ok": True, "lines": filtered}
 
 
+def _sse_frame(evt: Dict[str, Any]) -> bytes:
+    data = json.dumps(evt, ensure_ascii=False).encode("utf-8")
+    return b"event: adaos\n" + b"data: " + data + b"\n\n"
+
+
+def _tail_file(lines: int, topic_prefix: str | None, node_id: str | None) -> List[Dict[str, Any]]:
+    out: List[Dict[str, Any]] = []
+    try:
+        with _log_path().open("r", encoding="utf-8") as f:
+            tail = f.readlines()[-int(lines) :]
+    except Exception:
+        return out
+    for ln in tail:
+        try:
+            obj = json.loads(ln)
+        except Exception:
+            continue
+        if pass_filters(obj, topic_prefix, node_id, None):
+            out.append(obj)
+    return out
+
+
 async def _sse_iter(topic_prefix: str | None, node_id: str | None, since: float | None, replay_lines: int | None = 5) -> AsyncIterator[bytes]:
     """
-    Итератор для SSE. Не держим старую историю (кроме опционального since для фильтра).
+    Итератор для SSE. Фильтрация делается на стороне BROADCAST (в очередь
+    попадают только подходящие события). История (since / replay_lines)
+    берётся из кольцевого буфера в памяти; файл читается, только если буфер
+    ещё пуст (сразу после старта).
     """
+    # replay и подписка без await между ними — ни одно событие не теряется и не дублируется
+    history: List[Dict[str, Any]] = []
+    if since:
+        history = BROADCAST.replay(topic_prefix=topic_prefix, node_id=node_id, since_ts=since)
+    elif replay_lines:
+        history = BROADCAST.replay(topic_prefix=topic_prefix, node_id=node_id, last=replay_lines)
     q = BROADCAST.subscribe(topic_prefix=topic_prefix, node_id=node_id, since_ts=since)
     # шлём комментарий раз в 15с, чтобы соединение не засыпало
     heartbeat_at = time.time()
-    if replay_lines and not since:
-        # прочитаем хвост и отправим их как "исторические"
-        from adaos.services.observe import _log_path
-
-        try:
-            with _log_path().open("r", encoding="utf-8") as f:
-                tail = f.readlines()[-int(replay_lines) :]
-            for ln in tail:
-                try:
-                    obj = json.loads(ln)
-                    if pass_filters(obj, topic_prefix, node_id, None):
-                        data = json.dumps(obj, ensure_ascii=False).encode("utf-8")
-                        yield b"event: adaos\n" + b"data: " + data + b"\n\n"
-                except Exception:
-                    pass
-        except Exception:
-            pass
     try:
+        if not history and replay_lines and not since:
+            history = await asyncio.to_thread(_tail_file, replay_lines, topic_prefix, node_id)
+        for obj in history:
+            yield _sse_frame(obj)
         while True:
             try:
                 evt = await asyncio.wait_for(q.get(), timeout=5.0)  # type: ignore[name-defined]
-                if pass_filters(evt, topic_prefix, node_id, since):
-                    data = json.dumps(evt, ensure_ascii=False).encode("utf-8")
-                    yield b"event: adaos\n" + b"data: " + data + b"\n\n"
+                if not since or float(evt.get("ts", 0.0)) >= float(since):
+                    yield _sse_frame(evt)
             except asyncio.TimeoutError:  # type: ignore[name-defined]
                 pass
 
@@ -114,6 +144,48 @@ async def _sse_iter(topic_prefix: str | None, node_id: str | None, since: float
     except (asyncio.CancelledError, GeneratorExit):
         # клиент закрыл соединение — выходим тихо
         return
+    finally:
+        BROADCAST.unsubscribe(q)
+
+
+@router.get("/subscribers", dependencies=[Depends(require_token)])
+async def observe_subscribers():
+    """SSE-подписчики: фильтры, глубина очереди, доставлено/потеряно."""
+    return {"ok": True, "subscribers": BROADCAST.stats()}
+
+
+@router.get("/ystores", dependencies=[Depends(require_token)])
+async def observe_ystores():
+    """YStore по webspace: число updates и байт в памяти, журнал, компактизации."""
+    from adaos.services.yjs.store import ystore_stats  # pylint: disable=import-outside-toplevel
+
+    return {"ok": True, "ystores": ystore_stats()}
+
+
+@router.get("/nlu", dependencies=[Depends(require_token)])
+async def observe_nlu():
+    """
+    Интерпретатор: резидентные воркеры Rasa (модель, батчи, перезагрузки,
+    p50/p99 разбора), предварительный матчер фраз (hit ratio), таблица
+    маршрутизации интентов диспетчера и очередь автообучения.
+    """
+    from adaos.services.interpreter.prematch import prematch_stats  # pylint: disable=import-outside-toplevel
+    from adaos.services.interpreter.trainer import training_stats  # pylint: disable=import-outside-toplevel
+    from adaos.services.interpreter.worker import nlu_worker_stats  # pylint: disable=import-outside-toplevel
+    from adaos.services.nlu.routing import routing_stats  # pylint: disable=import-outside-toplevel
+
+    return {"ok": True, "workers": nlu_worker_stats(), "prematch": prematch_stats(), "routing": routing_stats(), "training": training_stats()}
+
+
+@router.get("/router", dependencies=[Depends(require_token)])
+async def observe_router():
+    """
+    Доставка ui.notify: очереди по адресатам (telegram:<node>, console:<node>),
+    доставлено/ошибки/повторы/сброшено и задержка постановка → доставка (p50/p99).
+    """
+    from adaos.services.router.delivery import delivery_stats  # pylint: disable=import-outside-toplevel
+
+    return {"ok": True, "targets": delivery_stats()}
 
 
 @router.get("/stream", dependencies=[Depends(require_token)])
@@ -138,6 +210,29 @@ async def observe_stream(
     return StreamingResponse(_sse_iter(topic_prefix, node_id, since, replay_lines), media_type="text/event-stream", headers=headers)
 
 
+@router.get("/handlers", dependencies=[Depends(require_token)])
+async def observe_handlers(by_topic: bool = False, sort: str = "total_ms", limit: int = 100, reset: bool = False):
+    """
+    Статистика обработчиков шины: вызовы, ошибки и перцентили латентности
+    (p50/p95/p99) по каждому обработчику, опционально — в разрезе топиков.
+    Для очередей режима dispatch="queued" добавляется глубина и счётчики потерь,
+    для навыков — hit rate и время импорта загруженных handlers.main.
+    """
+    rows = HANDLER_STATS.snapshot(by_topic=by_topic)
+    if rows and sort in rows[0] and sort != "total_ms":
+        rows.sort(key=lambda r: r.get(sort) or 0, reverse=True)
+    if reset:
+        HANDLER_STATS.reset()
+    dispatch_stats = getattr(get_ctx().bus, "dispatch_stats", None)
+    queues = dispatch_stats() if callable(dispatch_stats) else []
+    return {
+        "ok": True,
+        "handlers": rows[: max(0, int(limit))],
+        "queues": queues,
+        "skills": skill_handler_stats(),
+    }
+
+
 @router.post("/test", dependencies=[Depends(require_token)])
 async def observe_test(kind: str = "ping", note: str | None = None, topic: str | None = None):
     """
@@ -10,6 +10,7 @@ from adaos.services.agent_context import get_ctx
 from adaos.services.subnet_kv_file_http import get_subnet_kv
 from adaos.services.subnet_registry_mem import LEASE_SECONDS_DEFAULT, DOWN_GRACE_SECONDS
 from adaos.services.registry.subnet_directory import get_directory
+from adaos.services.registry.subnet_rpc import get_subnet_rpc
 from adaos.services.subnet_registry_mem import get_subnet_registry
 
 from adaos.sdk.data import bus
@@ -35,6 +36,8 @@ class RegisterResponse(BaseModel):
 class HeartbeatRequest(BaseModel):
     node_id: str
     capacity: Dict[str, Any] | None = None
+    # вызовы инструментов в работе + в очереди на ноде (для балансировки)
+    load: int | None = None
 
 
 class HeartbeatResponse(BaseModel):
@@ -100,6 +103,8 @@ async def heartbeat(body: HeartbeatRequest):
     if not directory.repo.get_node(body.node_id):
         raise HTTPException(status_code=404, detail="node not registered")
     directory.on_heartbeat(body.node_id, body.capacity or None)
+    if body.load is not None:
+        get_subnet_rpc().report_load(body.node_id, body.load)
     return HeartbeatResponse(ok=True, lease_seconds=LEASE_SECONDS_DEFAULT)
 
 
@@ -2,16 +2,21 @@
 from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from pydantic import BaseModel, Field
 from typing import Any, Dict
-import requests, os
+import os
 
 from adaos.apps.api.auth import require_token
 from adaos.services.observe import attach_http_trace_headers
 from adaos.services.agent_context import get_ctx, AgentContext
 from adaos.services.eventbus import emit
 from adaos.services.skill.manager import SkillManager
+from adaos.services.skill.tool_executor import ToolQueueFull, get_tool_executor
+from adaos.services.skill import tool_dispatch
+from adaos.services.skill.tool_cache import get_tool_cache
 from adaos.adapters.db import SqliteSkillRegistry
 from adaos.services.registry.subnet_directory import get_directory
+from adaos.services.registry.subnet_rpc import LOAD_HEADER, get_subnet_rpc
 from adaos.services.agent_context import get_ctx
+from adaos.skills.process_pool import ToolWorkerError
 from adaos.skills.runtime_runner import execute_tool
 
 
@@ -57,12 +62,19 @@ async def call_tool(body: ToolCall, request: Request, response: Response, ctx: A
 
     trace = attach_http_trace_headers(request.headers, response.headers)
     payload: Dict[str, Any] = body.arguments or {}
-    # Пробуем локально; если навык отсутствует на узле-хабе — проксируем на member
+    # Пробуем локально; если навык отсутствует на узле-хабе — проксируем на member.
+    # Сам вызов идёт в пуле воркеров, чтобы не блокировать event loop (Yjs, SSE).
+    executor = get_tool_executor()
     try:
-        if body.dev:
-            result = mgr.run_dev_tool(skill_name, public_tool, payload, timeout=body.timeout)
-        else:
-            result = mgr.run_tool(skill_name, public_tool, payload, timeout=body.timeout)
+        run = mgr.run_dev_tool if body.dev else mgr.run_tool
+        result = await executor.run(skill_name, run, skill_name, public_tool, payload, timeout=body.timeout)
+    except ToolQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except ToolWorkerError as e:
+        # Инструмент упал в изолированном процессе — навык здесь есть, не проксируем.
+        if e.unavailable:
+            raise HTTPException(status_code=503, detail=str(e))
+        raise HTTPException(status_code=500, detail=f"run failed: {e}")
     except (FileNotFoundError, RuntimeError, KeyError) as e:
         # Если локально не найден навык/слот — попробуем проксировать на участника подсети (только если роль hub)
         try:
@@ -73,23 +85,24 @@ async def call_tool(body: ToolCall, request: Request, response: Response, ctx: A
             # На member нет прокси — вернём исходную ошибку
             raise HTTPException(status_code=404, detail=str(e))
 
-        # Найти online-ноду с этим skill (используем только runtime; workspace-fallback отключён)
+        # Найти online-ноды с этим skill (используем только runtime; workspace-fallback отключён)
         directory = get_directory()
         candidates = directory.find_nodes_with_skill(skill_name, require_online=True)
-        # Сначала активные, затем по last_seen убыв.
-        candidates.sort(key=lambda n: (not bool(n.get("active"))), reverse=False)
         if not candidates:
             raise HTTPException(
                 status_code=503,
                 detail=f"skill '{skill_name}', tool '{public_tool}' is not available online in the subnet. In dev: {body.dev}. Candidates: {candidates}. Err: {str(e)}",
             )
-        target = candidates[0]
-        base_url = target.get("base_url") or directory.get_node_base_url(target.get("node_id", ""))
-        if not base_url:
+        targets = []
+        for node in candidates:
+            base_url = node.get("base_url") or directory.get_node_base_url(node.get("node_id", ""))
+            if base_url:
+                # active: сначала ноды с активным слотом, дальше — балансировщик по загрузке/латентности
+                targets.append({"node_id": node.get("node_id", ""), "base_url": base_url, "active": bool(node.get("active"))})
+        if not targets:
             raise HTTPException(status_code=503, detail="no base_url for target node")
 
-        # Проксируем запрос прозрачно
-        url = f"{base_url.rstrip('/')}/api/tools/call"
+        # Проксируем запрос прозрачно (пул keep-alive соединений, ретрай на другой ноде)
         forward = {"tool": body.tool, "arguments": payload}
         if body.timeout is not None:
             forward["timeout"] = body.timeout
@@ -97,18 +110,25 @@ async def call_tool(body: ToolCall, request: Request, response: Response, ctx: A
         if body.dev:
             forward["dev"] = True
         token = conf.token or request.headers.get("X-AdaOS-Token") or "dev-local-token"
+        rpc = get_subnet_rpc()
+        # Дублировать медленный вызов на другую ноду можно только для идемпотентных
+        # инструментов — тех, что объявляют cache-политику в манифесте.
+        hedge = False
+        if rpc.hedge_after:
+            try:
+                hedge = mgr.declared_cache_policy(skill_name, public_tool) is not None
+            except Exception:
+                hedge = False
         try:
-            r = requests.post(url, json=forward, headers={"X-AdaOS-Token": token, "Content-Type": "application/json"}, timeout=(body.timeout or 10) + 2)
+            r = await rpc.call_tool(targets, forward, token=token, timeout=(body.timeout or 10) + 2, hedge=hedge)
         except Exception as pe:
             raise HTTPException(status_code=502, detail=f"proxy failed: {pe}")
-        if r.status_code != 200:
-            raise HTTPException(status_code=r.status_code, detail=r.text)
-        try:
-            result_payload = r.json()
-        except Exception:
+        if r.status != 200:
+            raise HTTPException(status_code=r.status, detail=r.text)
+        if r.body is None:
             raise HTTPException(status_code=502, detail="invalid JSON from proxied node")
         # Возвращаем payload как есть от член-узла
-        return result_payload
+        return r.body
     except TimeoutError as e:
         raise HTTPException(status_code=504, detail=str(e))
     except ValueError as e:
@@ -131,4 +151,18 @@ async def call_tool(body: ToolCall, request: Request, response: Response, ctx: A
         # best-effort: failure to route should not break API response
         pass
 
+    # Хаб учитывает эту цифру при выборе ноды для следующих вызовов.
+    response.headers[LOAD_HEADER] = str(executor.load())
     return {"ok": True, "result": result, "trace_id": trace}
+
+
+@router.get("/tools/pool", dependencies=[Depends(require_token)])
+async def tools_pool():
+    """Загрузка пула исполнения инструментов: занятые воркеры, очереди по навыкам, кэш результатов."""
+    return {
+        "ok": True,
+        "pool": get_tool_executor().stats(),
+        "dispatch": tool_dispatch.stats(),
+        "cache": get_tool_cache().stats(),
+        "subnet": get_subnet_rpc().stats(),
+    }
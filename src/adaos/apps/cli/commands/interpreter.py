@@ -76,6 +76,7 @@ def train(
     note: Optional[str] = typer.Option(None, "--note", help="Комментарий к запуску."),
     dry_run: bool = typer.Option(False, "--dry-run", help="Показать статус и выйти."),
     engine: str = typer.Option("rasa", "--engine", help="Движок обучения (rasa/none)."),
+    force: bool = typer.Option(False, "--force", help="Обучить с нуля, даже если данные не менялись."),
 ) -> None:
     """Запускает обучение и сохраняет артефакт/метаданные."""
     ws = _workspace()
@@ -85,9 +86,13 @@ def train(
 
     if engine == "rasa":
         trainer = RasaTrainer(ws)
-        meta = trainer.train(note=note)
+        meta = trainer.train(note=note, force=force)
         model_path = meta.get("extra", {}).get("model_path")
-        typer.secho(f"Rasa-модель обучена: {meta['trained_at']}", fg=typer.colors.GREEN)
+        if meta.get("skipped"):
+            typer.secho(f"Данные не менялись, модель актуальна (обучена {meta['trained_at']})", fg=typer.colors.GREEN)
+        else:
+            mode = meta.get("extra", {}).get("mode", "full")
+            typer.secho(f"Rasa-модель обучена ({mode}): {meta['trained_at']}", fg=typer.colors.GREEN)
         if model_path:
             typer.echo(f"Артефакт: {model_path}")
     else:
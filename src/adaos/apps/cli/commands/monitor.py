@@ -1,4 +1,4 @@
-import typer, json, time, sys, requests
+import typer, json, time, sys, os, requests
 from pathlib import Path
 from adaos.services.agent_context import get_ctx
 from adaos.services.eventbus import emit
@@ -94,3 +94,62 @@ def ping():
     ctx = get_ctx()
     emit(ctx.bus, "cli.ping", {"ok": True}, "cli")
     typer.echo("event cli.ping sent")
+
+
+@app.command("handlers")
+def monitor_handlers(
+    url: str = typer.Option(None, "--url", help="Базовый URL hub API (по умолчанию ADAOS_SELF_BASE_URL/ADAOS_BASE)"),
+    token: str = typer.Option(None, "--token", help="X-AdaOS-Token; по умолчанию ADAOS_TOKEN"),
+    by_topic: bool = typer.Option(False, "--by-topic", help="Разбить статистику по топикам"),
+    sort: str = typer.Option("total_ms", "--sort", help="total_ms|p99_ms|p95_ms|calls|errors"),
+    limit: int = typer.Option(30, "--limit", "-n"),
+    as_json: bool = typer.Option(False, "--json", help="Вывести JSON"),
+):
+    """Таблица латентности обработчиков шины из /api/observe/handlers."""
+    base = url or os.getenv("ADAOS_SELF_BASE_URL") or os.getenv("ADAOS_BASE") or "http://127.0.0.1:8777"
+    headers = {}
+    token = token or os.getenv("ADAOS_TOKEN")
+    if token:
+        headers["X-AdaOS-Token"] = token
+    params = {"by_topic": str(by_topic).lower(), "sort": sort, "limit": limit}
+    try:
+        r = requests.get(f"{base.rstrip('/')}/api/observe/handlers", params=params, headers=headers, timeout=5)
+    except Exception as e:
+        typer.secho(f"request failed: {e}", fg=typer.colors.RED)
+        raise typer.Exit(1)
+    if r.status_code != 200:
+        typer.secho(f"HTTP {r.status_code}: {r.text}", fg=typer.colors.RED)
+        raise typer.Exit(1)
+    data = r.json()
+    if as_json:
+        typer.echo(json.dumps(data, ensure_ascii=False, indent=2))
+        return
+
+    rows_in = data.get("handlers") or []
+    if not rows_in:
+        typer.echo("No handler stats yet.")
+    else:
+        headers_row = ["Handler"] + (["Topic"] if by_topic else []) + ["Calls", "Errors", "p50 ms", "p95 ms", "p99 ms", "max ms", "total ms"]
+        rows = [
+            [r.get("handler", "")]
+            + ([r.get("topic", "")] if by_topic else [])
+            + [r.get("calls", 0), r.get("errors", 0), r.get("p50_ms"), r.get("p95_ms"), r.get("p99_ms"), r.get("max_ms"), r.get("total_ms")]
+            for r in rows_in
+        ]
+        _echo_table(headers_row, rows)
+
+    queues = data.get("queues") or []
+    if queues:
+        typer.echo("")
+        _echo_table(
+            ["Queue", "Prefix", "Policy", "Depth", "In-flight", "Dropped", "Coalesced"],
+            [[q.get("handler", ""), q.get("prefix", ""), q.get("overflow", ""), q.get("depth", 0), q.get("in_flight", 0), q.get("dropped", 0), q.get("coalesced", 0)] for q in queues],
+        )
+
+
+def _echo_table(headers: list, rows: list) -> None:
+    widths = [max(len(str(row[i])) for row in [headers] + rows) for i in range(len(headers))]
+    typer.echo("  ".join(str(headers[i]).ljust(widths[i]) for i in range(len(headers))))
+    typer.echo("  ".join("-" * widths[i] for i in range(len(headers))))
+    for row in rows:
+        typer.echo("  ".join(str(row[i]).ljust(widths[i]) for i in range(len(headers))))
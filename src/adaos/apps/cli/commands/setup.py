@@ -118,13 +118,20 @@ def install(
         except Exception as exc:
             installed["warnings"].append(f"scenario {scenario_id}: {exc}")
 
+    # Исходники ставим последовательно (git), рантаймы готовим параллельно.
+    ready_skills = []
     for skill_id in chosen.skills:
         try:
             skill_mgr.install(skill_id, validate=False)
-            runtime = None
-            try:
-                runtime = skill_mgr.prepare_runtime(skill_id, run_tests=False)
-            except Exception:
+            ready_skills.append(skill_id)
+        except Exception as exc:
+            installed["warnings"].append(f"skill {skill_id}: {exc}")
+    runtimes = skill_mgr.prepare_runtimes(ready_skills, run_tests=False)
+
+    for skill_id in ready_skills:
+        try:
+            runtime = runtimes.get(skill_id)
+            if isinstance(runtime, Exception):
                 runtime = None
             version = getattr(runtime, "version", None) if runtime else None
             slot = getattr(runtime, "slot", None) if runtime else None
@@ -79,6 +79,11 @@ async def emit(topic: str, payload: dict, **kw: Any):
     except Exception:
         event = SimpleNamespace(type=topic, payload=pp, source=source, ts=ts)
 
+    publish_async = getattr(bus, "publish_async", None)
+    if callable(publish_async):
+        # LocalEventBus: очереди с политикой "block" дают обратное давление издателю
+        return await publish_async(event)
+
     try:
         res = publish(event)
     except TypeError:
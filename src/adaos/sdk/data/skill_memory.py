@@ -4,17 +4,34 @@ from __future__ import annotations
 
 import json
 import os
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator, Optional
 
 from adaos.sdk.core._ctx import require_ctx
 from adaos.sdk.core.errors import SdkRuntimeNotInitialized
 
 __all__ = ["get", "set"]
 
+# Путь к .skill_env.json текущего вызова инструмента. Задаётся на вызов, а не
+# через os.environ: инструменты разных навыков выполняются параллельно.
+_ENV_PATH: ContextVar[Optional[str]] = ContextVar("adaos_skill_env_path", default=None)
+
+
+@contextmanager
+def use_env_path(path: str | os.PathLike[str]) -> Iterator[None]:
+    """Bind the skill memory file for the current call (thread/task)."""
+    token = _ENV_PATH.set(str(path))
+    try:
+        yield
+    finally:
+        _ENV_PATH.reset(token)
+
 
 def _memory_path() -> Path:
-    override = os.getenv("ADAOS_SKILL_ENV_PATH")
+    # ADAOS_SKILL_ENV_PATH — для отдельных процессов (process pool, тесты навыка)
+    override = _ENV_PATH.get() or os.getenv("ADAOS_SKILL_ENV_PATH")
     if override:
         path = Path(override)
     else:
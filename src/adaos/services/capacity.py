@@ -91,6 +91,35 @@ def get_local_capacity() -> Dict[str, Any]:
     return load_capacity_from_node_yaml()
 
 
+# (node.yaml path, (mtime_ns, size) или None, снимок capacity)
+_snapshot: tuple[Path, tuple[int, int] | None, Dict[str, Any]] | None = None
+
+
+def _stamp(path: Path) -> tuple[int, int] | None:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def capacity_snapshot() -> Dict[str, Any]:
+    """
+    Same data as :func:`get_local_capacity`, but node.yaml is parsed again only
+    when its mtime/size changed (one ``stat`` per call). The returned dict is
+    shared between callers and must not be mutated.
+    """
+    global _snapshot
+    path = Path(_resolve_base_dir()) / "node.yaml"
+    stamp = _stamp(path)
+    snap = _snapshot
+    if snap is not None and snap[0] == path and snap[1] == stamp and stamp is not None:
+        return snap[2]
+    data = load_capacity_from_node_yaml(path.parent)
+    _snapshot = (path, stamp, data)
+    return data
+
+
 # ----- mutation helpers for node.yaml -----
 
 def _resolve_base_dir(base_dir: Path | None = None) -> Path:
@@ -1,13 +1,19 @@
 from __future__ import annotations
 import asyncio
+import inspect
 import logging
+import os
+import threading
 import time
-from collections import defaultdict
+import weakref
+from collections import OrderedDict, deque
+from dataclasses import dataclass
 from threading import RLock
-from typing import Callable, Awaitable, Any, DefaultDict, List
+from typing import Callable, Awaitable, Any, Deque, Dict, List, Optional, Tuple
 
 from adaos.domain import Event
 from adaos.ports import EventBus
+from adaos.services.handler_stats import HANDLER_STATS
 
 
 Handler = Callable[[Event], Any] | Callable[[Event], Awaitable[Any]]
@@ -15,11 +21,12 @@ Handler = Callable[[Event], Any] | Callable[[Event], Awaitable[Any]]
 _log = logging.getLogger("adaos.eventbus")
 
 
-def _handler_label(handler: Handler) -> str:
+def _build_handler_label(handler: Handler) -> str:
     """
     Build a human-readable label for a handler, including optional skill/topic
     hints injected by the SDK decorators.
     """
+    handler = getattr(handler, "__wrapped__", handler)
     mod = getattr(handler, "__module__", None) or "<?>"
     name = getattr(handler, "__name__", None) or repr(handler)
     skill = getattr(handler, "_adaos_skill", None)
@@ -32,6 +39,29 @@ def _handler_label(handler: Handler) -> str:
     return " ".join(parts)
 
 
+# Слабые ключи: кэш меток не должен удерживать замыкания и bound-методы
+# отписавшихся/удалённых обработчиков.
+_LABELS: "weakref.WeakKeyDictionary[Any, str]" = weakref.WeakKeyDictionary()
+
+
+def _handler_label(handler: Handler) -> str:
+    try:
+        label = _LABELS.get(handler)
+    except TypeError:  # unhashable or not weakref-able callable
+        return _build_handler_label(handler)
+    if label is None:
+        label = _build_handler_label(handler)
+        try:
+            _LABELS[handler] = label
+        except TypeError:
+            pass
+    return label
+
+
+def _record(handler: Handler, event: Event, duration: float, *, error: bool = False) -> None:
+    HANDLER_STATS.record(_handler_label(handler), getattr(event, "type", "<unknown>"), duration, error=error)
+
+
 async def _run_coro_with_timing(coro: Awaitable[Any], handler: Handler, event: Event) -> None:
     """
     Wrapper for async handlers that records execution time and logs slow/crashing
@@ -41,6 +71,7 @@ async def _run_coro_with_timing(coro: Awaitable[Any], handler: Handler, event: E
     try:
         await coro
     except Exception:  # pragma: no cover - defensive logging
+        _record(handler, event, time.perf_counter() - started, error=True)
         _log.warning(
             "event handler crashed handler=%s type=%s",
             _handler_label(handler),
@@ -49,6 +80,7 @@ async def _run_coro_with_timing(coro: Awaitable[Any], handler: Handler, event: E
         )
     else:
         duration = time.perf_counter() - started
+        _record(handler, event, duration)
         if duration >= 0.1:
             _log.warning(
                 "slow async event handler handler=%s type=%s duration=%.3fs",
@@ -58,6 +90,351 @@ async def _run_coro_with_timing(coro: Awaitable[Any], handler: Handler, event: E
             )
 
 
+OVERFLOW_POLICIES = ("drop", "block", "coalesce")
+
+
+@dataclass(frozen=True, slots=True)
+class DispatchPolicy:
+    """
+    Параметры очереди подписчика для режима ``dispatch="queued"``.
+
+    overflow:
+      * ``drop``     — новое событие отбрасывается, если очередь заполнена;
+      * ``block``    — издатель ждёт свободного места (``publish_async`` и
+        публикация из другого потока, не дольше ``block_timeout``); синхронный
+        ``publish`` из потока event loop ждать не может и кладёт событие сверх
+        лимита (учитывается в ``overflowed``);
+      * ``coalesce`` — ожидающее событие того же типа заменяется новым,
+        при переполнении вытесняется самое старое.
+    """
+
+    queue_size: int = 256
+    max_in_flight: int = 1
+    overflow: str = "drop"
+    block_timeout: float = 5.0
+
+    def __post_init__(self) -> None:
+        if self.overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"unknown overflow policy {self.overflow!r}, expected one of {OVERFLOW_POLICIES}")
+        if self.queue_size < 1 or self.max_in_flight < 1:
+            raise ValueError("queue_size and max_in_flight must be >= 1")
+
+    @staticmethod
+    def from_env() -> "DispatchPolicy":
+        return DispatchPolicy(
+            queue_size=int(os.getenv("ADAOS_BUS_QUEUE_SIZE", "256") or 256),
+            max_in_flight=int(os.getenv("ADAOS_BUS_MAX_IN_FLIGHT", "1") or 1),
+            overflow=(os.getenv("ADAOS_BUS_OVERFLOW", "drop") or "drop").lower(),
+        )
+
+
+class _HandlerQueue:
+    """
+    Bounded per-subscription queue drained by at most ``max_in_flight`` tasks.
+
+    Instances are stored in the subscription index in place of the handler
+    and are called by ``publish`` like a plain sync handler: the call only
+    enqueues. Drain tasks are created on demand and exit once the queue is
+    empty, so an idle subscriber costs no pending tasks.
+    """
+
+    def __init__(self, handler: Handler, type_prefix: str, policy: DispatchPolicy) -> None:
+        self.__wrapped__ = handler
+        self.prefix = type_prefix
+        self.policy = policy
+        self._cond = threading.Condition(threading.Lock())
+        self._items: Deque[Event] = deque()
+        self._by_type: "OrderedDict[str, Event]" = OrderedDict()
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._in_flight = 0
+        self.enqueued = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.overflowed = 0
+
+    # --- queue primitives (caller holds self._cond) ---
+    def _depth(self) -> int:
+        return len(self._by_type) if self.policy.overflow == "coalesce" else len(self._items)
+
+    def _push(self, event: Event, *, force: bool = False) -> bool:
+        if self.policy.overflow == "coalesce":
+            if event.type in self._by_type:
+                self._by_type[event.type] = event
+                self.coalesced += 1
+                return True
+            if len(self._by_type) >= self.policy.queue_size:
+                self._by_type.popitem(last=False)
+                self._note_drop()
+            self._by_type[event.type] = event
+        else:
+            if len(self._items) >= self.policy.queue_size:
+                if not force:
+                    self._note_drop()
+                    return False
+                self.overflowed += 1
+            self._items.append(event)
+        self.enqueued += 1
+        return True
+
+    def _pop(self) -> Optional[Event]:
+        if self.policy.overflow == "coalesce":
+            return self._by_type.popitem(last=False)[1] if self._by_type else None
+        return self._items.popleft() if self._items else None
+
+    def _note_drop(self) -> None:
+        self.dropped += 1
+        if self.dropped == 1 or self.dropped % 1000 == 0:
+            _log.warning(
+                "bus queue overflow handler=%s prefix=%r policy=%s dropped=%d",
+                _handler_label(self),
+                self.prefix,
+                self.policy.overflow,
+                self.dropped,
+            )
+
+    # --- publishing side ---
+    def _target_loop(self) -> Tuple[Optional[asyncio.AbstractEventLoop], bool]:
+        """Return (loop that runs the drain tasks, whether we are on it)."""
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        loop = self._loop
+        if loop is None or loop.is_closed() or (running is not None and not loop.is_running()):
+            if running is None:
+                return None, False
+            with self._cond:
+                # drain tasks of a dead loop will never finish
+                self._loop, self._in_flight = running, 0
+            return running, True
+        return loop, loop is running
+
+    def __call__(self, event: Event) -> None:
+        loop, on_loop = self._target_loop()
+        if loop is None:
+            # Нет event loop (CLI/скрипты) — как и раньше, выполняем синхронно.
+            self._run_blocking(event)
+            return
+        block = self.policy.overflow == "block"
+        with self._cond:
+            if block and not on_loop:
+                self._cond.wait_for(lambda: self._depth() < self.policy.queue_size, self.policy.block_timeout)
+            accepted = self._push(event, force=block and on_loop)
+        if not accepted:
+            return
+        if on_loop:
+            self._kick()
+        else:
+            loop.call_soon_threadsafe(self._kick)
+
+    async def put(self, event: Event) -> None:
+        """Enqueue, waiting for free space when the policy is ``block``."""
+        if self.policy.overflow == "block":
+            aloop = asyncio.get_running_loop()
+            deadline = aloop.time() + self.policy.block_timeout
+            while True:
+                with self._cond:
+                    if self._depth() < self.policy.queue_size:
+                        break
+                    fut = aloop.create_future()
+                    self._waiters.append(fut)
+                remaining = deadline - aloop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(fut, remaining)
+                except asyncio.TimeoutError:
+                    break
+        loop, on_loop = self._target_loop()
+        with self._cond:
+            accepted = self._push(event)
+        if accepted and loop is not None:
+            if on_loop:
+                self._kick()
+            else:
+                loop.call_soon_threadsafe(self._kick)
+
+    def _run_blocking(self, event: Event) -> None:
+        res = self.__wrapped__(event)
+        if asyncio.iscoroutine(res):
+            asyncio.run(_run_coro_with_timing(res, self.__wrapped__, event))
+
+    # --- draining side (event loop thread) ---
+    def _kick(self) -> None:
+        loop = self._loop
+        if loop is None:
+            return
+        with self._cond:
+            spawn = min(self.policy.max_in_flight - self._in_flight, self._depth())
+            if spawn <= 0:
+                return
+            self._in_flight += spawn
+        for _ in range(spawn):
+            loop.create_task(self._drain())
+
+    def _take(self) -> Optional[Event]:
+        with self._cond:
+            event = self._pop()
+            if event is None:
+                self._in_flight -= 1
+                return None
+            self._cond.notify()
+            waiter = None
+            while self._waiters and waiter is None:
+                candidate = self._waiters.popleft()
+                if not candidate.done():
+                    waiter = candidate
+        if waiter is not None:
+            waiter.get_loop().call_soon_threadsafe(_resolve_waiter, waiter)
+        return event
+
+    async def _drain(self) -> None:
+        finished = False
+        try:
+            while True:
+                event = self._take()
+                if event is None:
+                    finished = True
+                    return
+                started = time.perf_counter()
+                try:
+                    res = self.__wrapped__(event)
+                except Exception:  # pragma: no cover - defensive logging
+                    _record(self.__wrapped__, event, time.perf_counter() - started, error=True)
+                    _log.warning(
+                        "event handler crashed handler=%s type=%s",
+                        _handler_label(self),
+                        getattr(event, "type", "<unknown>"),
+                        exc_info=True,
+                    )
+                    continue
+                if asyncio.iscoroutine(res):
+                    await _run_coro_with_timing(res, self.__wrapped__, event)
+                else:
+                    _record(self.__wrapped__, event, time.perf_counter() - started)
+        finally:
+            if not finished:
+                with self._cond:
+                    self._in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            depth, in_flight = self._depth(), self._in_flight
+        return {
+            "handler": _handler_label(self),
+            "prefix": self.prefix,
+            "overflow": self.policy.overflow,
+            "queue_size": self.policy.queue_size,
+            "max_in_flight": self.policy.max_in_flight,
+            "depth": depth,
+            "in_flight": in_flight,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "overflowed": self.overflowed,
+        }
+
+
+def _resolve_waiter(fut: asyncio.Future) -> None:
+    if not fut.done():
+        fut.set_result(None)
+
+
+class _TrieNode:
+    """
+    Immutable node of the subscription prefix trie.
+
+    ``groups`` holds ``(order, prefix, handlers)`` per subscribed prefix that
+    ends at this node; ``order`` is the registration sequence of the prefix.
+    The root carries separate groups for ``""`` and ``"*"``, so dispatch order
+    stays identical to the historical "prefixes in registration order"
+    behaviour.
+    """
+
+    __slots__ = ("children", "groups")
+
+    def __init__(
+        self,
+        children: Dict[str, "_TrieNode"] | None = None,
+        groups: Tuple[Tuple[int, str, Tuple[Handler, ...]], ...] = (),
+    ) -> None:
+        self.children: Dict[str, _TrieNode] = children if children is not None else {}
+        self.groups = groups
+
+
+class _SubscriptionIndex:
+    """
+    Copy-on-write snapshot of bus subscriptions.
+
+    Prefixes are stored in a character trie, so matching an event type costs
+    O(len(type) + matched handlers) instead of O(total prefixes). Resolved
+    handler tuples are memoised per event type; the memo belongs to the
+    snapshot and is dropped together with it on the next subscribe.
+    """
+
+    __slots__ = ("root", "size", "prefixes", "_memo")
+
+    _MEMO_LIMIT = 4096
+
+    def __init__(self, root: _TrieNode | None = None, size: int = 0, prefixes: int = 0) -> None:
+        self.root = root or _TrieNode()
+        self.size = size
+        self.prefixes = prefixes
+        self._memo: Dict[str, Tuple[Handler, ...]] = {}
+
+    def with_handler(self, type_prefix: str, handler: Handler) -> "_SubscriptionIndex":
+        # "" и "*" — подписка на все события, обе живут в корне trie
+        # (отдельными группами, чтобы сохранить порядок регистрации).
+        key = "" if type_prefix == "*" else type_prefix
+        path: List[_TrieNode] = [self.root]
+        node: _TrieNode | None = self.root
+        for ch in key:
+            node = node.children.get(ch) if node is not None else None
+            path.append(node or _TrieNode())
+        leaf = path[-1]
+        groups = list(leaf.groups)
+        for i, (order, prefix, handlers) in enumerate(groups):
+            if prefix == type_prefix:
+                groups[i] = (order, prefix, handlers + (handler,))
+                is_new_prefix = False
+                break
+        else:
+            groups.append((self.prefixes, type_prefix, (handler,)))
+            is_new_prefix = True
+        rebuilt = _TrieNode(leaf.children, tuple(groups))
+        # path copying: only nodes on the prefix path are cloned
+        for depth in range(len(key) - 1, -1, -1):
+            parent = path[depth]
+            children = dict(parent.children)
+            children[key[depth]] = rebuilt
+            rebuilt = _TrieNode(children, parent.groups)
+        return _SubscriptionIndex(rebuilt, self.size + 1, self.prefixes + (1 if is_new_prefix else 0))
+
+    def match(self, event_type: str) -> Tuple[Handler, ...]:
+        cached = self._memo.get(event_type)
+        if cached is not None:
+            return cached
+        node: _TrieNode | None = self.root
+        found: List[Tuple[int, str, Tuple[Handler, ...]]] = list(node.groups)
+        for ch in event_type:
+            node = node.children.get(ch)
+            if node is None:
+                break
+            found.extend(node.groups)
+        if not found:
+            handlers: Tuple[Handler, ...] = ()
+        elif len(found) == 1:
+            handlers = found[0][2]
+        else:
+            found.sort(key=lambda g: g[0])
+            handlers = tuple(h for g in found for h in g[2])
+        if len(self._memo) >= self._MEMO_LIMIT:
+            self._memo.clear()
+        self._memo[event_type] = handlers
+        return handlers
+
+
 class LocalEventBus(EventBus):
     """
     Локальная неблокирующая шина событий для одного процесса.
@@ -70,65 +447,100 @@ class LocalEventBus(EventBus):
 
     Дополнительно эта реализация логирует медленные/падающие обработчики,
     чтобы упростить отладку случаев, когда какой‑то skill «крутит» CPU.
+
+    Режимы диспетчеризации асинхронных обработчиков (``dispatch`` или
+    ``ADAOS_BUS_DISPATCH``):
+      * ``task``   — по задаче на каждое событие (поведение по умолчанию);
+      * ``queued`` — у каждой подписки своя ограниченная очередь и не более
+        ``max_in_flight`` одновременных вызовов, см. ``DispatchPolicy``.
+    Явный ``policy`` в ``subscribe`` включает очередь и в режиме ``task``.
     """
 
-    def __init__(self) -> None:
-        self._subs: DefaultDict[str, List[Handler]] = defaultdict(list)
+    def __init__(self, dispatch: str | None = None, policy: DispatchPolicy | None = None) -> None:
+        # Подписки хранятся в неизменяемом снимке: subscribe под локом
+        # публикует новый снимок, publish читает текущий без блокировок.
+        self._index = _SubscriptionIndex()
         self._lock = RLock()
+        self._dispatch = (dispatch or os.getenv("ADAOS_BUS_DISPATCH") or "task").lower()
+        if self._dispatch not in ("task", "queued"):
+            raise ValueError(f"unknown dispatch mode {self._dispatch!r}")
+        self._policy = policy or DispatchPolicy.from_env()
+        self._queues: Tuple[_HandlerQueue, ...] = ()
 
-    def subscribe(self, type_prefix: str, handler: Handler) -> None:
+    def subscribe(self, type_prefix: str, handler: Handler, *, policy: DispatchPolicy | None = None) -> None:
+        if policy is not None or (self._dispatch == "queued" and inspect.iscoroutinefunction(handler)):
+            handler = _HandlerQueue(handler, type_prefix, policy or self._policy)
         with self._lock:
-            self._subs[type_prefix].append(handler)
+            self._index = self._index.with_handler(type_prefix, handler)
+            if isinstance(handler, _HandlerQueue):
+                self._queues = self._queues + (handler,)
         _log.debug("bus.subscribe prefix=%r handler=%s", type_prefix, _handler_label(handler))
 
-    def publish(self, event: Event) -> None:
-        with self._lock:
-            pairs = [(p, hs[:]) for p, hs in self._subs.items()]
+    def subscriptions_count(self) -> int:
+        return self._index.size
+
+    def dispatch_stats(self) -> List[Dict[str, Any]]:
+        """Queue depth, in-flight and drop counters of queued subscriptions."""
+        return [q.stats() for q in self._queues]
 
+    def _matching(self, event: Event) -> Tuple[Handler, ...]:
+        handlers = self._index.match(event.type)
         if _log.isEnabledFor(logging.DEBUG):
-            total_handlers = sum(
-                len(hs) for p, hs in pairs if p == "" or p == "*" or event.type.startswith(p)
-            )
             _log.debug(
                 "bus.publish type=%s source=%s handlers=%d",
                 getattr(event, "type", "<unknown>"),
                 getattr(event, "source", "<unknown>"),
-                total_handlers,
+                len(handlers),
             )
+        return handlers
 
-        for prefix, handlers in pairs:
-            if prefix != "*" and prefix != "" and not event.type.startswith(prefix):
-                continue
-            for h in handlers:
-                started = time.perf_counter()
-                try:
-                    res = h(event)
-                except Exception:  # pragma: no cover - defensive logging
-                    _log.warning(
-                        "event handler crashed handler=%s type=%s",
-                        _handler_label(h),
-                        getattr(event, "type", "<unknown>"),
-                        exc_info=True,
-                    )
-                    continue
+    def publish(self, event: Event) -> None:
+        for h in self._matching(event):
+            self._invoke(h, event)
 
-                if asyncio.iscoroutine(res):
-                    try:
-                        loop = asyncio.get_running_loop()
-                    except RuntimeError:
-                        # Если нет текущего цикла, fallback на asyncio.run (CLI/скрипты).
-                        asyncio.run(res)
-                    else:
-                        loop.create_task(_run_coro_with_timing(res, h, event))
-                else:
-                    duration = time.perf_counter() - started
-                    if duration >= 0.05:
-                        _log.warning(
-                            "slow sync event handler handler=%s type=%s duration=%.3fs",
-                            _handler_label(h),
-                            getattr(event, "type", "<unknown>"),
-                            duration,
-                        )
+    async def publish_async(self, event: Event) -> None:
+        """
+        Как ``publish``, но для очередей с политикой ``block`` ждёт свободного
+        места вместо переполнения. Используется ``sdk.data.bus.emit``.
+        """
+        for h in self._matching(event):
+            if isinstance(h, _HandlerQueue):
+                await h.put(event)
+            else:
+                self._invoke(h, event)
+
+    def _invoke(self, h: Handler, event: Event) -> None:
+        started = time.perf_counter()
+        try:
+            res = h(event)
+        except Exception:  # pragma: no cover - defensive logging
+            _record(h, event, time.perf_counter() - started, error=True)
+            _log.warning(
+                "event handler crashed handler=%s type=%s",
+                _handler_label(h),
+                getattr(event, "type", "<unknown>"),
+                exc_info=True,
+            )
+            return
+
+        if asyncio.iscoroutine(res):
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                # Если нет текущего цикла, fallback на asyncio.run (CLI/скрипты).
+                asyncio.run(res)
+            else:
+                loop.create_task(_run_coro_with_timing(res, h, event))
+        elif not isinstance(h, _HandlerQueue):
+            duration = time.perf_counter() - started
+            _record(h, event, duration)
+            if duration >= 0.05:
+                _log.warning(
+                    "slow sync event handler handler=%s type=%s duration=%.3fs",
+                    _handler_label(h),
+                    getattr(event, "type", "<unknown>"),
+                    duration,
+                )
 
 
 def emit(bus: EventBus, type_: str, payload: dict, source: str) -> None:
@@ -0,0 +1,161 @@
+"""
+Per-handler latency statistics for the local event bus.
+
+``LocalEventBus`` records every handler invocation here (duration and whether
+it raised). Latencies go into log-linear (HDR-style) histograms, so p50/p95/p99
+are available with a bounded ~6% relative error and constant memory per
+handler, independent of the number of calls.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, List, Tuple
+
+# 16 linear sub-buckets per power of two → relative error <= 1/16
+_SUB_BITS = 4
+_SUB_COUNT = 1 << _SUB_BITS
+_MAX_TOPICS_PER_HANDLER = 64
+_OTHER_TOPIC = "<other>"
+
+
+def _bucket_index(value_us: int) -> int:
+    if value_us < _SUB_COUNT:
+        return max(value_us, 0)
+    shift = value_us.bit_length() - _SUB_BITS - 1
+    return (shift + 1) * _SUB_COUNT + ((value_us >> shift) - _SUB_COUNT)
+
+
+def _bucket_value(index: int) -> float:
+    """Midpoint of the bucket, in microseconds."""
+    if index < _SUB_COUNT:
+        return float(index)
+    shift = index // _SUB_COUNT - 1
+    low = (_SUB_COUNT + index % _SUB_COUNT) << shift
+    return low + ((1 << shift) - 1) / 2.0
+
+
+class LatencyHistogram:
+    """Log-linear histogram of durations with microsecond resolution."""
+
+    __slots__ = ("counts", "total", "sum_us", "max_us")
+
+    def __init__(self) -> None:
+        self.counts: List[int] = []
+        self.total = 0
+        self.sum_us = 0
+        self.max_us = 0
+
+    def record(self, seconds: float) -> None:
+        value = int(seconds * 1_000_000)
+        idx = _bucket_index(value)
+        if idx >= len(self.counts):
+            self.counts.extend([0] * (idx + 1 - len(self.counts)))
+        self.counts[idx] += 1
+        self.total += 1
+        self.sum_us += value
+        if value > self.max_us:
+            self.max_us = value
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        if len(other.counts) > len(self.counts):
+            self.counts.extend([0] * (len(other.counts) - len(self.counts)))
+        for i, c in enumerate(other.counts):
+            self.counts[i] += c
+        self.total += other.total
+        self.sum_us += other.sum_us
+        self.max_us = max(self.max_us, other.max_us)
+
+    def percentile(self, q: float) -> float:
+        """Return the q-th percentile (0..100) in milliseconds."""
+        if not self.total:
+            return 0.0
+        rank = max(1, int(round(self.total * q / 100.0)))
+        seen = 0
+        for idx, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return min(_bucket_value(idx), float(self.max_us)) / 1000.0
+        return self.max_us / 1000.0
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "p50_ms": round(self.percentile(50), 3),
+            "p95_ms": round(self.percentile(95), 3),
+            "p99_ms": round(self.percentile(99), 3),
+            "max_ms": round(self.max_us / 1000.0, 3),
+            "mean_ms": round(self.sum_us / self.total / 1000.0, 3) if self.total else 0.0,
+            "total_ms": round(self.sum_us / 1000.0, 3),
+        }
+
+
+class _Entry:
+    __slots__ = ("calls", "errors", "hist")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.hist = LatencyHistogram()
+
+
+class HandlerStats:
+    """Registry of per-(handler, topic) call counters and latency histograms."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, _Entry]] = {}
+
+    def record(self, handler: str, topic: str, seconds: float, *, error: bool = False) -> None:
+        with self._lock:
+            topics = self._entries.get(handler)
+            if topics is None:
+                topics = self._entries[handler] = {}
+            entry = topics.get(topic)
+            if entry is None:
+                if len(topics) >= _MAX_TOPICS_PER_HANDLER:
+                    topic = _OTHER_TOPIC
+                    entry = topics.get(topic)
+                if entry is None:
+                    entry = topics[topic] = _Entry()
+            entry.calls += 1
+            if error:
+                entry.errors += 1
+            entry.hist.record(seconds)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self, *, by_topic: bool = False) -> List[Dict[str, Any]]:
+        """
+        Return one row per handler (or per handler and topic when ``by_topic``),
+        sorted by total time spent, descending.
+        """
+        rows: List[Tuple[str, str | None, int, int, LatencyHistogram]] = []
+        with self._lock:
+            for handler, topics in self._entries.items():
+                if by_topic:
+                    for topic, e in topics.items():
+                        hist = LatencyHistogram()
+                        hist.merge(e.hist)
+                        rows.append((handler, topic, e.calls, e.errors, hist))
+                else:
+                    hist = LatencyHistogram()
+                    calls = errors = 0
+                    for e in topics.values():
+                        calls += e.calls
+                        errors += e.errors
+                        hist.merge(e.hist)
+                    rows.append((handler, None, calls, errors, hist))
+        out: List[Dict[str, Any]] = []
+        for handler, topic, calls, errors, hist in rows:
+            row: Dict[str, Any] = {"handler": handler}
+            if topic is not None:
+                row["topic"] = topic
+            row.update({"calls": calls, "errors": errors})
+            row.update(hist.summary())
+            out.append(row)
+        out.sort(key=lambda r: r["total_ms"], reverse=True)
+        return out
+
+
+HANDLER_STATS = HandlerStats()
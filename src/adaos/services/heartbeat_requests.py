@@ -42,6 +42,12 @@ class RequestsHeartbeat(HeartbeatPort):
         payload = {"node_id": node_id}
         if capacity is not None:
             payload["capacity"] = capacity
+        try:
+            from adaos.services.skill.tool_executor import get_tool_executor
+
+            payload["load"] = get_tool_executor().load()
+        except Exception:
+            pass
         r = await asyncio.to_thread(requests.post, url, json=payload, headers=headers, timeout=self.timeout)
         return r.status_code == 200
 
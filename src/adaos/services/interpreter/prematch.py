@@ -0,0 +1,323 @@
+"""
+In-process intent pre-matcher that runs ahead of the Rasa model.
+
+Short voice commands are very often said exactly as one of the training
+examples. Those are answered here without a round-trip to the interpreter
+worker:
+
+- exact tier — a hash table from the normalised example text (case folded,
+  ``ё`` → ``е``, punctuation dropped, whitespace collapsed) to its intent;
+- template tier — examples with Rasa entity annotations (``[Москва](city)``,
+  ``[Москва]{"entity": "city"}``) or ``{city}`` placeholders are compiled into
+  a token trie in which a slot is a wildcard edge of 1..``_MAX_SLOT_TOKENS``
+  tokens; a match returns the slot values as entities.
+
+Only unambiguous matches are answered (one intent, and for templates at least
+one literal token); anything else falls through to Rasa. The examples come
+from the same place the Rasa project is built from: ``config.yaml`` of the
+interpreter workspace (manual and scenario intents) and ``interpreter/intents.yml``
+of every installed skill. Each source file is compiled separately and cached
+by a hash of its content, so a refresh after ``skills.activated``/``scenarios.synced``
+only re-reads the files that changed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import yaml
+
+from adaos.services.agent_context import AgentContext
+from adaos.services.handler_stats import LatencyHistogram
+from adaos.services.interpreter.workspace import IntentMapping, InterpreterWorkspace, skill_intent_files
+
+_log = logging.getLogger("adaos.interpreter.prematch")
+
+_MAX_SLOT_TOKENS = 6
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_SLOT_RE = re.compile(r"\[([^\]]+)\]\((\w[\w.-]*)(?::[^)]*)?\)|\[([^\]]+)\](\{[^}]*\})|\{(\w+)\}")
+_EXTRACTOR = "adaos_prematch"
+
+
+def enabled() -> bool:
+    return (os.getenv("ADAOS_NLU_PREMATCH") or "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def _norm_token(token: str) -> str:
+    return token.casefold().replace("ё", "е")
+
+
+def _file_stamp(path: Path) -> Optional[bytes]:
+    # По содержимому, а не mtime: синхронизация NLU перезаписывает intents.yml
+    # навыков при каждом событии, даже без изменений.
+    try:
+        return hashlib.blake2b(path.read_bytes(), digest_size=16).digest()
+    except OSError:
+        return None
+
+
+# --------------------------------------------------------------- compilation
+_Pattern = Tuple[Tuple[str, str], ...]  # ("lit", token) | ("slot", entity)
+
+
+def _compile_example(example: str) -> Tuple[Optional[str], Optional[_Pattern]]:
+    """Normalised exact text for plain examples, a token pattern for annotated ones."""
+    parts: List[Tuple[str, str]] = []
+    pos = 0
+    has_slot = False
+    for m in _SLOT_RE.finditer(example):
+        parts.extend(("lit", _norm_token(t)) for t in _TOKEN_RE.findall(example[pos : m.start()]))
+        entity = m.group(2) or m.group(5)
+        if entity is None:
+            try:
+                entity = json.loads(m.group(4)).get("entity")
+            except (ValueError, AttributeError):
+                entity = None
+        if not entity:
+            return None, None
+        parts.append(("slot", str(entity)))
+        has_slot = True
+        pos = m.end()
+    parts.extend(("lit", _norm_token(t)) for t in _TOKEN_RE.findall(example[pos:]))
+    if not parts:
+        return None, None
+    if not has_slot:
+        return " ".join(tok for _, tok in parts), None
+    if not any(kind == "lit" for kind, _ in parts):
+        return None, None  # шаблон из одних слотов совпадёт с чем угодно
+    return None, tuple(parts)
+
+
+@dataclass(slots=True)
+class _Partition:
+    stamp: Any
+    intents: List[str]
+    exact: List[Tuple[str, str]]  # (normalised text, intent)
+    templates: List[Tuple[_Pattern, str]]
+
+
+def _partition(stamp: Any, mappings: Sequence[IntentMapping]) -> _Partition:
+    exact: List[Tuple[str, str]] = []
+    templates: List[Tuple[_Pattern, str]] = []
+    for mapping in mappings:
+        for example in mapping.examples or []:
+            if not isinstance(example, str):
+                continue
+            text, pattern = _compile_example(example)
+            if text:
+                exact.append((text, mapping.intent))
+            elif pattern:
+                templates.append((pattern, mapping.intent))
+    return _Partition(stamp=stamp, intents=[m.intent for m in mappings], exact=exact, templates=templates)
+
+
+@dataclass(slots=True)
+class _Node:
+    lit: Dict[str, "_Node"] = field(default_factory=dict)
+    slots: Dict[str, "_Node"] = field(default_factory=dict)
+    accept: set = field(default_factory=set)
+
+
+@dataclass(slots=True)
+class _Index:
+    exact: Dict[str, set]
+    root: _Node
+    templates: int
+
+
+def _build_index(partitions: Sequence[Tuple[_Partition, bool]], overriding: set) -> _Index:
+    exact: Dict[str, set] = {}
+    root = _Node()
+    count = 0
+    for part, overridable in partitions:
+        for text, intent in part.exact:
+            if overridable and intent in overriding:
+                continue
+            exact.setdefault(text, set()).add(intent)
+        for pattern, intent in part.templates:
+            if overridable and intent in overriding:
+                continue
+            node = root
+            for kind, value in pattern:
+                edges = node.lit if kind == "lit" else node.slots
+                node = edges.setdefault(value, _Node())
+            node.accept.add(intent)
+            count += 1
+    return _Index(exact=exact, root=root, templates=count)
+
+
+def _walk(node: _Node, tokens: Sequence[str], i: int, slots: List[Tuple[str, int, int]], out: List[Tuple[str, List[Tuple[str, int, int]]]]) -> None:
+    if len(out) > 1 and len({intent for intent, _ in out}) > 1:
+        return  # уже неоднозначно
+    if i == len(tokens):
+        for intent in node.accept:
+            out.append((intent, list(slots)))
+        return
+    nxt = node.lit.get(tokens[i])
+    if nxt is not None:
+        _walk(nxt, tokens, i + 1, slots, out)
+    for entity, child in node.slots.items():
+        for j in range(i + 1, min(i + _MAX_SLOT_TOKENS, len(tokens)) + 1):
+            slots.append((entity, i, j))
+            _walk(child, tokens, j, slots, out)
+            slots.pop()
+
+
+# ------------------------------------------------------------------- matcher
+class IntentPrematcher:
+    def __init__(self, ctx: AgentContext) -> None:
+        self._ctx = ctx
+        root = Path(ctx.paths.state_dir()) / "interpreter"
+        self.config_path = root / InterpreterWorkspace.CONFIG_FILENAME
+        self._lock = threading.Lock()
+        self._config: Optional[_Partition] = None
+        self._skills: Dict[str, _Partition] = {}
+        self._index: Optional[_Index] = None
+        self._latency = LatencyHistogram()
+        self._exact_hits = 0
+        self._template_hits = 0
+        self._misses = 0
+        self._rebuilds = 0
+        self._reparsed = 0
+        self._last_build_ms = 0.0
+
+    # -------------------------------------------------------------- building
+    def _read_config(self) -> List[IntentMapping]:
+        try:
+            data = yaml.safe_load(self.config_path.read_text(encoding="utf-8")) or {}
+        except (OSError, yaml.YAMLError):
+            return []
+        mappings = []
+        for entry in data.get("intents") or []:
+            if isinstance(entry, dict) and entry.get("intent"):
+                mappings.append(IntentMapping(intent=entry["intent"], examples=entry.get("examples") or []))
+        return mappings
+
+    def refresh(self) -> bool:
+        """
+        Re-read sources whose files changed and rebuild the index if anything
+        did. Returns True when the index was rebuilt.
+        """
+        started = time.perf_counter()
+        with self._lock:
+            changed = False
+            stamp = _file_stamp(self.config_path)
+            if self._config is None or self._config.stamp != stamp:
+                self._config = _partition(stamp, self._read_config())
+                self._reparsed += 1
+                changed = True
+
+            seen: Dict[str, _Partition] = {}
+            for skill_id, fpath in skill_intent_files(self._ctx):
+                key = str(fpath)
+                stamp = _file_stamp(fpath)
+                part = self._skills.get(key)
+                if part is None or part.stamp != stamp:
+                    part = _partition(stamp, InterpreterWorkspace.read_skill_intents(skill_id, fpath))
+                    self._reparsed += 1
+                    changed = True
+                seen[key] = part
+            if set(seen) != set(self._skills):
+                changed = True
+            self._skills = seen
+
+            if not changed and self._index is not None:
+                return False
+            # интенты из config.yaml перекрывают одноимённые интенты навыков (как в build_rasa_project)
+            overriding = set(self._config.intents)
+            ordered = [(self._config, False)] + [(seen[k], True) for k in sorted(seen)]
+            self._index = _build_index(ordered, overriding)
+            self._rebuilds += 1
+            self._last_build_ms = (time.perf_counter() - started) * 1000.0
+        _log.debug(
+            "intent prematcher rebuilt exact=%d templates=%d in %.1fms",
+            len(self._index.exact),
+            self._index.templates,
+            self._last_build_ms,
+        )
+        return True
+
+    # -------------------------------------------------------------- matching
+    def match(self, text: str) -> Optional[Dict[str, Any]]:
+        """
+        A Rasa-shaped parse result (``intent``, ``entities``) for a confident
+        match, or ``None`` when the text should go to the model.
+        """
+        index = self._index
+        if index is None:
+            self.refresh()
+            index = self._index
+        started = time.perf_counter()
+        spans = [(m.start(), m.end()) for m in _TOKEN_RE.finditer(text)]
+        tokens = [_norm_token(text[a:b]) for a, b in spans]
+        result: Optional[Dict[str, Any]] = None
+        intents = index.exact.get(" ".join(tokens)) if tokens else None
+        if intents and len(intents) == 1:
+            result = {"text": text, "intent": {"name": next(iter(intents)), "confidence": 1.0}, "entities": [], "prematch": "exact"}
+            self._exact_hits += 1
+        elif tokens and not intents:
+            found: List[Tuple[str, List[Tuple[str, int, int]]]] = []
+            _walk(index.root, tokens, 0, [], found)
+            if found and len({intent for intent, _ in found}) == 1:
+                intent, slots = found[0]
+                entities = [
+                    {
+                        "entity": entity,
+                        "value": text[spans[i][0] : spans[j - 1][1]],
+                        "start": spans[i][0],
+                        "end": spans[j - 1][1],
+                        "extractor": _EXTRACTOR,
+                    }
+                    for entity, i, j in slots
+                ]
+                result = {"text": text, "intent": {"name": intent, "confidence": 1.0}, "entities": entities, "prematch": "template"}
+                self._template_hits += 1
+        if result is None:
+            self._misses += 1
+        self._latency.record(time.perf_counter() - started)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        index = self._index
+        hits = self._exact_hits + self._template_hits
+        total = hits + self._misses
+        return {
+            "exact_phrases": len(index.exact) if index else 0,
+            "templates": index.templates if index else 0,
+            "sources": len(self._skills) + (1 if self._config is not None else 0),
+            "rebuilds": self._rebuilds,
+            "reparsed_sources": self._reparsed,
+            "last_build_ms": round(self._last_build_ms, 3),
+            "exact_hits": self._exact_hits,
+            "template_hits": self._template_hits,
+            "fallthrough": self._misses,
+            "hit_ratio": round(hits / total, 4) if total else 0.0,
+            "match_p50_us": round(self._latency.percentile(50) * 1000.0, 1),
+            "match_p99_us": round(self._latency.percentile(99) * 1000.0, 1),
+        }
+
+
+_MATCHER: Optional[Tuple[AgentContext, IntentPrematcher]] = None
+
+
+def get_prematcher(ctx: AgentContext) -> IntentPrematcher:
+    global _MATCHER
+    if _MATCHER is None or _MATCHER[0] is not ctx:
+        _MATCHER = (ctx, IntentPrematcher(ctx))
+    return _MATCHER[1]
+
+
+def prematch_stats() -> Optional[Dict[str, Any]]:
+    return _MATCHER[1].stats() if _MATCHER is not None else None
+
+
+__all__ = ["IntentPrematcher", "enabled", "get_prematcher", "prematch_stats"]
@@ -8,8 +8,9 @@ from typing import Any, Dict, List
 import yaml
 
 from adaos.services.agent_context import AgentContext, get_ctx
+from adaos.services.interpreter.prematch import get_prematcher
 from adaos.services.interpreter.workspace import InterpreterWorkspace, IntentMapping
-from adaos.services.interpreter.trainer import RasaTrainer
+from adaos.services.interpreter.trainer import RasaTrainer, schedule_training
 from adaos.services.scenarios import loader as scenarios_loader
 from adaos.sdk.core.decorators import subscribe
 
@@ -162,22 +163,27 @@ def sync_from_scenarios_and_skills(ctx: AgentContext) -> Dict[str, Any]:
     }
 
 
-def _maybe_autotrain(ctx: AgentContext) -> None:
+def _maybe_autotrain(ctx: AgentContext, reason: str = "") -> None:
     """
     Optionally trigger Rasa training after NLU data changes.
 
     Controlled by the ADAOS_INTERPRETER_AUTOTRAIN=1 env flag so that
     heavy training is opt-in and can be enabled in dev/prod as needed.
+    Bursts of change events (boot, deploy) are debounced into one
+    background job, which is skipped when the workspace fingerprint did
+    not change.
     """
     if os.getenv("ADAOS_INTERPRETER_AUTOTRAIN") != "1":
         return
     try:
-        ws = InterpreterWorkspace(ctx)
-        trainer = RasaTrainer(ws)
-        meta = trainer.train(note="auto-train")
-        _log.info("interpreter auto-train completed at %s", meta.get("trained_at"))
-    except Exception:
-        _log.warning("interpreter auto-train failed", exc_info=True)
+        schedule_training(ctx, reason=reason)
+    except RuntimeError:
+        # no running loop (CLI / tooling): train inline
+        try:
+            meta = RasaTrainer(InterpreterWorkspace(ctx)).train(note=f"auto-train: {reason}" if reason else "auto-train")
+            _log.info("interpreter auto-train completed at %s", meta.get("trained_at"))
+        except Exception:
+            _log.warning("interpreter auto-train failed", exc_info=True)
 
 
 def _handle_nlu_refresh(reason: str, webspace_id: str | None = None) -> None:
@@ -193,7 +199,11 @@ def _handle_nlu_refresh(reason: str, webspace_id: str | None = None) -> None:
         summary.get("skills_intents", 0),
         summary.get("scenario_intents", 0),
     )
-    _maybe_autotrain(ctx)
+    try:
+        get_prematcher(ctx).refresh()
+    except Exception:
+        _log.warning("intent prematcher refresh failed", exc_info=True)
+    _maybe_autotrain(ctx, reason)
 
 
 @subscribe("scenarios.synced")
@@ -8,17 +8,27 @@ Listens for ``nlp.intent.detect`` commands carrying raw user text and emits
 (``adaos.services.nlu.dispatcher``) and mapped to scenario/skill actions.
 """
 
-from typing import Any, Dict, Mapping
-import asyncio
+from typing import Any, Dict, Mapping, Optional, Tuple
 import logging
 
 from adaos.sdk.core.decorators import subscribe
 from adaos.services.agent_context import get_ctx
 from adaos.services.eventbus import emit as bus_emit
+from adaos.services.interpreter import prematch
 from adaos.services.interpreter.workspace import InterpreterWorkspace
 from adaos.services.interpreter.runtime import RasaNLURuntime
 
 _log = logging.getLogger("adaos.interpreter.router")
+# InterpreterWorkspace при создании синхронизирует датасеты — держим один
+# runtime на контекст, а не собираем его на каждое событие.
+_RUNTIME: Optional[Tuple[Any, RasaNLURuntime]] = None
+
+
+def _runtime(ctx: Any) -> RasaNLURuntime:
+    global _RUNTIME
+    if _RUNTIME is None or _RUNTIME[0] is not ctx:
+        _RUNTIME = (ctx, RasaNLURuntime(InterpreterWorkspace(ctx)))
+    return _RUNTIME[1]
 
 
 def _payload(evt: Any) -> Dict[str, Any]:
@@ -59,17 +69,16 @@ async def _on_nlp_intent_detect(evt: Any) -> None:
     text = text.strip()
 
     ctx = get_ctx()
-    ws = InterpreterWorkspace(ctx)
-    runtime = RasaNLURuntime(ws)
-
-    # Run heavy Rasa parsing in a worker thread to avoid blocking the
-    # main event loop (which also serves YJS websockets / HTTP).
-    loop = asyncio.get_running_loop()
-    try:
-        result = await loop.run_in_executor(None, runtime.parse, text)
-    except Exception:
-        _log.warning("nlp.intent.detect failed text=%r", text, exc_info=True)
-        return
+    # Exact/template phrases from the training data are answered in-process;
+    # the rest is parsed by the resident interpreter worker, the event loop
+    # (which also serves YJS websockets / HTTP) only awaits the result.
+    result = prematch.get_prematcher(ctx).match(text) if prematch.enabled() else None
+    if result is None:
+        try:
+            result = await _runtime(ctx).aparse(text)
+        except Exception:
+            _log.warning("nlp.intent.detect failed text=%r", text, exc_info=True)
+            return
 
     intent_block = result.get("intent") or {}
     intent_name = intent_block.get("name") if isinstance(intent_block, dict) else None
@@ -4,14 +4,18 @@ from __future__ import annotations
 Runtime helpers for executing the trained interpreter model (Rasa-based).
 
 This module mirrors environment/layout assumptions of RasaTrainer but only
-performs lightweight parsing of text into intents/slots.
+performs lightweight parsing of text into intents/slots. Parsing goes through
+the resident worker (``adaos.services.interpreter.worker``) that keeps the
+model loaded; ``ADAOS_NLU_WORKER=0`` falls back to a process per call.
 """
 
+import asyncio
 import json
 import subprocess
 from pathlib import Path
 from typing import Any, Dict, Optional
 
+from adaos.services.interpreter import worker as nlu_worker
 from adaos.services.interpreter.workspace import InterpreterWorkspace
 
 
@@ -67,6 +71,14 @@ class RasaNLURuntime:
             raise RuntimeError("No interpreter model found in models/interpreter; train the model first.")
         return best
 
+    def worker(self) -> nlu_worker.NLUWorker:
+        """Resident worker of this venv (shared by all runtimes using it)."""
+        return nlu_worker.get_nlu_worker(
+            self._venv_python(),
+            self._pick_model_path,
+            log_path=self.ws.root / "logs" / "nlu_worker.log",
+        )
+
     # --------------------------------------------------------------------- API
     def parse(self, text: str) -> Dict[str, Any]:
         """
@@ -76,6 +88,26 @@ class RasaNLURuntime:
             raise ValueError("text must be a non-empty string")
 
         self._ensure_env_exists()
+        if nlu_worker.enabled():
+            return self.worker().parse(text)
+        return self._parse_oneshot(text)
+
+    async def aparse(self, text: str) -> Dict[str, Any]:
+        """
+        Async variant of :meth:`parse` for event handlers: waits for the worker
+        without occupying an executor thread.
+        """
+        if not text or not isinstance(text, str):
+            raise ValueError("text must be a non-empty string")
+        loop = asyncio.get_running_loop()
+        if not nlu_worker.enabled():
+            return await loop.run_in_executor(None, self.parse, text)
+        if not self._venv_python().exists():
+            await loop.run_in_executor(None, self._ensure_env_exists)
+        return await self.worker().aparse(text)
+
+    def _parse_oneshot(self, text: str) -> Dict[str, Any]:
+        """Start the venv interpreter, load the model and parse a single text."""
         model_path = self._pick_model_path()
         python = self._venv_python()
 
@@ -1,16 +1,78 @@
 # src/adaos/services/interpreter/trainer.py
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import logging
+import os
+import re
 import subprocess
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
+from adaos.services.agent_context import AgentContext
 from adaos.services.interpreter.workspace import InterpreterWorkspace
 
+_log = logging.getLogger("adaos.interpreter.trainer")
+
+_MODEL_NAME = "interpreter_latest"
+_INSTALL_STAMP = ".adaos-rasa-version"
+_EPOCH_FRACTION = 0.5
+_INTENT_RE = re.compile(r"^\s*(?:-\s*intent|##\s*intent)\s*:\s*([^\s#]+)", re.MULTILINE)
+_ENTITY_RE = re.compile(r"\]\((\w[\w.-]*)(?::[^)]*)?\)|\"entity\"\s*:\s*\"([^\"]+)\"")
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return (os.getenv(name) or default).strip().lower() not in {"0", "false", "no", "off"}
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return max(0.0, float(os.getenv(name) or default))
+    except ValueError:
+        return default
+
+
+def _project_labels(project: Path) -> str:
+    """
+    Hash of the intent/entity label set of a built Rasa project.
+
+    Rasa can only finetune a model on data with the same labels; new
+    examples for existing intents are fine.
+    """
+    intents: set = set()
+    entities: set = set()
+    data_dir = project / "data"
+    for path in sorted(data_dir.rglob("*")) if data_dir.exists() else []:
+        if not path.is_file() or path.suffix not in (".yml", ".yaml", ".md"):
+            continue
+        try:
+            text = path.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError):
+            continue
+        intents.update(_INTENT_RE.findall(text))
+        entities.update(a or b for a, b in _ENTITY_RE.findall(text))
+    payload = "\n".join(sorted(intents)) + "\n--\n" + "\n".join(sorted(entities))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _file_hash(path: Path) -> Optional[str]:
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return None
+
 
 class RasaTrainer:
     """
     Handles Rasa training in an isolated Python 3.10 virtualenv.
+
+    ``train`` is a no-op when the workspace fingerprint matches the last
+    trained model, and finetunes the previous model (``--finetune``) when only
+    examples changed; a full retrain happens when the label set or pipeline
+    changed, or after ``ADAOS_INTERPRETER_FINETUNE_MAX`` finetunes in a row.
     """
 
     def __init__(self, workspace: InterpreterWorkspace, *, python_spec: str = "3.10", rasa_version: str = "3.6.20"):
@@ -43,23 +105,47 @@ class RasaTrainer:
         if not self._venv_python().exists():
             self._run(["py", f"-{self.python_spec}", "-m", "venv", str(self.env_dir)])
 
-    def _ensure_rasa_installed(self) -> None:
-        self._ensure_env()
-        python = self._venv_python()
-        self._run([str(python), "-m", "pip", "install", "-U", "pip"])
-        # Check whether rasa already installed with desired version
+    def _installed_rasa_version(self) -> Optional[str]:
         try:
-            subprocess.run(
-                [str(python), "-m", "pip", "show", "rasa"], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            proc = subprocess.run(
+                [str(self._venv_python()), "-m", "pip", "show", "rasa"], check=True, capture_output=True, text=True
             )
-        except subprocess.CalledProcessError:
-            pass
-        self._run([str(python), "-m", "pip", "install", f"rasa=={self.rasa_version}"])
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        for line in proc.stdout.splitlines():
+            if line.lower().startswith("version:"):
+                return line.split(":", 1)[1].strip()
+        return None
 
-    # ---------------------------------------------------------------- training
-    def train(self, *, note: Optional[str] = None) -> dict:
-        project = self.ws.build_rasa_project()
-        self._ensure_rasa_installed()
+    def _ensure_rasa_installed(self) -> None:
+        # установка фиксируется штампом в venv: повторные обучения не гоняют pip
+        stamp = self.env_dir / _INSTALL_STAMP
+        if self._venv_python().exists() and stamp.exists() and stamp.read_text(encoding="utf-8").strip() == self.rasa_version:
+            return
+        self._ensure_env()
+        if self._installed_rasa_version() != self.rasa_version:
+            python = self._venv_python()
+            self._run([str(python), "-m", "pip", "install", "-U", "pip"])
+            self._run([str(python), "-m", "pip", "install", f"rasa=={self.rasa_version}"])
+        stamp.write_text(self.rasa_version, encoding="utf-8")
+
+    def _model_path(self) -> Path:
+        return self.models_dir / f"{_MODEL_NAME}.tar.gz"
+
+    def _finetune_base(self, previous: Dict[str, Any], labels_hash: str, pipeline_hash: Optional[str]) -> Optional[Path]:
+        if not _env_flag("ADAOS_INTERPRETER_FINETUNE", "1"):
+            return None
+        model = self._model_path()
+        extra = previous.get("extra") or {}
+        if not model.exists() or not previous.get("fingerprint"):
+            return None
+        if extra.get("labels_hash") != labels_hash or extra.get("pipeline_hash") != pipeline_hash:
+            return None
+        if int(extra.get("finetune_streak") or 0) >= int(_env_number("ADAOS_INTERPRETER_FINETUNE_MAX", 5)):
+            return None  # периодически обучаем с нуля, чтобы не копить дрейф
+        return model
+
+    def _train_cmd(self, finetune: Optional[Path]) -> list[str]:
         rasa_exec = self._venv_rasa()
         cmd = [str(rasa_exec)]
         if rasa_exec.name == "python.exe":
@@ -68,11 +154,139 @@ class RasaTrainer:
             "train",
             "nlu",
             "--fixed-model-name",
-            "interpreter_latest",
+            _MODEL_NAME,
             "--out",
             str(self.models_dir),
         ]
-        self._run(cmd, cwd=project)
-        model_path = self.models_dir / "interpreter_latest.tar.gz"
-        meta = self.ws.record_training(note=note or "rasa-train", extra={"model_path": str(model_path)})
+        if finetune is not None:
+            cmd += ["--finetune", str(finetune), "--epoch-fraction", str(_EPOCH_FRACTION)]
+        return cmd
+
+    # ---------------------------------------------------------------- training
+    def train(self, *, note: Optional[str] = None, force: bool = False) -> dict:
+        """
+        Train the interpreter model and record the workspace fingerprint.
+
+        Returns the training metadata; when nothing changed since the last
+        training (and ``force`` is not set) the stored metadata is returned
+        with ``skipped=True`` and no subprocess is started.
+        """
+        previous = self.ws.load_metadata()
+        # build_rasa_project() пересобирает skills_auto, отпечаток снимаем после этого,
+        # но до сборки проекта: правки во время обучения должны остаться необученными
+        self.ws.generate_dataset_from_skills()
+        snapshot = self.ws.training_snapshot()
+        if not force and self._model_path().exists() and previous.get("fingerprint") == snapshot["fingerprint"]:
+            _log.info("interpreter training skipped: fingerprint unchanged")
+            return dict(previous, skipped=True)
+
+        started = time.monotonic()
+        project = self.ws.build_rasa_project()
+        labels_hash = _project_labels(project)
+        pipeline_hash = _file_hash(project / "config.yml")
+        self._ensure_rasa_installed()
+
+        base = None if force else self._finetune_base(previous, labels_hash, pipeline_hash)
+        mode = "finetune" if base is not None else "full"
+        try:
+            self._run(self._train_cmd(base), cwd=project)
+        except subprocess.CalledProcessError:
+            if base is None:
+                raise
+            _log.warning("interpreter finetune failed, retraining from scratch", exc_info=True)
+            mode = "full"
+            self._run(self._train_cmd(None), cwd=project)
+
+        streak = int((previous.get("extra") or {}).get("finetune_streak") or 0) + 1 if mode == "finetune" else 0
+        extra = {
+            "model_path": str(self._model_path()),
+            "mode": mode,
+            "labels_hash": labels_hash,
+            "pipeline_hash": pipeline_hash,
+            "finetune_streak": streak,
+            "duration_s": round(time.monotonic() - started, 3),
+        }
+        meta = self.ws.record_training(note=note or "rasa-train", extra=extra, snapshot=snapshot)
+        _log.info("interpreter trained mode=%s in %.1fs", mode, extra["duration_s"])
         return meta
+
+
+# ----------------------------------------------------------- background queue
+@dataclass(slots=True)
+class _PendingTraining:
+    task: Optional[asyncio.Task] = None
+    deadline: float = 0.0
+    requested: bool = False
+    reasons: List[str] = field(default_factory=list)
+
+
+_PENDING = _PendingTraining()
+_STATS: Dict[str, Any] = {"requests": 0, "runs": 0, "skipped": 0, "full": 0, "finetune": 0, "failed": 0, "last_duration_s": None}
+
+
+def _train_debounce_s() -> float:
+    return _env_number("ADAOS_INTERPRETER_TRAIN_DEBOUNCE_MS", 10000.0) / 1000.0
+
+
+def _train_blocking(ctx: AgentContext, note: str) -> Dict[str, Any]:
+    return RasaTrainer(InterpreterWorkspace(ctx)).train(note=note)
+
+
+async def _run_pending_training(ctx: AgentContext, state: _PendingTraining) -> None:
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            # окно «тишины»: каждый новый запрос отодвигает обучение
+            while (wait := state.deadline - loop.time()) > 0:
+                await asyncio.sleep(wait)
+            state.requested = False
+            note = "auto-train: " + ", ".join(dict.fromkeys(state.reasons))
+            state.reasons.clear()
+            _STATS["runs"] += 1
+            started = time.monotonic()
+            try:
+                meta = await asyncio.to_thread(_train_blocking, ctx, note)
+            except Exception:
+                _STATS["failed"] += 1
+                _log.warning("interpreter auto-train failed", exc_info=True)
+            else:
+                if meta.get("skipped"):
+                    _STATS["skipped"] += 1
+                else:
+                    mode = (meta.get("extra") or {}).get("mode") or "full"
+                    _STATS[mode] = _STATS.get(mode, 0) + 1
+                    _log.info("interpreter auto-train completed at %s", meta.get("trained_at"))
+            _STATS["last_duration_s"] = round(time.monotonic() - started, 3)
+            if not state.requested:
+                return
+    finally:
+        if state.task is asyncio.current_task():
+            state.task = None
+
+
+def schedule_training(ctx: AgentContext, *, reason: str = "", delay: Optional[float] = None) -> asyncio.Task:
+    """
+    Request an interpreter training from a running event loop.
+
+    Requests are debounced (``ADAOS_INTERPRETER_TRAIN_DEBOUNCE_MS``, default
+    10000, counted from the last request) into one job that runs in a worker
+    thread; a request made while training runs triggers exactly one more.
+    """
+    loop = asyncio.get_running_loop()
+    state = _PENDING
+    state.deadline = loop.time() + (_train_debounce_s() if delay is None else delay)
+    state.requested = True
+    if reason:
+        state.reasons.append(reason)
+        del state.reasons[:-16]
+    _STATS["requests"] += 1
+    if state.task is None or state.task.done():
+        state.task = loop.create_task(_run_pending_training(ctx, state))
+    return state.task
+
+
+def training_stats() -> Dict[str, Any]:
+    return dict(_STATS, pending=_PENDING.task is not None and not _PENDING.task.done())
+
+
+__all__ = ["RasaTrainer", "schedule_training", "training_stats"]
@@ -0,0 +1,386 @@
+"""
+Resident Rasa NLU inference worker.
+
+``RasaNLURuntime.parse`` used to start the venv interpreter for every
+utterance and load the whole model before parsing a single text. Here one
+long-lived process per venv loads the model once and serves parse requests
+over its stdin/stdout pipe (one JSON object per line):
+
+- requests that arrive while the worker is busy are sent together as the
+  next batch (``ADAOS_NLU_BATCH_MAX``, default 16), so a burst costs one
+  round-trip instead of one per utterance;
+- when the model file (``interpreter_latest.tar.gz``) changes, a standby
+  worker loads the new model in the background and replaces the active one
+  once it is ready — parsing is never blocked by a reload;
+- a crashed worker fails its in-flight batch and is restarted on the next
+  request;
+- parse latency (enqueue → result) is kept in a histogram, see :meth:`NLUWorker.stats`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import itertools
+import json
+import logging
+import os
+import queue
+import subprocess
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from adaos.services.handler_stats import LatencyHistogram
+
+_log = logging.getLogger("adaos.interpreter.worker")
+
+_RECHECK_S = 1.0
+
+# Выполняется интерпретатором venv (там нет adaos). Протокол идёт через копию
+# исходного stdout, а fd 1 перенаправлен в stderr, чтобы печать Rasa/TF не
+# ломала JSON-строки.
+_WORKER_CODE = r"""
+import asyncio
+import json
+import os
+import sys
+
+proto = os.fdopen(os.dup(1), "w", encoding="utf-8", buffering=1)
+os.dup2(2, 1)
+sys.stdout = sys.stderr
+
+
+def _load(model_path):
+    try:
+        from rasa.nlu.model import Interpreter  # Rasa 2.x
+        interpreter = Interpreter.load(model_path)
+        return lambda text: interpreter.parse(text)
+    except Exception:
+        from rasa.core.agent import Agent  # Rasa 3.x
+        agent = Agent.load(model_path)
+        loop = asyncio.new_event_loop()
+        return lambda text: loop.run_until_complete(agent.parse_message(text))
+
+
+try:
+    parse = _load(sys.argv[1])
+except BaseException as exc:
+    proto.write(json.dumps({"ready": False, "error": repr(exc)}) + "\n")
+    raise SystemExit(1)
+proto.write(json.dumps({"ready": True}) + "\n")
+
+for line in sys.stdin:
+    request = json.loads(line)
+    results = []
+    for text in request["texts"]:
+        try:
+            results.append({"ok": True, "result": parse(text)})
+        except Exception as exc:
+            results.append({"ok": False, "error": repr(exc)})
+    proto.write(json.dumps({"id": request["id"], "results": results}, ensure_ascii=False, default=str) + "\n")
+"""
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(int(os.getenv(name) or default), 1)
+    except ValueError:
+        return default
+
+
+def _model_stamp(path: Path) -> Tuple[str, int, int]:
+    st = path.stat()
+    return (str(path), st.st_mtime_ns, st.st_size)
+
+
+class NLUWorkerError(RuntimeError):
+    """The worker could not load the model or died while parsing."""
+
+
+class _Process:
+    def __init__(self, python: Path, model: Path, stamp: Tuple[str, int, int], env: Optional[Mapping[str, str]], log_path: Optional[Path]) -> None:
+        self.model = model
+        self.stamp = stamp
+        self._log_file = None
+        stderr: Any = subprocess.DEVNULL
+        if log_path is not None:
+            try:
+                log_path.parent.mkdir(parents=True, exist_ok=True)
+                self._log_file = stderr = open(log_path, "ab")
+            except OSError:
+                stderr = subprocess.DEVNULL
+        started = time.perf_counter()
+        self.proc = subprocess.Popen(
+            [str(python), "-c", _WORKER_CODE, str(model)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=stderr,
+            env=dict(env) if env is not None else None,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            bufsize=1,
+        )
+        line = self.proc.stdout.readline()
+        self.load_ms = (time.perf_counter() - started) * 1000.0
+        try:
+            hello = json.loads(line) if line else {}
+        except ValueError:
+            hello = {}
+        if not hello.get("ready"):
+            self.close()
+            raise NLUWorkerError(f"interpreter worker failed to load {model}: {hello.get('error') or 'no response'}")
+
+    @property
+    def pid(self) -> int:
+        return self.proc.pid
+
+    def request(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            self.proc.stdin.write(json.dumps(payload, ensure_ascii=False) + "\n")
+            self.proc.stdin.flush()
+            line = self.proc.stdout.readline()
+        except (OSError, ValueError) as exc:
+            raise NLUWorkerError(f"interpreter worker pipe failed: {exc}") from exc
+        if not line:
+            raise NLUWorkerError(f"interpreter worker exited (code={self.proc.poll()})")
+        return json.loads(line)
+
+    def close(self) -> None:
+        try:
+            if self.proc.stdin:
+                self.proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+        if self._log_file is not None:
+            self._log_file.close()
+
+
+class _Request:
+    __slots__ = ("text", "future", "enqueued")
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.future: Future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class NLUWorker:
+    def __init__(
+        self,
+        python: Path,
+        model_resolver: Callable[[], Path],
+        *,
+        env: Optional[Mapping[str, str]] = None,
+        log_path: Optional[Path] = None,
+        max_batch: Optional[int] = None,
+    ) -> None:
+        self.python = Path(python)
+        self.model_resolver = model_resolver
+        self.env = env
+        self.log_path = log_path
+        self.max_batch = max_batch or _env_int("ADAOS_NLU_BATCH_MAX", 16)
+        self._queue: "queue.Queue[Optional[_Request]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._active: Optional[_Process] = None
+        self._standby: Optional[threading.Thread] = None
+        self._ready: Optional[_Process] = None
+        self._failed_stamp: Optional[Tuple[str, int, int]] = None
+        self._checked_at = 0.0
+        self._ids = itertools.count(1)
+        self._closed = False
+        self._latency = LatencyHistogram()
+        self._requests = 0
+        self._batches = 0
+        self._errors = 0
+        self._swaps = 0
+        self._restarts = 0
+
+    # ------------------------------------------------------------------ API
+    def submit(self, text: str) -> Future:
+        if self._closed:
+            raise NLUWorkerError("interpreter worker is closed")
+        request = _Request(text)
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="adaos-nlu-worker", daemon=True)
+                self._thread.start()
+        self._queue.put(request)
+        return request.future
+
+    def parse(self, text: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        return self.submit(text).result(timeout)
+
+    async def aparse(self, text: str) -> Dict[str, Any]:
+        return await asyncio.wrap_future(self.submit(text))
+
+    def stats(self) -> Dict[str, Any]:
+        active = self._active
+        latency = self._latency
+        return {
+            "python": str(self.python),
+            "model": str(active.model) if active else None,
+            "pid": active.pid if active else None,
+            "model_load_ms": round(active.load_ms, 1) if active else None,
+            "reloading": self._standby is not None and self._standby.is_alive(),
+            "queued": self._queue.qsize(),
+            "requests": self._requests,
+            "batches": self._batches,
+            "avg_batch": round(self._requests / self._batches, 2) if self._batches else 0.0,
+            "errors": self._errors,
+            "swaps": self._swaps,
+            "restarts": self._restarts,
+            "p50_ms": round(latency.percentile(50), 3),
+            "p95_ms": round(latency.percentile(95), 3),
+            "p99_ms": round(latency.percentile(99), 3),
+            "max_ms": round(latency.max_us / 1000.0, 3),
+        }
+
+    def close(self) -> None:
+        self._closed = True
+        self._queue.put(None)
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=10)
+        for proc in (self._active, self._ready):
+            if proc is not None:
+                proc.close()
+        self._active = self._ready = None
+
+    # ------------------------------------------------------------- internals
+    def _spawn(self, model: Path, stamp: Tuple[str, int, int]) -> _Process:
+        return _Process(self.python, model, stamp, self.env, self.log_path)
+
+    def _load_standby(self, model: Path, stamp: Tuple[str, int, int]) -> None:
+        try:
+            proc = self._spawn(model, stamp)
+        except Exception:
+            # не перезапускаем загрузку того же файла каждую секунду
+            self._failed_stamp = stamp
+            _log.warning("interpreter model reload failed model=%s; keeping the current one", model, exc_info=True)
+            return
+        if self._closed:
+            proc.close()
+            return
+        self._ready = proc
+
+    def _current(self) -> _Process:
+        """The process to send the next batch to; starts or hot-swaps it as needed."""
+        ready, self._ready = self._ready, None
+        if ready is not None:
+            old, self._active = self._active, ready
+            self._swaps += 1
+            _log.info("interpreter model swapped to %s (loaded in %.0f ms)", ready.model, ready.load_ms)
+            if old is not None:
+                old.close()
+
+        now = time.monotonic()
+        if self._active is None or now - self._checked_at >= _RECHECK_S:
+            self._checked_at = now
+            if self._active is None:
+                model = self.model_resolver()
+                self._active = self._spawn(model, _model_stamp(model))
+                return self._active
+            try:
+                model = self.model_resolver()
+                stamp = _model_stamp(model)
+            except (OSError, RuntimeError):
+                # модель как раз переобучается/перезаписывается — работаем на текущей
+                return self._active
+            busy = self._standby is not None and self._standby.is_alive()
+            if stamp != self._active.stamp and stamp != self._failed_stamp and not busy:
+                self._standby = threading.Thread(
+                    target=self._load_standby, args=(model, stamp), name="adaos-nlu-reload", daemon=True
+                )
+                self._standby.start()
+        return self._active
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch: List[_Request] = [first]
+            while len(batch) < self.max_batch:
+                try:
+                    nxt = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    self._queue.put(None)
+                    break
+                batch.append(nxt)
+            self._serve(batch)
+
+    def _serve(self, batch: List[_Request]) -> None:
+        self._batches += 1
+        self._requests += len(batch)
+        proc: Optional[_Process] = None
+        try:
+            proc = self._current()
+            reply = proc.request({"id": next(self._ids), "texts": [r.text for r in batch]})
+            results = reply.get("results") or []
+        except Exception as exc:
+            self._errors += len(batch)
+            if proc is not None and isinstance(exc, NLUWorkerError) and proc is self._active:
+                # процесс умер посреди батча — следующий запрос поднимет новый
+                proc.close()
+                self._active = None
+                self._restarts += 1
+            for request in batch:
+                request.future.set_exception(exc)
+            return
+        done = time.perf_counter()
+        for request, item in itertools.zip_longest(batch, results[: len(batch)]):
+            if item and item.get("ok"):
+                self._latency.record(done - request.enqueued)
+                request.future.set_result(item.get("result") or {})
+            else:
+                self._errors += 1
+                error = (item or {}).get("error") or "no result"
+                request.future.set_exception(NLUWorkerError(f"parse failed: {error}"))
+
+
+_WORKERS: Dict[str, NLUWorker] = {}
+_WORKERS_LOCK = threading.Lock()
+
+
+def enabled() -> bool:
+    return (os.getenv("ADAOS_NLU_WORKER") or "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def get_nlu_worker(python: Path, model_resolver: Callable[[], Path], *, log_path: Optional[Path] = None) -> NLUWorker:
+    """Shared worker for a venv interpreter (one resident model per venv)."""
+    key = str(python)
+    with _WORKERS_LOCK:
+        worker = _WORKERS.get(key)
+        if worker is None or worker._closed:
+            worker = _WORKERS[key] = NLUWorker(python, model_resolver, log_path=log_path)
+        return worker
+
+
+def nlu_worker_stats() -> List[Dict[str, Any]]:
+    return [w.stats() for w in list(_WORKERS.values())]
+
+
+@atexit.register
+def shutdown_nlu_workers() -> None:
+    with _WORKERS_LOCK:
+        workers = list(_WORKERS.values())
+        _WORKERS.clear()
+    for worker in workers:
+        try:
+            worker.close()
+        except Exception:
+            pass
+
+
+__all__ = ["NLUWorker", "NLUWorkerError", "enabled", "get_nlu_worker", "nlu_worker_stats", "shutdown_nlu_workers"]
@@ -38,6 +38,25 @@ class IntentMapping:
         return {k: v for k, v in payload.items() if v not in (None, [], "")}
 
 
+def skill_intent_files(ctx: AgentContext) -> List[tuple[str, Path]]:
+    """(skill id, metadata file) for every installed skill that ships interpreter intents."""
+    files: List[tuple[str, Path]] = []
+    skills_root = Path(ctx.paths.skills_dir())
+    try:
+        skills = ctx.skills_repo.list()
+    except Exception:
+        skills = []
+    for meta in skills:
+        meta_dir = skills_root / meta.id.value / InterpreterWorkspace.SKILL_METADATA_DIR
+        if not meta_dir.exists():
+            continue
+        for fname in (InterpreterWorkspace.SKILL_METADATA_FILE, "intents.yaml"):
+            fpath = meta_dir / fname
+            if fpath.exists():
+                files.append((meta.id.value, fpath))
+    return files
+
+
 class InterpreterWorkspace:
     CONFIG_FILENAME = "config.yaml"
     METADATA_FILENAME = "metadata.json"
@@ -128,44 +147,40 @@ class InterpreterWorkspace:
         return dest
 
     # ----------------------------------------------------- skill metadata
-    def collect_skill_intents(self) -> List[IntentMapping]:
-        """Reads interpreter metadata from installed skills."""
-        result: List[IntentMapping] = []
-        skills_root = Path(self._ctx.paths.skills_dir())
+    def skill_intent_files(self) -> List[tuple[str, Path]]:
+        return skill_intent_files(self._ctx)
+
+    @staticmethod
+    def read_skill_intents(skill_id: str, fpath: Path) -> List[IntentMapping]:
         try:
-            skills = self._ctx.skills_repo.list()
+            payload = yaml.safe_load(fpath.read_text(encoding="utf-8")) or []
         except Exception:
-            skills = []
-        for meta in skills:
-            skill_path = skills_root / meta.id.value
-            meta_dir = skill_path / self.SKILL_METADATA_DIR
-            if not meta_dir.exists():
+            payload = []
+        if isinstance(payload, dict) and "intents" in payload:
+            payload = payload["intents"]
+        result: List[IntentMapping] = []
+        for entry in payload:
+            intent = (entry or {}).get("intent")
+            if not intent:
                 continue
-            for fname in (self.SKILL_METADATA_FILE, "intents.yaml"):
-                fpath = meta_dir / fname
-                if not fpath.exists():
-                    continue
-                try:
-                    payload = yaml.safe_load(fpath.read_text(encoding="utf-8")) or []
-                except Exception:
-                    payload = []
-                if isinstance(payload, dict) and "intents" in payload:
-                    payload = payload["intents"]
-                for entry in payload:
-                    intent = (entry or {}).get("intent")
-                    if not intent:
-                        continue
-                    examples = entry.get("examples") or []
-                    result.append(
-                        IntentMapping(
-                            intent=intent,
-                            description=entry.get("description"),
-                            skill=entry.get("skill") or meta.id.value,
-                            tool=entry.get("tool"),
-                            scenario=entry.get("scenario"),
-                            examples=examples,
-                        )
-                    )
+            examples = entry.get("examples") or []
+            result.append(
+                IntentMapping(
+                    intent=intent,
+                    description=entry.get("description"),
+                    skill=entry.get("skill") or skill_id,
+                    tool=entry.get("tool"),
+                    scenario=entry.get("scenario"),
+                    examples=examples,
+                )
+            )
+        return result
+
+    def collect_skill_intents(self) -> List[IntentMapping]:
+        """Reads interpreter metadata from installed skills."""
+        result: List[IntentMapping] = []
+        for skill_id, fpath in self.skill_intent_files():
+            result.extend(self.read_skill_intents(skill_id, fpath))
         return result
 
     def generate_dataset_from_skills(self) -> None:
@@ -328,6 +343,28 @@ class InterpreterWorkspace:
         }
         return _hash_payload(payload)
 
+    def training_snapshot(self) -> Dict[str, Any]:
+        """
+        Config/skills/datasets the model is about to be trained from. Taken
+        before training and passed to :meth:`record_training`, so changes made
+        while training runs still count as untrained.
+        """
+        config = self.load_config()
+        skills = self._skill_snapshot()
+        datasets = self._dataset_snapshot()
+        auto_intents = self._auto_intents_snapshot()
+        return {
+            "config": config,
+            "skills": skills,
+            "datasets": datasets,
+            "auto_intents": auto_intents,
+            "fingerprint": self.fingerprint(config, skills, datasets, auto_intents),
+        }
+
+    def current_fingerprint(self) -> str:
+        """Fingerprint of the current config/skills/datasets (what record_training would store)."""
+        return self.training_snapshot()["fingerprint"]
+
     # -------------------------------------------------------------- status info
     def describe_status(self) -> Dict[str, Any]:
         config = self.load_config()
@@ -450,14 +487,18 @@ class InterpreterWorkspace:
         return project
 
     # ---------------------------------------------------------------- training
-    def record_training(self, *, note: str | None = None, extra: Dict[str, Any] | None = None) -> Dict[str, Any]:
-        config = self.load_config()
-        skills = self._skill_snapshot()
-        datasets = self._dataset_snapshot()
-        auto_intents = self._auto_intents_snapshot()
+    def record_training(
+        self,
+        *,
+        note: str | None = None,
+        extra: Dict[str, Any] | None = None,
+        snapshot: Dict[str, Any] | None = None,
+    ) -> Dict[str, Any]:
+        snap = snapshot or self.training_snapshot()
+        config, skills, datasets, auto_intents = snap["config"], snap["skills"], snap["datasets"], snap["auto_intents"]
         meta = {
             "trained_at": _utc_now(),
-            "fingerprint": self.fingerprint(config, skills, datasets, auto_intents),
+            "fingerprint": snap["fingerprint"],
             "config_hash": self._config_hash(config),
             "skill_hash": self._skill_hash(skills),
             "dataset_hash": self._dataset_hash(datasets),
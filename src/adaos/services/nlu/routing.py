@@ -0,0 +1,300 @@
+"""
+Compiled NLU routing table: webspace → current scenario → intent → actions.
+
+The dispatcher used to open the webspace YDoc for every ``nlp.intent.detected``
+just to read ``ui.current_scenario`` and then walk the ``nlu`` section of
+``scenario.json``. Both are kept here instead:
+
+- the current scenario of a webspace is tracked by an observer on the ``ui``
+  map of its live YRoom (see :mod:`adaos.services.yjs.observers`). Webspaces
+  without a room are resolved from the YDoc once and then follow
+  ``desktop.scenario.set`` / ``scenarios.synced`` / reload events;
+- the ``nlu.intents`` section of a scenario is compiled once into action
+  tuples whose ``params`` templates (``$slot.x``, ``$ctx.*``, ``$text``) are
+  already parsed. A table is recompiled when the scenario is
+  installed/removed/synced or when the loader returns a different content.
+
+A dispatch is then two dict lookups, whatever the size of the document.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from adaos.sdk.core.decorators import subscribe
+from adaos.services.scenarios import loader as scenarios_loader
+from adaos.services.workspaces import index as workspace_index
+from adaos.services.yjs.doc import async_get_ydoc
+from adaos.services.yjs.observers import register_room_observer
+from adaos.services.yjs.webspace import default_webspace_id
+
+_log = logging.getLogger("adaos.nlu.routing")
+
+DEFAULT_SCENARIO = "web_desktop"
+
+# ("const", value) | ("slot", name) | ("ctx", name) | ("text", None)
+_Param = Tuple[str, str, Any]
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledAction:
+    type: str
+    target: str
+    params: Tuple[_Param, ...]
+
+
+@dataclass(slots=True)
+class _ScenarioRoutes:
+    source: Any  # dict из scenarios_loader.read_content, по нему видно смену содержимого
+    intents: Optional[Dict[str, Tuple[CompiledAction, ...]]]  # None — нет секции nlu.intents
+
+
+def _compile_param(value: Any) -> Tuple[str, Any]:
+    if not isinstance(value, str) or not value.startswith("$"):
+        return "const", value
+    token = value.strip()
+    if token.startswith("$slot.") or token.startswith("$slots."):
+        return "slot", token.split(".", 1)[1]
+    if token in ("$ctx.webspace_id", "$ctx.scenario_id"):
+        return "ctx", token.split(".", 1)[1]
+    if token == "$text":
+        return "text", None
+    return "const", None  # неизвестный шаблон, как и раньше, даёт None
+
+
+def compile_action(action: Mapping[str, Any]) -> Optional[CompiledAction]:
+    target = str(action.get("target") or "").strip()
+    if not target:
+        return None
+    base_params = action.get("params") or {}
+    if not isinstance(base_params, Mapping):
+        base_params = {}
+    params = tuple((key, *_compile_param(val)) for key, val in base_params.items())
+    return CompiledAction(type=str(action.get("type") or "").strip() or "callSkill", target=target, params=params)
+
+
+def _compile_intents(content: Any) -> Optional[Dict[str, Tuple[CompiledAction, ...]]]:
+    nlu = content.get("nlu") if isinstance(content, dict) else None
+    intents = nlu.get("intents") if isinstance(nlu, dict) else None
+    if not isinstance(intents, dict):
+        return None
+    table: Dict[str, Tuple[CompiledAction, ...]] = {}
+    for intent, spec in intents.items():
+        if not isinstance(spec, Mapping):
+            continue
+        actions = spec.get("actions") or []
+        if not isinstance(actions, list):
+            continue
+        compiled = []
+        for action in actions:
+            if not isinstance(action, Mapping):
+                continue
+            item = compile_action(action)
+            if item is None:
+                _log.debug("nlu.intent %s: action missing target", intent)
+                continue
+            compiled.append(item)
+        table[str(intent)] = tuple(compiled)
+    return table
+
+
+class NLURoutingTable:
+    def __init__(self) -> None:
+        self._current: Dict[str, str] = {}
+        self._live: Dict[str, Tuple[int, Any, Any]] = {}  # webspace -> (id(ydoc), ui map, subscription)
+        self._routes: Dict[str, _ScenarioRoutes] = {}
+        self._doc_reads = 0
+        self._compiles = 0
+        self._hits = 0
+
+    # ------------------------------------------------------ current scenario
+    def observe_room(self, webspace_id: str, ydoc: Any) -> None:
+        """Room observer: follow ``ui.current_scenario`` of a live YRoom."""
+        live = self._live.get(webspace_id)
+        if live is not None and live[0] == id(ydoc):
+            return
+        self._unobserve(webspace_id)
+        ui_map = ydoc.get_map("ui")
+
+        def _on_ui(event: Any) -> None:
+            change = (getattr(event, "keys", None) or {}).get("current_scenario")
+            if change is not None:
+                self._set_current(webspace_id, change.get("newValue"))
+
+        sub = ui_map.observe(_on_ui)
+        self._live[webspace_id] = (id(ydoc), ui_map, sub)
+        self._set_current(webspace_id, ui_map.get("current_scenario"))
+
+    def _unobserve(self, webspace_id: str) -> None:
+        live = self._live.pop(webspace_id, None)
+        if live is None:
+            return
+        try:
+            live[1].unobserve(live[2])
+        except Exception:
+            pass
+
+    def _set_current(self, webspace_id: str, value: Any) -> None:
+        self._current[webspace_id] = value.strip() if isinstance(value, str) and value.strip() else DEFAULT_SCENARIO
+
+    def is_live(self, webspace_id: str) -> bool:
+        return webspace_id in self._live
+
+    def set_current(self, webspace_id: str, scenario_id: str) -> None:
+        """Hint from an event; a live room observer stays authoritative."""
+        if not self.is_live(webspace_id):
+            self._set_current(webspace_id, scenario_id)
+
+    def forget_webspace(self, webspace_id: str, *, detach: bool = False) -> None:
+        if detach:
+            self._unobserve(webspace_id)
+        if not self.is_live(webspace_id):
+            self._current.pop(webspace_id, None)
+
+    async def current_scenario(self, webspace_id: str) -> str:
+        scenario_id = self._current.get(webspace_id)
+        if scenario_id is not None:
+            self._hits += 1
+            return scenario_id
+        scenario_id = DEFAULT_SCENARIO
+        try:
+            async with async_get_ydoc(webspace_id) as ydoc:
+                current = ydoc.get_map("ui").get("current_scenario")
+                if isinstance(current, str) and current.strip():
+                    scenario_id = current.strip()
+        except Exception:
+            _log.debug("failed to resolve current_scenario for webspace=%s", webspace_id, exc_info=True)
+            return scenario_id
+        self._doc_reads += 1
+        # пока читали, мог подключиться room-observer — его значение точнее
+        return self._current.setdefault(webspace_id, scenario_id)
+
+    # ------------------------------------------------------------ scenarios
+    def intents(self, scenario_id: str) -> Optional[Dict[str, Tuple[CompiledAction, ...]]]:
+        try:
+            content = scenarios_loader.read_content(scenario_id)
+        except FileNotFoundError:
+            content = None
+        except Exception:
+            _log.warning("failed to read scenario.json for '%s' (nlu)", scenario_id, exc_info=True)
+            return None
+        routes = self._routes.get(scenario_id)
+        if routes is None or routes.source is not content:
+            routes = _ScenarioRoutes(source=content, intents=_compile_intents(content))
+            self._routes[scenario_id] = routes
+            self._compiles += 1
+        return routes.intents
+
+    def forget_scenario(self, scenario_id: Optional[str] = None) -> None:
+        if scenario_id:
+            self._routes.pop(scenario_id, None)
+        else:
+            self._routes.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "webspaces": len(self._current),
+            "live_webspaces": len(self._live),
+            "scenarios": len(self._routes),
+            "cached_lookups": self._hits,
+            "doc_reads": self._doc_reads,
+            "compiles": self._compiles,
+        }
+
+
+_TABLE = NLURoutingTable()
+
+
+def get_routing_table() -> NLURoutingTable:
+    return _TABLE
+
+
+def routing_stats() -> Dict[str, Any]:
+    return _TABLE.stats()
+
+
+def _room_observer(webspace_id: str, ydoc: Any) -> None:
+    _TABLE.observe_room(webspace_id, ydoc)
+
+
+register_room_observer(_room_observer)
+
+
+def _webspace(evt: Mapping[str, Any]) -> str:
+    # тот же порядок, что и у webspace_runtime._webspace_id
+    token = evt.get("webspace_id") or evt.get("workspace_id")
+    meta = evt.get("_meta")
+    if not token and isinstance(meta, Mapping):
+        token = meta.get("webspace_id") or meta.get("workspace_id")
+    return str(token) if token else default_webspace_id()
+
+
+def _scenario_space(webspace_id: str) -> str:
+    # как в webspace_runtime: dev-вебспейсы берут сценарии из dev-пространства
+    from adaos.services.scenario.webspace_runtime import _is_dev_title  # pylint: disable=import-outside-toplevel
+
+    try:
+        row = workspace_index.get_workspace(webspace_id)
+        if row and _is_dev_title(row.display_name or row.workspace_id):
+            return "dev"
+    except Exception:
+        pass
+    return "workspace"
+
+
+@subscribe("desktop.scenario.set")
+async def _on_scenario_set(evt: Dict[str, Any]) -> None:
+    scenario_id = str(evt.get("scenario_id") or "").strip()
+    if not scenario_id:
+        return
+    webspace_id = _webspace(evt)
+    # webspace_runtime переключает current_scenario, только если у сценария есть scenario.json
+    try:
+        content = scenarios_loader.read_content(scenario_id, space=_scenario_space(webspace_id))
+    except Exception:
+        content = None
+    if content:
+        _TABLE.set_current(webspace_id, scenario_id)
+
+
+@subscribe("scenarios.synced")
+async def _on_scenarios_synced(evt: Dict[str, Any]) -> None:
+    # событие отправляется после записи в YDoc, так что перечитать безопасно
+    _TABLE.forget_webspace(_webspace(evt))
+    scenario_id = str(evt.get("scenario_id") or "").strip()
+    _TABLE.forget_scenario(scenario_id or None)
+
+
+@subscribe("scenario.installed")
+async def _on_scenario_installed(evt: Dict[str, Any]) -> None:
+    _TABLE.forget_scenario(str(evt.get("id") or evt.get("scenario_id") or "") or None)
+
+
+@subscribe("scenario.removed")
+async def _on_scenario_removed(evt: Dict[str, Any]) -> None:
+    _TABLE.forget_scenario(str(evt.get("id") or "") or None)
+
+
+@subscribe("desktop.webspace.reload")
+async def _on_webspace_reload(evt: Dict[str, Any]) -> None:
+    # комната сбрасывается, и webspace пересевается из сценария запроса
+    webspace_id = _webspace(evt)
+    _TABLE.forget_webspace(webspace_id, detach=True)
+    _TABLE.set_current(webspace_id, str(evt.get("scenario_id") or DEFAULT_SCENARIO))
+
+
+@subscribe("desktop.webspace.reset")
+async def _on_webspace_reset(evt: Dict[str, Any]) -> None:
+    await _on_webspace_reload(evt)
+
+
+@subscribe("desktop.webspace.delete")
+async def _on_webspace_delete(evt: Dict[str, Any]) -> None:
+    webspace_id = str(evt.get("id") or "").strip()
+    if webspace_id:
+        _TABLE.forget_webspace(webspace_id, detach=True)
+
+
+__all__ = ["CompiledAction", "NLURoutingTable", "compile_action", "get_routing_table", "routing_stats"]
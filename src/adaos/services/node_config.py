@@ -5,6 +5,8 @@ from pathlib import Path
 from typing import Any, TypedDict
 import os
 import sys
+import threading
+import time
 import uuid
 import yaml
 from adaos.services.agent_context import get_ctx, AgentContext  # type: ignore
@@ -451,6 +453,7 @@ def save_node(conf: NodeConfig, *, ctx: AgentContext | None = None) -> None:
         yaml.safe_dump(merged, allow_unicode=True, sort_keys=False),
         encoding="utf-8",
     )
+    invalidate_config_snapshot()
 
 
 def ensure_hub(conf: NodeConfig) -> None:
@@ -481,3 +484,49 @@ def load_config(ctx: AgentContext | None = None) -> NodeConfig:
 
 def save_config(conf: NodeConfig, *, ctx: AgentContext | None = None) -> None:
     save_node(conf, ctx=ctx)
+
+
+# --- process-wide snapshot for hot paths (observe emit, etc.) ---
+
+_SNAPSHOT_RECHECK_S = 1.0
+_snapshot_lock = threading.Lock()
+# (node.yaml path, mtime_ns, monotonic time of the last mtime check, config)
+_snapshot: tuple[Path, int, float, NodeConfig] | None = None
+
+
+def _mtime_ns(path: Path) -> int:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return -1
+
+
+def config_snapshot() -> NodeConfig:
+    """
+    Cached NodeConfig for per-event code paths.
+
+    node.yaml is re-read only after ``save_node``/``invalidate_config_snapshot``
+    or when its mtime changes (checked at most once per second), so edits made
+    by another process (e.g. CLI) are picked up without a disk read per call.
+    The returned object is shared — treat it as read-only.
+    """
+    global _snapshot
+    path = get_ctx().paths.base_dir() / "node.yaml"
+    snap = _snapshot
+    now = time.monotonic()
+    if snap is not None and snap[0] == path:
+        if now - snap[2] < _SNAPSHOT_RECHECK_S:
+            return snap[3]
+        mtime = _mtime_ns(path)
+        if mtime == snap[1]:
+            _snapshot = (path, mtime, now, snap[3])
+            return snap[3]
+    with _snapshot_lock:
+        conf = load_config()
+        _snapshot = (path, _mtime_ns(path), time.monotonic(), conf)
+    return conf
+
+
+def invalidate_config_snapshot() -> None:
+    global _snapshot
+    _snapshot = None
@@ -1,13 +1,12 @@
 # src/adaos/services/observe.py
 from __future__ import annotations
-import asyncio, json, time, uuid, gzip, os
+import asyncio, json, time, uuid, gzip, os, shutil, threading, atexit, logging
+from collections import deque
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-
-import requests
+from typing import Any, Deque, Dict, List, Optional
 
 from adaos.services.agent_context import get_ctx
-from adaos.services.node_config import load_config
+from adaos.services.node_config import config_snapshot
 from adaos.services.settings import Settings
 from adaos.sdk.data import bus as bus_module  # будем мягко оборачивать emit
 
@@ -35,31 +34,113 @@ _KEEP = 3
 _LOG_TASK: Optional[asyncio.Task] = None
 _QUEUE: "asyncio.Queue[Dict[str, Any]]" | None = None
 _ORIG_EMIT = None
-_LOG_FILE: Path | None = None
+
+_log = logging.getLogger("adaos.observe")
+
+
+class _Subscriber:
+    __slots__ = ("queue", "topic_prefix", "node_id", "since", "dropped", "delivered")
+
+    def __init__(self, queue: asyncio.Queue, topic_prefix: str, node_id: str | None, since: float | None) -> None:
+        self.queue = queue
+        self.topic_prefix = topic_prefix
+        self.node_id = node_id
+        self.since = since
+        self.dropped = 0
+        self.delivered = 0
 
 
 class EventBroadcaster:
-    def __init__(self):
-        self._subs: List[asyncio.Queue] = []
+    """
+    Раздача событий SSE-подписчикам.
+
+    Подписчики индексируются по node_id и префиксу топика, так что событие
+    попадает только в очереди, чьи фильтры оно проходит. Последние события
+    хранятся в кольцевом буфере для replay (since_ts / последние N).
+    """
+
+    def __init__(self, history: int = 2000):
+        # node_id (None — любой) -> topic_prefix ("" — любой) -> подписчики
+        self._index: Dict[str | None, Dict[str, List[_Subscriber]]] = {}
+        self._by_queue: Dict[int, _Subscriber] = {}
+        self._history: Deque[Dict[str, Any]] = deque(maxlen=history)
 
     async def publish(self, evt: Dict[str, Any]):
-        for q in list(self._subs):
-            try:
-                if q.full():
-                    _ = q.get_nowait()
-                q.put_nowait(evt)
-            except Exception:
-                try:
-                    self._subs.remove(q)
-                except Exception:
-                    pass
+        self._history.append(evt)
+        if not self._by_queue:
+            return
+        topic = str(evt.get("topic", ""))
+        node_id = evt.get("node_id")
+        buckets = [self._index.get(None)]
+        if node_id is not None:
+            buckets.append(self._index.get(str(node_id)))
+        for by_prefix in buckets:
+            if not by_prefix:
+                continue
+            for prefix, subs in by_prefix.items():
+                if prefix and not topic.startswith(prefix):
+                    continue
+                for sub in subs:
+                    self._deliver(sub, evt)
+
+    def _deliver(self, sub: _Subscriber, evt: Dict[str, Any]) -> None:
+        q = sub.queue
+        try:
+            if q.full():
+                _ = q.get_nowait()
+                sub.dropped += 1
+            q.put_nowait(evt)
+            sub.delivered += 1
+        except Exception:
+            self.unsubscribe(q)
 
     def subscribe(self, *, topic_prefix: str | None, node_id: str | None, since_ts: float | None) -> "asyncio.Queue[Dict[str, Any]]":
         q: asyncio.Queue = asyncio.Queue(maxsize=500)
         q._adaos_filter = {"topic_prefix": topic_prefix, "node_id": node_id, "since": since_ts}  # type: ignore[attr-defined]
-        self._subs.append(q)
+        sub = _Subscriber(q, topic_prefix or "", node_id or None, since_ts)
+        self._index.setdefault(sub.node_id, {}).setdefault(sub.topic_prefix, []).append(sub)
+        self._by_queue[id(q)] = sub
         return q
 
+    def unsubscribe(self, q: asyncio.Queue) -> None:
+        sub = self._by_queue.pop(id(q), None)
+        if sub is None:
+            return
+        by_prefix = self._index.get(sub.node_id) or {}
+        subs = by_prefix.get(sub.topic_prefix) or []
+        if sub in subs:
+            subs.remove(sub)
+        if not subs:
+            by_prefix.pop(sub.topic_prefix, None)
+        if not by_prefix:
+            self._index.pop(sub.node_id, None)
+
+    def replay(
+        self,
+        *,
+        topic_prefix: str | None,
+        node_id: str | None,
+        since_ts: float | None = None,
+        last: int | None = None,
+    ) -> List[Dict[str, Any]]:
+        """События из кольцевого буфера: новее since_ts и/или последние ``last`` подходящих."""
+        out = [e for e in self._history if pass_filters(e, topic_prefix, node_id, since_ts)]
+        if last is not None:
+            out = out[-int(last) :] if last > 0 else []
+        return out
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "topic_prefix": sub.topic_prefix or None,
+                "node_id": sub.node_id,
+                "depth": sub.queue.qsize(),
+                "delivered": sub.delivered,
+                "dropped": sub.dropped,
+            }
+            for sub in self._by_queue.values()
+        ]
+
 
 BROADCAST = EventBroadcaster()
 
@@ -81,16 +162,7 @@ def _ensure_trace(kwargs: Dict[str, Any]) -> str:
 
 
 def _serialize_event(topic: str, payload: Dict[str, Any], kwargs: Dict[str, Any]) -> Dict[str, Any]:
-    try:
-        ctx = get_ctx()
-        conf = getattr(ctx, "config", None) or load_config()
-        try:
-            if getattr(ctx, "config", None) is None:
-                object.__setattr__(ctx, "config", conf)
-        except Exception:
-            pass
-    except Exception:
-        conf = load_config()
+    conf = config_snapshot()
     return {
         "ts": _now_ts(),
         "topic": topic,
@@ -107,74 +179,374 @@ def _rotate_if_needed(path: Path):
     try:
         if path.exists() and path.stat().st_size >= _MAX_BYTES:
             for i in range(_KEEP, 0, -1):
-                src = path.with_suffix(path.suffix + ("" if i == 1 else f".{i-1}.gz"))
                 dst = path.with_suffix(path.suffix + f".{i}.gz")
                 if i == 1:
-                    if path.exists():
-                        data = path.read_bytes()
-                        with gzip.open(path.with_suffix(path.suffix + ".1.gz"), "wb") as gz:
-                            gz.write(data)
-                        path.unlink(missing_ok=True)
+                    with path.open("rb") as src, gzip.open(dst, "wb") as gz:
+                        shutil.copyfileobj(src, gz)
+                    path.unlink(missing_ok=True)
                 else:
+                    src = path.with_suffix(path.suffix + f".{i-1}.gz")
                     if src.exists():
-                        src.rename(dst)
+                        os.replace(src, dst)
     except Exception:
         pass
 
 
+class _EventLogWriter:
+    """
+    Фоновая запись events.log.
+
+    События складываются в кольцевой буфер (при переполнении вытесняются
+    самые старые, счётчик ``dropped``), отдельный поток сериализует их
+    пачками в уже открытый файл, ротирует его по размеру и сжимает архив —
+    всё вне event loop.
+
+    fsync-политика (ADAOS_EVENTS_FSYNC):
+      * ``none``     — полагаемся на ОС (по умолчанию);
+      * ``batch``    — fsync после каждой пачки;
+      * ``interval`` — не чаще раза в ADAOS_EVENTS_FSYNC_INTERVAL секунд.
+    """
+
+    def __init__(
+        self,
+        *,
+        capacity: int = 10000,
+        batch_size: int = 512,
+        flush_interval: float = 0.2,
+        fsync: str = "none",
+        fsync_interval: float = 1.0,
+    ) -> None:
+        if fsync not in ("none", "batch", "interval"):
+            raise ValueError(f"unknown fsync policy {fsync!r}")
+        self._buf: Deque[Dict[str, Any]] = deque(maxlen=capacity)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._fsync = fsync
+        self._fsync_interval = fsync_interval
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._stopping = False
+        self._pending = 0  # записи, взятые из буфера, но ещё не записанные
+        self._last_fsync = 0.0
+        self.written = 0
+        self.dropped = 0
+
+    @staticmethod
+    def from_env() -> "_EventLogWriter":
+        return _EventLogWriter(
+            capacity=int(os.getenv("ADAOS_EVENTS_BUFFER", "10000") or 10000),
+            fsync=(os.getenv("ADAOS_EVENTS_FSYNC", "none") or "none").lower(),
+            fsync_interval=float(os.getenv("ADAOS_EVENTS_FSYNC_INTERVAL", "1.0") or 1.0),
+        )
+
+    def write(self, e: Dict[str, Any]) -> None:
+        with self._cond:
+            if len(self._buf) == self._buf.maxlen:
+                self.dropped += 1
+            was_empty = not self._buf
+            self._buf.append(e)
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="adaos-events-log", daemon=True)
+                self._thread.start()
+            if was_empty or len(self._buf) >= self._batch_size:
+                self._cond.notify()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Дождаться записи всего, что уже в буфере."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._cond.notify_all()
+            while self._buf or self._pending:
+                if self._thread is None or not self._thread.is_alive():
+                    return False
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(min(remaining, 0.05))
+        return True
+
+    def close(self, timeout: float = 5.0) -> None:
+        self.flush(timeout)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _run(self) -> None:
+        path = _log_path()
+        _rotate_if_needed(path)
+        f = None
+        try:
+            while True:
+                with self._cond:
+                    if not self._buf and not self._stopping:
+                        self._cond.wait()
+                    if not self._stopping and len(self._buf) < self._batch_size:
+                        # даём пачке набраться
+                        self._cond.wait(self._flush_interval)
+                    batch = list(self._buf)
+                    self._buf.clear()
+                    self._pending = len(batch)
+                    stopping = self._stopping
+                if batch:
+                    try:
+                        if f is None:
+                            f = path.open("a", encoding="utf-8")
+                        f.write("".join(json.dumps(e, ensure_ascii=False, default=str) + "\n" for e in batch))
+                        f.flush()
+                        self._maybe_fsync(f)
+                        self.written += len(batch)
+                        if os.fstat(f.fileno()).st_size >= _MAX_BYTES:
+                            f.close()
+                            f = None
+                            _rotate_if_needed(path)
+                    except Exception:
+                        _log.warning("events.log write failed, batch of %d lost", len(batch), exc_info=True)
+                        if f is not None:
+                            try:
+                                f.close()
+                            except Exception:
+                                pass
+                            f = None
+                with self._cond:
+                    self._pending = 0
+                    self._cond.notify_all()
+                if stopping and not batch:
+                    return
+        finally:
+            if f is not None:
+                try:
+                    f.close()
+                except Exception:
+                    pass
+
+    def _maybe_fsync(self, f) -> None:
+        if self._fsync == "none":
+            return
+        now = time.monotonic()
+        if self._fsync == "interval" and now - self._last_fsync < self._fsync_interval:
+            return
+        os.fsync(f.fileno())
+        self._last_fsync = now
+
+
+_WRITER = _EventLogWriter.from_env()
+atexit.register(_WRITER.close, 2.0)
+
+
 def _write_local(e: Dict[str, Any]) -> None:
-    global _LOG_FILE
-    if _LOG_FILE is None:
-        _LOG_FILE = _log_path()
-    with _LOG_FILE.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(e, ensure_ascii=False) + "\n")
+    _WRITER.write(e)
 
 
-async def _push_loop():
-    """Фоновая отправка батчей логов на hub (для member)."""
-    assert _QUEUE is not None
-    try:
-        ctx = get_ctx()
-        conf = getattr(ctx, "config", None) or load_config()
+class _PushSpool:
+    """
+    Дисковый журнал неотправленных на hub событий (member).
+
+    Сюда попадают события, не поместившиеся в очередь отправки, и всё, что
+    осталось в очереди при остановке. Журнал отправляется первым при
+    следующем запуске push-цикла; доставка — at-least-once.
+    Файловые операции выполняются вне event loop (``asyncio.to_thread``);
+    в памяти копится не больше ``max_pending`` событий, излишек сбрасывается
+    на диск в фоне.
+    """
+
+    def __init__(self, path: Path, *, max_pending: int = 1000) -> None:
+        self.path = path
+        self._sending = path.with_suffix(path.suffix + ".sending")
+        self._pending: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        self._max_pending = max(1, max_pending)
+        self._spilling = False
+        self._journaled = False
+        self.spilled = 0
+
+    def add(self, e: Dict[str, Any]) -> None:
+        with self._lock:
+            self._pending.append(e)
+            self.spilled += 1
+            overflow = len(self._pending) >= self._max_pending and not self._spilling
+            if overflow:
+                self._spilling = True
+        if overflow:
+            self._spill()
+
+    def _spill(self) -> None:
         try:
-            if getattr(ctx, "config", None) is None:
-                object.__setattr__(ctx, "config", conf)
-        except Exception:
-            pass
-    except Exception:
-        conf = load_config()
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+        else:
+            loop.run_in_executor(None, self.flush)
+
+    def has_pending(self) -> bool:
+        return bool(self._pending)
+
+    def take_journaled(self) -> bool:
+        """Были ли записи в журнал с прошлого вызова (в т.ч. фоновым сбросом)."""
+        with self._lock:
+            journaled, self._journaled = self._journaled, False
+        return journaled
+
+    def flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._spilling = False
+        if not pending:
+            return
+        with self._file_lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(e, ensure_ascii=False, default=str) + "\n" for e in pending))
+        with self._lock:
+            self._journaled = True
+
+    def claim(self) -> List[Dict[str, Any]]:
+        """
+        Забрать журнал целиком (он переименовывается в .sending до подтверждения).
+        Если .sending остался от прошлой попытки, новые записи журнала
+        дописываются к нему, чтобы уйти в той же отправке.
+        """
+        with self._file_lock:
+            if not self._sending.exists():
+                if not self.path.exists():
+                    return []
+                os.replace(self.path, self._sending)
+            elif self.path.exists():
+                with self.path.open("rb") as src, self._sending.open("ab") as dst:
+                    shutil.copyfileobj(src, dst)
+                self.path.unlink()
+            out: List[Dict[str, Any]] = []
+            with self._sending.open("r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        out.append(json.loads(line))
+                    except Exception:
+                        continue
+            return out
+
+    def requeue(self, remaining: List[Dict[str, Any]]) -> None:
+        """Сохранить неотправленный остаток забранного журнала."""
+        with self._file_lock:
+            tmp = self._sending.with_suffix(".tmp")
+            with tmp.open("w", encoding="utf-8") as f:
+                f.write("".join(json.dumps(e, ensure_ascii=False, default=str) + "\n" for e in remaining))
+            os.replace(tmp, self._sending)
+
+    def ack(self) -> None:
+        with self._file_lock:
+            self._sending.unlink(missing_ok=True)
+
+
+def _spool_path() -> Path:
+    return BASE_DIR / "state" / "observe_push.jsonl"
+
+
+_SPOOL: _PushSpool | None = None
+_PUSH_MIN_BATCH = 20
+_PUSH_MAX_BATCH = 2000
+
+
+async def _push_loop():
+    """
+    Фоновая отправка батчей логов на hub (для member).
+
+    Пул keep-alive соединений httpx, тело сжимается gzip (если hub не
+    понимает Content-Encoding — откатываемся на обычный JSON). Размер батча
+    адаптивный: растёт при быстрых успешных отправках, уменьшается при
+    медленных и ошибках. Перед живой очередью отправляется дисковый журнал.
+    """
+    import httpx
+
+    assert _QUEUE is not None and _SPOOL is not None
+    queue, spool = _QUEUE, _SPOOL
+    conf = config_snapshot()
     url = f"{conf.hub_url.rstrip('/')}/api/observe/ingest"
     headers = {"X-AdaOS-Token": conf.token, "Content-Type": "application/json"}
+    use_gzip = True
+    batch_size = 200
+
+    async def _send(client: "httpx.AsyncClient", events: List[Dict[str, Any]]) -> bool:
+        nonlocal use_gzip, batch_size
+        body = json.dumps({"node_id": conf.node_id, "events": events}, ensure_ascii=False, default=str).encode("utf-8")
+        hdrs = dict(headers)
+        if use_gzip:
+            body = gzip.compress(body, compresslevel=5)
+            hdrs["Content-Encoding"] = "gzip"
+        started = time.perf_counter()
+        r = await client.post(url, content=body, headers=hdrs)
+        elapsed = time.perf_counter() - started
+        if r.status_code in (400, 415, 422) and use_gzip:
+            use_gzip = False
+            return False
+        if r.status_code != 200:
+            batch_size = max(_PUSH_MIN_BATCH, batch_size // 2)
+            return False
+        if elapsed < 0.5 and len(events) >= batch_size:
+            batch_size = min(_PUSH_MAX_BATCH, batch_size * 2)
+        elif elapsed > 2.0:
+            batch_size = max(_PUSH_MIN_BATCH, batch_size // 2)
+        return True
 
     batch: List[Dict[str, Any]] = []
     backoff = 1
-    while True:
+    journal = True  # остаток с прошлого запуска
+    limits = httpx.Limits(max_connections=2, max_keepalive_connections=2, keepalive_expiry=60.0)
+    async with httpx.AsyncClient(timeout=httpx.Timeout(10.0, connect=3.0), limits=limits) as client:
         try:
+            while True:
+                try:
+                    if spool.has_pending():
+                        await asyncio.to_thread(spool.flush)
+                    if spool.take_journaled():
+                        journal = True
+                    if journal:
+                        backlog = await asyncio.to_thread(spool.claim)
+                        while backlog:
+                            chunk = backlog[:batch_size]
+                            if not await _send(client, chunk):
+                                await asyncio.to_thread(spool.requeue, backlog)
+                                raise RuntimeError("hub rejected journal batch")
+                            backlog = backlog[len(chunk) :]
+                        await asyncio.to_thread(spool.ack)
+                        journal = False
+
+                    if not batch:
+                        try:
+                            batch.append(await asyncio.wait_for(queue.get(), timeout=1.0))
+                        except asyncio.TimeoutError:
+                            continue
+                    while not queue.empty() and len(batch) < batch_size:
+                        batch.append(queue.get_nowait())
+
+                    if await _send(client, batch):
+                        batch.clear()
+                        backoff = 1
+                    else:
+                        await asyncio.sleep(backoff)
+                        backoff = min(backoff * 2, 30)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    batch_size = max(_PUSH_MIN_BATCH, batch_size // 2)
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, 30)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            # всё недоставленное переживает перезапуск
+            for e in batch:
+                spool.add(e)
+            while not queue.empty():
+                spool.add(queue.get_nowait())
             try:
-                item = await asyncio.wait_for(_QUEUE.get(), timeout=1.0)
-                batch.append(item)
-                while not _QUEUE.empty() and len(batch) < 200:
-                    batch.append(_QUEUE.get_nowait())
-            except asyncio.TimeoutError:
+                spool.flush()
+            except Exception:
                 pass
 
-            if not batch:
-                continue
-
-            payload = {"node_id": conf.node_id, "events": batch}
-            r = requests.post(url, json=payload, headers=headers, timeout=3)
-            if r.status_code == 200:
-                batch.clear()
-                backoff = 1
-            else:
-                await asyncio.sleep(backoff)
-                backoff = min(backoff * 2, 30)
-        except asyncio.CancelledError:
-            break
-        except Exception:
-            await asyncio.sleep(backoff)
-            backoff = min(backoff * 2, 30)
-
 
 async def _emit_wrapper(topic: str, payload: Dict[str, Any], **kwargs):
     """Оборачиваем sdk.bus.emit: добавляем trace_id, логируем и шлём дальше в оригинал."""
@@ -182,23 +554,14 @@ async def _emit_wrapper(topic: str, payload: Dict[str, Any], **kwargs):
     trace = _ensure_trace(kwargs)
     res = await _ORIG_EMIT(topic, payload, **kwargs)
     event = _serialize_event(topic, payload, kwargs)
-    try:
-        ctx = get_ctx()
-        conf = getattr(ctx, "config", None) or load_config()
-        try:
-            if getattr(ctx, "config", None) is None:
-                object.__setattr__(ctx, "config", conf)
-        except Exception:
-            pass
-    except Exception:
-        conf = load_config()
     _write_local(event)
     await BROADCAST.publish(event)
-    if conf.role == "member" and _QUEUE:
+    if event["role"] == "member" and _QUEUE:
         try:
             _QUEUE.put_nowait(event)
-        except Exception:
-            pass
+        except asyncio.QueueFull:
+            if _SPOOL is not None:
+                _SPOOL.add(event)
     return res
 
 
@@ -217,25 +580,17 @@ async def start_observer():
     """
     Идемпотентно подключает обёртку над emit и поднимает фоновые задачи (для member).
     """
-    global _ORIG_EMIT, _QUEUE, _LOG_TASK
+    global _ORIG_EMIT, _QUEUE, _LOG_TASK, _SPOOL
     if _ORIG_EMIT is not None:
         return
 
     _ORIG_EMIT = bus_module.emit
     bus_module.emit = _emit_wrapper  # type: ignore
 
-    try:
-        ctx = get_ctx()
-        conf = getattr(ctx, "config", None) or load_config()
-        try:
-            if getattr(ctx, "config", None) is None:
-                object.__setattr__(ctx, "config", conf)
-        except Exception:
-            pass
-    except Exception:
-        conf = load_config()
+    conf = config_snapshot()
     if conf.role == "member":
         _QUEUE = _QUEUE or asyncio.Queue(maxsize=5000)
+        _SPOOL = _SPOOL or _PushSpool(_spool_path())
         if not _LOG_TASK:
             _LOG_TASK = asyncio.create_task(_push_loop(), name="adaos-observe-push")
 
@@ -254,6 +609,7 @@ async def stop_observer():
     if _ORIG_EMIT is not None:
         bus_module.emit = _ORIG_EMIT  # type: ignore
         _ORIG_EMIT = None
+    await asyncio.to_thread(_WRITER.flush)
 
 
 def pass_filters(evt: Dict[str, Any], topic_prefix: str | None, node_id: str | None, since_ts: float | None) -> bool:
@@ -0,0 +1,297 @@
+"""
+Async RPC client for hub → member tool calls.
+
+- One shared ``httpx.AsyncClient`` per event loop; httpx keeps a keep-alive
+  pool per origin, i.e. per member node.
+- Nodes where the skill is active go first; within each group candidates
+  are ranked by expected cost: (requests we have in flight to the
+  node + in-flight count the node reported) × recent latency (EWMA, decaying
+  while the node is idle so it gets probed again), with a penalty for nodes
+  that failed recently.
+- A call that fails before reaching the node (connect error) or is rejected
+  as unavailable/overloaded (429/503) is retried on the next candidate; other
+  failures are not, since the tool may already have run.
+- Optional hedging (``ADAOS_SUBNET_HEDGE_MS``, off by default): if the first
+  node has not answered within the delay, the call is also sent to the next
+  candidate and the first successful reply wins. Only calls made with
+  ``hedge=True`` are hedged; tool calls pass it for idempotent tools (those
+  declaring a ``cache`` policy) only.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import httpx
+
+_DEFAULT_LATENCY_S = 0.2
+_EWMA_ALPHA = 0.3
+_FAILURE_PENALTY_S = 30.0
+# Оценка латентности неиспользуемой ноды «забывается» (период полураспада),
+# чтобы одна медленная выборка (холодный старт) не исключала ноду навсегда.
+_DECAY_HALF_LIFE_S = 1.0
+# Ответы/ошибки, после которых инструмент точно не выполнялся — повтор безопасен.
+_RETRY_STATUSES = {429, 503}
+_SAFE_TO_RETRY = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+# Заголовок, в котором member сообщает свою текущую загрузку (вызовы в работе + в очереди).
+LOAD_HEADER = "X-AdaOS-In-Flight"
+
+
+@dataclass(slots=True)
+class _NodeState:
+    in_flight: int = 0
+    reported: int = 0
+    ewma_s: float = _DEFAULT_LATENCY_S
+    requests: int = 0
+    failures: int = 0
+    hedges_won: int = 0
+    last_failure: float = 0.0
+    last_sample: float = 0.0
+
+    def latency(self, now: float) -> float:
+        if self.in_flight or not self.last_sample:
+            return self.ewma_s
+        return self.ewma_s * 0.5 ** ((now - self.last_sample) / _DECAY_HALF_LIFE_S)
+
+    def observe(self, elapsed: float, now: float) -> None:
+        current = self.latency(now)
+        self.ewma_s = current + _EWMA_ALPHA * (elapsed - current)
+        self.last_sample = now
+
+    def cost(self, now: float) -> float:
+        penalty = 10.0 if now - self.last_failure < _FAILURE_PENALTY_S else 1.0
+        return (1 + self.in_flight + self.reported) * self.latency(now) * penalty
+
+
+@dataclass(slots=True)
+class RpcResult:
+    status: int
+    body: Any
+    text: str
+    node_id: str
+
+
+class SubnetRpcError(RuntimeError):
+    """No candidate node could be reached."""
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name) or default)
+    except ValueError:
+        return default
+
+
+class SubnetRpcClient:
+    def __init__(
+        self,
+        *,
+        max_attempts: int | None = None,
+        hedge_after: float | None = None,
+        max_connections_per_node: int = 16,
+    ) -> None:
+        self.max_attempts = max_attempts or int(_env_float("ADAOS_SUBNET_RPC_ATTEMPTS", 2))
+        hedge_ms = _env_float("ADAOS_SUBNET_HEDGE_MS", 0.0)
+        self.hedge_after = hedge_after if hedge_after is not None else (hedge_ms / 1000.0 if hedge_ms > 0 else None)
+        self._limits = httpx.Limits(
+            max_connections=max_connections_per_node * 2,
+            max_keepalive_connections=max_connections_per_node * 2,
+            keepalive_expiry=30.0,
+        )
+        self._nodes: Dict[str, _NodeState] = {}
+        self._client: httpx.AsyncClient | None = None
+        self._client_loop: asyncio.AbstractEventLoop | None = None
+
+    # ------------------------------------------------------------------
+    def _http(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop or self._client.is_closed:
+            self._client = httpx.AsyncClient(limits=self._limits, timeout=httpx.Timeout(10.0, connect=3.0))
+            self._client_loop = loop
+        return self._client
+
+    def _state(self, node_id: str) -> _NodeState:
+        st = self._nodes.get(node_id)
+        if st is None:
+            st = self._nodes[node_id] = _NodeState()
+        return st
+
+    def report_load(self, node_id: str, in_flight: int) -> None:
+        """Load reported by the node itself (heartbeat or response header)."""
+        self._state(node_id).reported = max(int(in_flight), 0)
+
+    def rank(self, candidates: Sequence[Mapping[str, Any]]) -> List[Mapping[str, Any]]:
+        now = time.monotonic()
+        indexed = list(enumerate(candidates))
+        # Неактивный слот ответит 4xx, который не повторяется, — такие ноды
+        # идут после активных независимо от загрузки.
+        indexed.sort(
+            key=lambda item: (
+                not item[1].get("active", True),
+                self._state(str(item[1].get("node_id") or "")).cost(now),
+                item[0],
+            )
+        )
+        return [c for _, c in indexed]
+
+    # ------------------------------------------------------------------
+    async def _post(
+        self,
+        node: Mapping[str, Any],
+        path: str,
+        payload: Mapping[str, Any],
+        headers: Mapping[str, str],
+        timeout: float,
+    ) -> RpcResult:
+        node_id = str(node.get("node_id") or "")
+        url = f"{str(node['base_url']).rstrip('/')}{path}"
+        st = self._state(node_id)
+        st.in_flight += 1
+        st.requests += 1
+        started = time.perf_counter()
+        try:
+            resp = await self._http().post(url, json=dict(payload), headers=dict(headers), timeout=timeout)
+        except asyncio.CancelledError:
+            # проигравший хедж или отменённый вызов — нода тут ни при чём
+            raise
+        except Exception:
+            st.failures += 1
+            st.last_failure = time.monotonic()
+            raise
+        finally:
+            st.in_flight -= 1
+        st.observe(time.perf_counter() - started, time.monotonic())
+        load = resp.headers.get(LOAD_HEADER)
+        if load is not None:
+            try:
+                st.reported = max(int(load), 0)
+            except ValueError:
+                pass
+        if resp.status_code in _RETRY_STATUSES:
+            st.last_failure = time.monotonic()
+        try:
+            body = resp.json()
+        except ValueError:
+            body = None
+        return RpcResult(status=resp.status_code, body=body, text=resp.text, node_id=node_id)
+
+    async def call(
+        self,
+        candidates: Sequence[Mapping[str, Any]],
+        path: str,
+        payload: Mapping[str, Any],
+        *,
+        headers: Optional[Mapping[str, str]] = None,
+        timeout: float = 12.0,
+        hedge: bool = False,
+    ) -> RpcResult:
+        """
+        POST ``payload`` to ``path`` on the best candidate (dicts with
+        ``node_id``, ``base_url`` and optional ``active``), retrying on the
+        next ones; with ``hedge`` a slow call is also duplicated to the next
+        candidate, so pass it only for idempotent requests.
+        """
+        hedge_after = self.hedge_after if hedge else None
+        ranked = [c for c in self.rank(candidates) if c.get("base_url")]
+        if not ranked:
+            raise SubnetRpcError("no candidate node with base_url")
+        ranked = ranked[: max(self.max_attempts, 1)]
+        hdrs = dict(headers or {})
+        last_error: BaseException | None = None
+        last_result: RpcResult | None = None
+        pending: Dict[asyncio.Task, bool] = {}  # task -> запущен как хедж
+        queue = list(ranked)
+
+        def _launch(hedge: bool) -> None:
+            node = queue.pop(0)
+            pending[asyncio.ensure_future(self._post(node, path, payload, hdrs, timeout))] = hedge
+
+        _launch(False)
+        try:
+            while pending:
+                wait_for = hedge_after if (hedge_after and queue) else None
+                done, _ = await asyncio.wait(pending, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    _launch(True)  # первая нода медлит — дублируем на следующую
+                    continue
+                retry = False
+                for task in done:
+                    hedged = pending.pop(task)
+                    try:
+                        result = task.result()
+                    except _SAFE_TO_RETRY as exc:
+                        # запрос до ноды не дошёл — можно идти к следующей
+                        last_error, retry = exc, True
+                        continue
+                    except (httpx.TransportError, OSError) as exc:
+                        last_error = exc
+                        continue
+                    if result.status in _RETRY_STATUSES:
+                        last_result, retry = result, True
+                        continue
+                    if hedged:
+                        self._state(result.node_id).hedges_won += 1
+                    return result
+                if retry and not pending and queue:
+                    _launch(False)
+        finally:
+            for task in pending:
+                task.cancel()
+        if last_result is not None:
+            return last_result
+        raise SubnetRpcError(f"all candidates failed: {last_error!r}")
+
+    async def call_tool(
+        self,
+        candidates: Sequence[Mapping[str, Any]],
+        body: Mapping[str, Any],
+        *,
+        token: str,
+        timeout: float,
+        hedge: bool = False,
+    ) -> RpcResult:
+        return await self.call(
+            candidates,
+            "/api/tools/call",
+            body,
+            headers={"X-AdaOS-Token": token, "Content-Type": "application/json"},
+            timeout=timeout,
+            hedge=hedge,
+        )
+
+    def stats(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        return [
+            {
+                "node_id": node_id,
+                "in_flight": st.in_flight,
+                "reported_in_flight": st.reported,
+                "latency_ms_ewma": round(st.ewma_s * 1000.0, 3),
+                "requests": st.requests,
+                "failures": st.failures,
+                "hedges_won": st.hedges_won,
+                "cost": round(st.cost(now), 6),
+            }
+            for node_id, st in sorted(self._nodes.items())
+        ]
+
+    async def aclose(self) -> None:
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+
+_RPC: SubnetRpcClient | None = None
+
+
+def get_subnet_rpc() -> SubnetRpcClient:
+    global _RPC
+    if _RPC is None:
+        _RPC = SubnetRpcClient()
+    return _RPC
+
+
+__all__ = ["SubnetRpcClient", "SubnetRpcError", "RpcResult", "LOAD_HEADER", "get_subnet_rpc"]
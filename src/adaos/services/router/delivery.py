@@ -0,0 +1,367 @@
+"""
+Async delivery pipeline for ``ui.notify`` routing.
+
+``RouterService._on_event`` runs inside ``LocalEventBus.publish``; it only
+picks the routes and hands remote deliveries to this pipeline. Every target
+(Telegram through the root API for a hub, console of a member node) has its
+own bounded queue drained by its own task, so a slow Telegram API delays only
+Telegram messages and never the publisher:
+
+- one pooled ``httpx.AsyncClient`` (keep-alive connections per origin);
+- hub ids and node base URLs are cached for ``ADAOS_ROUTER_CACHE_TTL_S``
+  (unresolved ones for a fifth of it), the subnet alias is re-read from
+  ``node.yaml`` only when the file changes;
+- connect errors, timeouts, 429 and 5xx are retried with exponential backoff
+  (``ADAOS_ROUTER_RETRIES`` attempts, from ``ADAOS_ROUTER_BACKOFF_MS``);
+- a notification none of whose routes got through is printed to the local
+  console, as before;
+- enqueue → delivered latency (p50/p99) and per-target counters are
+  available from :func:`delivery_stats` (``GET /api/observe/router``).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import httpx
+
+from adaos.services.capacity import _load_node_yaml, _resolve_base_dir, _stamp
+from adaos.services.handler_stats import LatencyHistogram
+from adaos.services.io_console import print_text
+from adaos.services.registry.subnet_directory import get_directory
+
+_log = logging.getLogger("adaos.router")
+
+_RETRY_STATUSES = {429}
+_TELEGRAM_TIMEOUT_S = 3.0
+_NODE_TIMEOUT_S = 2.5
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name) or default)
+    except ValueError:
+        return default
+
+
+class _Retry(Exception):
+    """Transient failure, the delivery may be repeated."""
+
+
+@dataclass(slots=True)
+class _Notification:
+    text: str
+    source: Optional[str]
+    conf: Any
+    api_base: str
+    pending: int = 0
+    delivered: bool = False
+
+
+@dataclass(slots=True)
+class _Delivery:
+    kind: str  # "telegram" | "console"
+    target: str  # node id
+    note: _Notification
+    enqueued: float = 0.0
+
+
+@dataclass(slots=True)
+class _TargetStats:
+    enqueued: int = 0
+    delivered: int = 0
+    failed: int = 0
+    retries: int = 0
+    dropped: int = 0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+    def summary(self, depth: int) -> Dict[str, Any]:
+        return {
+            "queued": depth,
+            "enqueued": self.enqueued,
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "retries": self.retries,
+            "dropped": self.dropped,
+            "p50_ms": round(self.latency.percentile(50), 3),
+            "p99_ms": round(self.latency.percentile(99), 3),
+        }
+
+
+class DeliveryPipeline:
+    def __init__(
+        self,
+        *,
+        queue_max: int | None = None,
+        attempts: int | None = None,
+        backoff_s: float | None = None,
+        cache_ttl_s: float | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self.queue_max = max(1, queue_max or int(_env_float("ADAOS_ROUTER_QUEUE_MAX", 256)))
+        self.attempts = max(1, attempts or int(_env_float("ADAOS_ROUTER_RETRIES", 4)))
+        self.backoff_s = backoff_s if backoff_s is not None else _env_float("ADAOS_ROUTER_BACKOFF_MS", 250.0) / 1000.0
+        self.cache_ttl_s = cache_ttl_s if cache_ttl_s is not None else _env_float("ADAOS_ROUTER_CACHE_TTL_S", 30.0)
+        self._transport = transport
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._client: httpx.AsyncClient | None = None
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+        self._stats: Dict[str, _TargetStats] = {}
+        self._cache: Dict[Tuple[str, str], Tuple[float, Any]] = {}
+        self._alias: Tuple[Optional[Path], Any, Dict[str, Any]] = (None, None, {})
+
+    # ------------------------------------------------------------ lifecycle
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        global _CURRENT
+        self._loop = loop
+        _CURRENT = self
+
+    async def close(self) -> None:
+        workers = list(self._workers.values())
+        self._workers.clear()
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._loop = None
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            limits = httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=30.0)
+            self._client = httpx.AsyncClient(limits=limits, timeout=httpx.Timeout(10.0, connect=3.0), transport=self._transport)
+        return self._client
+
+    # -------------------------------------------------------------- enqueue
+    def notify(self, text: str, *, source: Optional[str], conf: Any, api_base: str, routes: Sequence[Tuple[str, str]], delivered: bool = False) -> None:
+        """
+        Queue ``text`` for every ``(kind, target node)`` route. Safe to call
+        from any thread; never blocks. ``delivered`` tells that the text was
+        already printed locally, so no fallback print is needed.
+        """
+        note = _Notification(text=text, source=source, conf=conf, api_base=api_base, pending=len(routes), delivered=delivered)
+        loop = self._loop
+        for kind, target in routes:
+            job = _Delivery(kind=kind, target=target, note=note, enqueued=time.perf_counter())
+            if loop is None or loop.is_closed():
+                self._finish(job, False)
+                continue
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is loop:
+                self._enqueue(job)
+            else:
+                loop.call_soon_threadsafe(self._enqueue, job)
+
+    def _enqueue(self, job: _Delivery) -> None:
+        key = f"{job.kind}:{job.target}"
+        st = self._stats.setdefault(key, _TargetStats())
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = asyncio.Queue(maxsize=self.queue_max)
+        try:
+            queue.put_nowait(job)
+        except asyncio.QueueFull:
+            st.dropped += 1
+            _log.warning("router: %s queue full, notification dropped", key)
+            self._finish(job, False)
+            return
+        st.enqueued += 1
+        worker = self._workers.get(key)
+        if worker is None or worker.done():
+            self._workers[key] = asyncio.get_running_loop().create_task(self._drain(queue, st))
+
+    def _finish(self, job: _Delivery, ok: bool) -> None:
+        note = job.note
+        note.pending -= 1
+        note.delivered = note.delivered or ok
+        if note.pending <= 0 and not note.delivered:
+            # ни один маршрут не сработал — как и раньше, печатаем локально
+            print_text(note.text, node_id=note.conf.node_id, origin={"source": note.source})
+
+    # ------------------------------------------------------------- delivery
+    async def _drain(self, queue: asyncio.Queue, st: _TargetStats) -> None:
+        while True:
+            job = await queue.get()
+            ok = False
+            try:
+                ok = await self._deliver(job, st)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                _log.warning("router: %s delivery to %s crashed", job.kind, job.target, exc_info=True)
+            finally:
+                queue.task_done()
+            if ok:
+                st.delivered += 1
+                st.latency.record(time.perf_counter() - job.enqueued)
+            else:
+                st.failed += 1
+            self._finish(job, ok)
+
+    async def _deliver(self, job: _Delivery, st: _TargetStats) -> bool:
+        send = self._send_telegram if job.kind == "telegram" else self._send_console
+        delay = self.backoff_s
+        for attempt in range(self.attempts):
+            if attempt:
+                st.retries += 1
+                await asyncio.sleep(delay)
+                delay *= 2
+            try:
+                return await send(job)
+            except (_Retry, httpx.TransportError) as exc:
+                _log.debug("router: %s delivery to %s failed (attempt %d): %s", job.kind, job.target, attempt + 1, exc)
+        _log.warning("router: %s delivery to %s failed after %d attempts", job.kind, job.target, self.attempts)
+        return False
+
+    async def _post(self, url: str, body: Dict[str, Any], headers: Dict[str, str], timeout: float) -> httpx.Response:
+        resp = await self._http().post(url, json=body, headers=headers, timeout=timeout)
+        if resp.status_code in _RETRY_STATUSES or resp.status_code >= 500:
+            raise _Retry(f"HTTP {resp.status_code}")
+        return resp
+
+    async def _send_telegram(self, job: _Delivery) -> bool:
+        conf = job.note.conf
+        hub_id = conf.subnet_id if job.target == conf.node_id else self._hub_id(job.target)
+        if not hub_id:
+            _log.warning("router: telegram route failed; hub_id unresolved for node %s", job.target)
+            return False
+        alias = self._subnet_alias(conf)
+        text = job.note.text
+        body = {"hub_id": hub_id, "text": f"[{alias}]: {text}" if alias else text}
+        url = f"{job.note.api_base.rstrip('/')}/io/tg/send"
+        resp = await self._post(url, body, {"Content-Type": "application/json"}, _TELEGRAM_TIMEOUT_S)
+        _log.info("router: telegram sent", extra={"hub_id": hub_id, "status": resp.status_code})
+        return resp.status_code < 400
+
+    async def _send_console(self, job: _Delivery) -> bool:
+        conf = job.note.conf
+        base_url = await self._node_base_url(job.target, conf)
+        if not base_url and conf.role == "hub":
+            base_url = await self._any_console_url(conf)
+        if not base_url:
+            _log.warning("router: stdout target %s offline/unresolved; fallback to local print", job.target)
+            print_text(job.note.text, node_id=conf.node_id, origin={"source": job.note.source})
+            return True
+        url = f"{base_url.rstrip('/')}/api/io/console/print"
+        headers = {"X-AdaOS-Token": conf.token or "dev-local-token", "Content-Type": "application/json"}
+        body = {"text": job.note.text, "origin": {"source": job.note.source, "from": conf.node_id}}
+        resp = await self._post(url, body, headers, _NODE_TIMEOUT_S)
+        return resp.status_code < 400
+
+    # --------------------------------------------------------------- lookups
+    def _cached(self, kind: str, key: str) -> Tuple[bool, Any]:
+        hit = self._cache.get((kind, key))
+        if hit is not None and hit[0] > time.monotonic():
+            return True, hit[1]
+        return False, None
+
+    def _remember(self, kind: str, key: str, value: Any) -> Any:
+        ttl = self.cache_ttl_s if value else self.cache_ttl_s / 5.0
+        self._cache[(kind, key)] = (time.monotonic() + ttl, value)
+        return value
+
+    def _hub_id(self, node_id: str) -> Optional[str]:
+        found, value = self._cached("hub_id", node_id)
+        if found:
+            return value
+        try:
+            node = get_directory().get_node(node_id)
+        except Exception:
+            node = None
+        return self._remember("hub_id", node_id, (node or {}).get("subnet_id"))
+
+    def _subnet_alias(self, conf: Any) -> Optional[str]:
+        path = Path(_resolve_base_dir()) / "node.yaml"
+        stamp = _stamp(path)
+        cached_path, cached_stamp, node_yaml = self._alias
+        if cached_path != path or cached_stamp != stamp or stamp is None:
+            try:
+                node_yaml = _load_node_yaml(path.parent)
+            except Exception:
+                node_yaml = {}
+            self._alias = (path, stamp, node_yaml)
+        try:
+            return ((node_yaml.get("nats") or {}).get("alias")) or os.getenv("DEFAULT_HUB") or conf.subnet_id
+        except Exception:
+            return conf.subnet_id
+
+    async def _node_base_url(self, node_id: str, conf: Any) -> Optional[str]:
+        if conf.role == "hub":
+            directory = get_directory()
+            try:
+                if not directory.is_online(node_id):
+                    return None
+            except Exception:
+                return None
+            found, value = self._cached("base_url", node_id)
+            if found:
+                return value
+            try:
+                url = directory.get_node_base_url(node_id)
+            except Exception:
+                url = None
+            return self._remember("base_url", node_id, url)
+        # member: ask hub
+        if not conf.hub_url:
+            return None
+        found, value = self._cached("base_url", node_id)
+        if found:
+            return value
+        url = None
+        try:
+            resp = await self._http().get(
+                f"{conf.hub_url.rstrip('/')}/api/subnet/nodes/{node_id}",
+                headers={"X-AdaOS-Token": conf.token or "dev-local-token"},
+                timeout=_NODE_TIMEOUT_S,
+            )
+            if resp.status_code == 200:
+                url = ((resp.json() or {}).get("node") or {}).get("base_url")
+        except Exception:
+            url = None
+        return self._remember("base_url", node_id, url)
+
+    async def _any_console_url(self, conf: Any) -> Optional[str]:
+        """Hub only: the online node with the highest stdout priority."""
+        found, candidates = self._cached("console_nodes", "")
+        if not found:
+            candidates = []
+            try:
+                for n in get_directory().list_known_nodes():
+                    for io in (n.get("capacity") or {}).get("io", []):
+                        if io.get("io_type") == "stdout":
+                            candidates.append((int(io.get("priority") or 50), str(n.get("node_id") or "")))
+                            break
+            except Exception:
+                candidates = []
+            candidates.sort(key=lambda x: x[0], reverse=True)
+            self._cache[("console_nodes", "")] = (time.monotonic() + self.cache_ttl_s / 5.0, candidates)
+        for _, nid in candidates:
+            if nid:
+                url = await self._node_base_url(nid, conf)
+                if url:
+                    return url
+        return None
+
+    # ---------------------------------------------------------------- stats
+    def stats(self) -> Dict[str, Any]:
+        return {key: st.summary(self._queues[key].qsize() if key in self._queues else 0) for key, st in self._stats.items()}
+
+
+_CURRENT: Optional[DeliveryPipeline] = None
+
+
+def delivery_stats() -> Dict[str, Any]:
+    return _CURRENT.stats() if _CURRENT is not None else {}
+
+
+__all__ = ["DeliveryPipeline", "delivery_stats"]
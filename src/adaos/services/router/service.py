@@ -17,6 +17,7 @@ import logging
 from adaos.domain import Event
 from adaos.services.agent_context import get_ctx
 from adaos.services.node_config import load_config
+from .delivery import DeliveryPipeline
 from .rules_loader import load_rules, watch_rules
 from adaos.services.registry.subnet_directory import get_directory
 from adaos.services.io_console import print_text
@@ -36,6 +37,7 @@ class RouterService:
         self._rules: list[dict[str, Any]] = []
         self._subscribed = False
         self._vlog = logging.getLogger("adaos.router.voice_chat")
+        self._delivery = DeliveryPipeline()
 
     def _pick_target_node(self, desired_io: str, this_node: str) -> str:
         node = this_node
@@ -69,111 +71,34 @@ class RouterService:
         if not isinstance(text, str) or not text:
             return
 
-        conf = get_ctx().config
+        ctx = get_ctx()
+        conf = ctx.config
         this_node = conf.node_id
         if not self._rules:
             try:
                 self._rules = load_rules(self.base_dir, this_node)
             except Exception:
                 pass
-        # Multi-target routing: attempt telegram and stdout independently if rules exist
-        did_any = False
-
-        # Telegram route (if configured in rules)
+        # Multi-target routing: telegram and stdout independently if rules exist.
+        # Only the local print happens here; remote deliveries go through the
+        # async pipeline so that a slow target never stalls the publisher.
+        routes: list[tuple[str, str]] = []
+        printed = False
         if self._has_rule_for("telegram"):
-            target_node_tg = self._pick_target_node("telegram", this_node)
-            try:
-                # Resolve hub_id for target node
-                if target_node_tg == this_node:
-                    hub_id = conf.subnet_id
-                else:
-                    directory = get_directory()
-                    node = directory.get_node(target_node_tg)
-                    hub_id = (node or {}).get("subnet_id")
-                if not hub_id:
-                    raise RuntimeError("hub_id unresolved for telegram routing")
-                # Root API base
-                from adaos.services.agent_context import get_ctx as _get_ctx
-
-                api_base = getattr(_get_ctx().settings, "api_base", "https://api.inimatic.com")
-                url = f"{api_base.rstrip('/')}/io/tg/send"
-                # Prefix message with subnet alias (or id) for clarity
-                try:
-                    from adaos.services.capacity import _load_node_yaml as _load_node
-
-                    node_yaml = _load_node()
-                except Exception:
-                    node_yaml = {}
-                try:
-                    alias = ((node_yaml.get("nats") or {}).get("alias")) or os.getenv("DEFAULT_HUB") or conf.subnet_id
-                except Exception:
-                    alias = conf.subnet_id
-                prefixed_text = f"[{alias}]: {text}" if alias else text
-                body = {"hub_id": hub_id, "text": prefixed_text}
-                try:
-                    r = requests.post(url, json=body, headers={"Content-Type": "application/json"}, timeout=3.0)
-                    logging.getLogger("adaos.router").info("router: telegram sent", extra={"hub_id": hub_id, "status": r.status_code})
-                except Exception as pe:
-                    logging.getLogger("adaos.router").warning("router: telegram request failed", extra={"hub_id": hub_id, "error": str(pe)})
-                    raise
-                did_any = True
-            except Exception:
-                # swallow to allow stdout route below
-                try:
-                    logging.getLogger("adaos.router").warning("router: telegram route failed; will continue with other routes")
-                except Exception:
-                    pass
-
-        # Stdout route (if configured in rules)
+            routes.append(("telegram", self._pick_target_node("telegram", this_node)))
         if self._has_rule_for("stdout"):
             target_node_out = self._pick_target_node("stdout", this_node)
             if target_node_out == this_node:
                 print_text(text, node_id=this_node, origin={"source": ev.source})
-                did_any = True
+                printed = True
             else:
-                # Cross-node delivery: resolve base_url and POST
-                base_url = self._resolve_node_base_url(target_node_out, conf.role, conf.hub_url)
-                if not base_url and conf.role == "hub":
-                    try:
-                        directory = get_directory()
-                        candidates = []
-                        for n in directory.list_known_nodes():
-                            if not n.get("online"):
-                                continue
-                            for io in (n.get("capacity") or {}).get("io", []):
-                                if io.get("io_type") == "stdout":
-                                    candidates.append((int(io.get("priority") or 50), n))
-                                    break
-                        candidates.sort(key=lambda x: x[0], reverse=True)
-                        for _, cand in candidates:
-                            nid = cand.get("node_id")
-                            if not nid:
-                                continue
-                            base_url = self._resolve_node_base_url(str(nid), conf.role, conf.hub_url)
-                            if base_url:
-                                break
-                    except Exception:
-                        base_url = None
-
-                if base_url:
-                    url = f"{base_url.rstrip('/')}/api/io/console/print"
-                    headers = {"X-AdaOS-Token": conf.token or "dev-local-token", "Content-Type": "application/json"}
-                    body = {"text": text, "origin": {"source": ev.source, "from": this_node}}
-                    try:
-                        requests.post(url, json=body, headers=headers, timeout=2.5)
-                        did_any = True
-                    except Exception:
-                        pass
-                else:
-                    try:
-                        logging.getLogger("adaos.router").warning(f"router: stdout target {target_node_out} offline/unresolved; fallback to local print")
-                    except Exception:
-                        pass
-                    print_text(text, node_id=this_node, origin={"source": ev.source})
-                    did_any = True
+                routes.append(("console", target_node_out))
 
-        # If no route matched or everything failed, fallback to local stdout
-        if not did_any:
+        if routes:
+            api_base = getattr(ctx.settings, "api_base", "https://api.inimatic.com")
+            self._delivery.notify(text, source=ev.source, conf=conf, api_base=api_base, routes=routes, delivered=printed)
+        elif not printed:
+            # no route matched: local stdout
             print_text(text, node_id=this_node, origin={"source": ev.source})
 
     def _resolve_node_base_url(self, node_id: str, role: str, hub_url: str | None) -> str | None:
@@ -201,6 +126,7 @@ class RouterService:
         if self._started:
             return
         self._started = True
+        self._delivery.bind(asyncio.get_running_loop())
         # Subscribe to ui.notify on local event bus
         if not self._subscribed:
             self.bus.subscribe("ui.notify", self._on_event)
@@ -613,4 +539,5 @@ class RouterService:
             except Exception:
                 pass
             self._stop_watch = None
+        await self._delivery.close()
         self._started = False
@@ -6,13 +6,14 @@ from typing import Any, Dict, List, Mapping, Optional, Tuple
 import asyncio
 import json
 import logging
+import os
 import re
 import secrets
 
 import y_py as Y
 
 from adaos.services.agent_context import AgentContext, get_ctx
-from adaos.services.capacity import get_local_capacity
+from adaos.services.capacity import capacity_snapshot
 from adaos.services.yjs.doc import get_ydoc, async_get_ydoc
 from adaos.services.scenarios import loader as scenarios_loader
 from adaos.services.yjs.webspace import default_webspace_id
@@ -108,6 +109,92 @@ def _filter_installed(installed: Dict[str, List[str]], apps: List[Dict[str, Any]
     return {"apps": current_apps, "widgets": current_widgets}
 
 
+# --- parsed file caches ----------------------------------------------------
+#
+# Rebuilds run on every activation/sync event; webui.json and scenario.yaml of
+# unchanged skills/scenarios are served from memory, validated by (mtime, size)
+# with one stat per file. Cached values are shared and must be treated as
+# read-only.
+
+_Stamp = Tuple[int, int]
+
+
+def _file_stamp(path: Path) -> Optional[_Stamp]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+@dataclass(slots=True)
+class _SkillContribution:
+    """What one skill's webui.json adds to the effective catalog/registry."""
+
+    apps: List[Dict[str, Any]]
+    widgets: List[Dict[str, Any]]
+    registry_modals: List[str]
+    registry_widgets: List[str]
+    auto_apps: List[str]
+    auto_widgets: List[str]
+
+
+@dataclass(slots=True)
+class _CachedWebUI:
+    stamp: _Stamp
+    decl: Dict[str, Any]
+    contribution: Optional[_SkillContribution] = None
+
+
+_WEBUI_CACHE: Dict[str, _CachedWebUI] = {}
+_SCENARIO_MANIFEST_CACHE: Dict[str, Tuple[_Stamp, Dict[str, Any]]] = {}
+
+
+def _read_scenario_manifest(scenario_id: str, space: str) -> Dict[str, Any]:
+    path = scenarios_loader.scenario_root_for_space(scenario_id, space) / "scenario.yaml"
+    stamp = _file_stamp(path)
+    if stamp is None:
+        return {}
+    key = str(path)
+    cached = _SCENARIO_MANIFEST_CACHE.get(key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    manifest = scenarios_loader.read_manifest(scenario_id, space=space)
+    _SCENARIO_MANIFEST_CACHE[key] = (stamp, manifest)
+    return manifest
+
+
+def _skill_contribution(decl: Mapping[str, Any]) -> _SkillContribution:
+    skill_name = decl.get("skill") or ""
+    space = decl.get("space") or "default"
+    source = f"skill:{skill_name}"
+    dev_flag = space == "dev"
+    reg = decl.get("registry") or {}
+    mod_spec = reg.get("modals") or {}
+    wid_spec = reg.get("widgets") or {}
+    contrib = _SkillContribution(
+        apps=[_mark_entry(app, source=source, dev=dev_flag) for app in decl.get("apps") or [] if isinstance(app, dict)],
+        widgets=[_mark_entry(w, source=source, dev=dev_flag) for w in decl.get("widgets") or [] if isinstance(w, dict)],
+        registry_modals=[str(k) for k in mod_spec.keys()] if isinstance(mod_spec, dict) else [str(x) for x in mod_spec],
+        registry_widgets=[str(k) for k in wid_spec.keys()] if isinstance(wid_spec, dict) else [str(x) for x in wid_spec],
+        auto_apps=[],
+        auto_widgets=[],
+    )
+    for item in decl.get("contributions") or []:
+        if not isinstance(item, dict):
+            continue
+        ep = str(item.get("extensionPoint") or "")
+        ctype = str(item.get("type") or "")
+        cid = str(item.get("id") or "")
+        if not cid or not bool(item.get("autoInstall")):
+            continue
+        if ep == "desktop.widgets" and ctype == "widget":
+            contrib.auto_widgets.append(cid)
+        if ep == "desktop.apps" and ctype == "app":
+            contrib.auto_apps.append(cid)
+    return contrib
+
+
 class WebspaceScenarioRuntime:
     """
     Core runtime responsible for computing and applying the effective UI
@@ -155,11 +242,11 @@ class WebspaceScenarioRuntime:
                 if scenario_id == "web_desktop":
                     continue
                 if space == "dev":
-                    manifest = scenarios_loader.read_manifest(scenario_id, space="dev")
+                    manifest = _read_scenario_manifest(scenario_id, "dev")
                     if not isinstance(manifest, dict) or not manifest:
-                        manifest = scenarios_loader.read_manifest(scenario_id, space="workspace")
+                        manifest = _read_scenario_manifest(scenario_id, "workspace")
                 else:
-                    manifest = scenarios_loader.read_manifest(scenario_id, space="workspace")
+                    manifest = _read_scenario_manifest(scenario_id, "workspace")
                 if not isinstance(manifest, dict) or not manifest:
                     continue
                 if manifest.get("type") != "desktop":
@@ -172,13 +259,38 @@ class WebspaceScenarioRuntime:
 
     # --- helpers ---------------------------------------------------------
 
-    def _load_webui(self, skill_name: str, space: str) -> Dict[str, Any]:
+    def _webui_path(self, skill_name: str, space: str) -> Path:
         paths = self.ctx.paths
         base = paths.dev_skills_dir() if space == "dev" else paths.skills_dir()
-        path = Path(base) / skill_name / "webui.json"
-        if not path.exists():
+        return Path(base) / skill_name / "webui.json"
+
+    def _load_webui(self, skill_name: str, space: str) -> Dict[str, Any]:
+        path = self._webui_path(skill_name, space)
+        stamp = _file_stamp(path)
+        if stamp is None:
             _log.debug("webui.json missing for %s (%s)", skill_name, space)
             return {}
+        key = str(path)
+        cached = _WEBUI_CACHE.get(key)
+        if cached is not None and cached.stamp == stamp:
+            return cached.decl
+        decl = self._parse_webui(path, skill_name, space)
+        if decl:
+            _WEBUI_CACHE[key] = _CachedWebUI(stamp=stamp, decl=decl)
+        else:
+            _WEBUI_CACHE.pop(key, None)
+        return decl
+
+    def _contribution(self, decl: Dict[str, Any]) -> _SkillContribution:
+        """Per-skill contribution, computed once per parsed webui.json."""
+        cached = _WEBUI_CACHE.get(str(self._webui_path(str(decl.get("skill") or ""), str(decl.get("space") or "default"))))
+        if cached is None or cached.decl is not decl:
+            return _skill_contribution(decl)
+        if cached.contribution is None:
+            cached.contribution = _skill_contribution(decl)
+        return cached.contribution
+
+    def _parse_webui(self, path: Path, skill_name: str, space: str) -> Dict[str, Any]:
         try:
             # Accept UTF-8 with BOM produced by some Windows/PowerShell editors.
             raw = json.loads(path.read_text(encoding="utf-8-sig"))
@@ -213,7 +325,7 @@ class WebspaceScenarioRuntime:
 
     def _collect_skill_decls(self, mode: str = "mixed") -> List[Dict[str, Any]]:
         try:
-            cap = get_local_capacity()
+            cap = capacity_snapshot()
             skills = cap.get("skills") or []
         except Exception:
             skills = []
@@ -346,40 +458,14 @@ class WebspaceScenarioRuntime:
         auto_app_ids: set[str] = set()
 
         for decl in skill_decls:
-            skill_name = decl.get("skill") or ""
-            space = decl.get("space") or "default"
-            source = f"skill:{skill_name}"
-            dev_flag = space == "dev"
-            for app in decl.get("apps") or []:
-                if isinstance(app, dict):
-                    skill_apps.append(_mark_entry(app, source=source, dev=dev_flag))
-            for widget in decl.get("widgets") or []:
-                if isinstance(widget, dict):
-                    skill_widgets.append(_mark_entry(widget, source=source, dev=dev_flag))
-            reg = decl.get("registry") or {}
-            mod_spec = reg.get("modals") or {}
-            if isinstance(mod_spec, dict):
-                skill_registry_modals.append([str(k) for k in mod_spec.keys()])
-            else:
-                skill_registry_modals.append([str(x) for x in mod_spec])
-            wid_spec = reg.get("widgets") or {}
-            if isinstance(wid_spec, dict):
-                skill_registry_widgets.append([str(k) for k in wid_spec.keys()])
-            else:
-                skill_registry_widgets.append([str(x) for x in wid_spec])
-            for contrib in decl.get("contributions") or []:
-                if not isinstance(contrib, dict):
-                    continue
-                ep = str(contrib.get("extensionPoint") or "")
-                ctype = str(contrib.get("type") or "")
-                cid = str(contrib.get("id") or "")
-                auto = bool(contrib.get("autoInstall"))
-                if not cid or not auto:
-                    continue
-                if ep == "desktop.widgets" and ctype == "widget":
-                    auto_widget_ids.add(cid)
-                if ep == "desktop.apps" and ctype == "app":
-                    auto_app_ids.add(cid)
+            # разбор webui.json и вклад навыка пересчитываются только при изменении файла
+            contrib = self._contribution(decl)
+            skill_apps.extend(contrib.apps)
+            skill_widgets.extend(contrib.widgets)
+            skill_registry_modals.append(contrib.registry_modals)
+            skill_registry_widgets.append(contrib.registry_widgets)
+            auto_app_ids.update(contrib.auto_apps)
+            auto_widget_ids.update(contrib.auto_widgets)
 
         # Scenario-defined apps and widgets (base desktop scenario content).
         merged_apps = [_mark_entry(it, source=f"scenario:{scenario_id}", dev=False) for it in scenario_apps]
@@ -837,6 +923,66 @@ async def _seed_webspace_from_scenario(webspace_id: str, scenario_id: str, *, de
         _log.warning("failed to seed webspace=%s from scenario=%s", webspace_id, scenario_id, exc_info=True)
 
 
+# --- coalesced rebuilds ----------------------------------------------------
+
+
+def _rebuild_debounce_s() -> float:
+    try:
+        return max(float(os.getenv("ADAOS_WEBSPACE_REBUILD_DEBOUNCE_MS") or 150), 0.0) / 1000.0
+    except ValueError:
+        return 0.15
+
+
+@dataclass(slots=True)
+class _PendingRebuild:
+    task: Optional[asyncio.Task] = None
+    requested: bool = False
+    requests: int = 0
+    rebuilds: int = 0
+
+
+_PENDING_REBUILDS: Dict[str, _PendingRebuild] = {}
+
+
+async def _run_pending_rebuild(ctx: AgentContext, webspace_id: str, state: _PendingRebuild, delay: float) -> None:
+    try:
+        while True:
+            await asyncio.sleep(delay)
+            # запросы, пришедшие во время пересборки, дадут ещё один проход
+            state.requested = False
+            state.rebuilds += 1
+            try:
+                await WebspaceScenarioRuntime(ctx).rebuild_webspace_async(webspace_id)
+            except Exception:
+                _log.warning("webspace rebuild failed webspace=%s", webspace_id, exc_info=True)
+            if not state.requested:
+                return
+    finally:
+        if _PENDING_REBUILDS.get(webspace_id) is state:
+            _PENDING_REBUILDS.pop(webspace_id, None)
+
+
+def schedule_webspace_rebuild(webspace_id: str, *, ctx: Optional[AgentContext] = None, delay: Optional[float] = None) -> asyncio.Task:
+    """
+    Request a rebuild of ``webspace_id`` from a running event loop.
+
+    Requests arriving within the debounce window
+    (``ADAOS_WEBSPACE_REBUILD_DEBOUNCE_MS``, default 150) share one rebuild;
+    a request made while a rebuild is running triggers exactly one more.
+    Returns the task that performs the rebuild(s).
+    """
+    state = _PENDING_REBUILDS.get(webspace_id)
+    if state is None or state.task is None or state.task.done():
+        state = _PendingRebuild()
+        _PENDING_REBUILDS[webspace_id] = state
+        state.task = asyncio.get_running_loop().create_task(
+            _run_pending_rebuild(ctx or get_ctx(), webspace_id, state, _rebuild_debounce_s() if delay is None else delay)
+        )
+    state.requested = True
+    state.requests += 1
+    return state.task
+
+
 # --- event subscriptions (core-level) -----------------------------------
 
 
@@ -847,9 +993,7 @@ async def _on_scenarios_synced(evt: Dict[str, Any]) -> None:
     into YDoc by ScenarioManager.sync_to_yjs*.
     """
     webspace_id = str(evt.get("webspace_id") or default_webspace_id())
-    ctx = get_ctx()
-    runtime = WebspaceScenarioRuntime(ctx)
-    await runtime.rebuild_webspace_async(webspace_id)
+    schedule_webspace_rebuild(webspace_id)
 
 
 @subscribe("skills.activated")
@@ -858,12 +1002,11 @@ async def _on_skill_activated(evt: Dict[str, Any]) -> None:
     Rebuild effective UI for the target webspace when a skill is activated.
 
     For MVP we only rebuild the webspace explicitly referenced in the event
-    (or the default webspace), not all workspaces.
+    (or the default webspace), not all workspaces. A burst of activations
+    collapses into one rebuild.
     """
     webspace_id = str(evt.get("webspace_id") or default_webspace_id())
-    ctx = get_ctx()
-    runtime = WebspaceScenarioRuntime(ctx)
-    await runtime.rebuild_webspace_async(webspace_id)
+    schedule_webspace_rebuild(webspace_id)
 
 
 @subscribe("skills.rolledback")
@@ -873,9 +1016,7 @@ async def _on_skill_rolled_back(evt: Dict[str, Any]) -> None:
     entries and registry contributions are removed from the target webspace.
     """
     webspace_id = str(evt.get("webspace_id") or default_webspace_id())
-    ctx = get_ctx()
-    runtime = WebspaceScenarioRuntime(ctx)
-    await runtime.rebuild_webspace_async(webspace_id)
+    schedule_webspace_rebuild(webspace_id)
 
 
 @subscribe("desktop.webspace.create")
@@ -1,16 +1,96 @@
 from __future__ import annotations
 
 import asyncio
+import heapq
+import json
 import logging
+import random
 import time
 from dataclasses import dataclass, field
-from typing import Any, Dict
+from datetime import datetime, timedelta
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
 
 from adaos.sdk.data.bus import emit as bus_emit
 
 _log = logging.getLogger("adaos.scheduler")
 
 
+def _parse_cron_field(spec: str, lo: int, hi: int) -> FrozenSet[int]:
+    values: Set[int] = set()
+    for part in spec.split(","):
+        step = 1
+        if "/" in part:
+            part, step_s = part.split("/", 1)
+            step = int(step_s)
+            if step < 1:
+                raise ValueError(f"invalid cron step in {spec!r}")
+        if part == "*":
+            start, end = lo, hi
+        elif "-" in part:
+            a, b = part.split("-", 1)
+            start, end = int(a), int(b)
+        else:
+            start = int(part)
+            end = hi if step > 1 else start
+        if start < lo or end > hi or start > end:
+            raise ValueError(f"cron field {spec!r} out of range {lo}-{hi}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronExpr:
+    """
+    Classic 5-field cron expression: ``minute hour day-of-month month day-of-week``.
+
+    Supports ``*``, lists, ranges and steps (``*/15``, ``1-5``, ``0,30``).
+    Day-of-week is 0-7 with both 0 and 7 meaning Sunday; when both day fields
+    are restricted either may match, as in cron(8). Times are local.
+    """
+
+    __slots__ = ("expr", "minutes", "hours", "days", "months", "dows", "_dom_any", "_dow_any")
+
+    def __init__(self, expr: str) -> None:
+        parts = expr.split()
+        if len(parts) != 5:
+            raise ValueError(f"cron expression must have 5 fields, got {expr!r}")
+        self.expr = expr
+        self.minutes = _parse_cron_field(parts[0], 0, 59)
+        self.hours = _parse_cron_field(parts[1], 0, 23)
+        self.days = _parse_cron_field(parts[2], 1, 31)
+        self.months = _parse_cron_field(parts[3], 1, 12)
+        self.dows = frozenset(d % 7 for d in _parse_cron_field(parts[4], 0, 7))
+        self._dom_any = parts[2] == "*"
+        self._dow_any = parts[4] == "*"
+
+    def _day_matches(self, dt: datetime) -> bool:
+        dom_ok = dt.day in self.days
+        dow_ok = dt.isoweekday() % 7 in self.dows
+        if self._dom_any and self._dow_any:
+            return True
+        if self._dom_any:
+            return dow_ok
+        if self._dow_any:
+            return dom_ok
+        return dom_ok or dow_ok
+
+    def next_after(self, ts: float) -> float:
+        """First matching minute strictly after ``ts`` (unix time)."""
+        dt = datetime.fromtimestamp(ts).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # каждый шаг перескакивает на следующий месяц/день/час/минуту — итераций немного
+        for _ in range(20000):
+            if dt.month not in self.months:
+                dt = (dt.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+            elif dt.hour not in self.hours:
+                dt = dt.replace(minute=0) + timedelta(hours=1)
+            elif dt.minute not in self.minutes:
+                dt += timedelta(minutes=1)
+            else:
+                return dt.timestamp()
+        raise ValueError(f"cron expression {self.expr!r} never matches")
+
+
 @dataclass
 class Job:
     name: str
@@ -19,90 +99,249 @@ class Job:
     payload: dict = field(default_factory=dict)
     enabled: bool = True
     next_run: float = field(default_factory=lambda: time.time())
+    cron: str | None = None
+    jitter: float = 0.0
+    last_run: float | None = None
+
+    def compute_next(self, now: float) -> float:
+        if self.cron:
+            base = CronExpr(self.cron).next_after(now)
+        else:
+            base = now + self.interval
+        if self.jitter > 0:
+            base += random.uniform(0.0, self.jitter)
+        return base
+
+
+class _JobStore:
+    """Persists job definitions and last/next run times in the node sqlite DB."""
+
+    def __init__(self, sql: Any) -> None:
+        self.sql = sql
+        self._ensure()
+
+    def _ensure(self) -> None:
+        with self.sql.connect() as con:
+            con.execute(
+                """
+                CREATE TABLE IF NOT EXISTS scheduler_jobs (
+                    name TEXT PRIMARY KEY,
+                    topic TEXT NOT NULL,
+                    interval REAL NOT NULL,
+                    cron TEXT,
+                    jitter REAL NOT NULL DEFAULT 0,
+                    payload_json TEXT,
+                    enabled INTEGER NOT NULL DEFAULT 1,
+                    next_run REAL,
+                    last_run REAL
+                )
+            """
+            )
+
+    def load(self) -> List[Job]:
+        with self.sql.connect() as con:
+            rows = con.execute(
+                "SELECT name, topic, interval, cron, jitter, payload_json, enabled, next_run, last_run FROM scheduler_jobs"
+            ).fetchall()
+        jobs: List[Job] = []
+        for name, topic, interval, cron, jitter, payload_json, enabled, next_run, last_run in rows:
+            try:
+                payload = json.loads(payload_json) if payload_json else {}
+            except Exception:
+                payload = {}
+            jobs.append(
+                Job(
+                    name=name,
+                    topic=topic,
+                    interval=float(interval or 0.0),
+                    payload=payload,
+                    enabled=bool(enabled),
+                    next_run=float(next_run) if next_run is not None else time.time(),
+                    cron=cron or None,
+                    jitter=float(jitter or 0.0),
+                    last_run=float(last_run) if last_run is not None else None,
+                )
+            )
+        return jobs
+
+    def write(self, upserts: List[Job], deletes: List[str]) -> None:
+        with self.sql.connect() as con:
+            for job in upserts:
+                con.execute(
+                    """
+                    INSERT INTO scheduler_jobs(name, topic, interval, cron, jitter, payload_json, enabled, next_run, last_run)
+                    VALUES(?,?,?,?,?,?,?,?,?)
+                    ON CONFLICT(name) DO UPDATE SET
+                        topic=excluded.topic, interval=excluded.interval, cron=excluded.cron,
+                        jitter=excluded.jitter, payload_json=excluded.payload_json, enabled=excluded.enabled,
+                        next_run=excluded.next_run, last_run=excluded.last_run
+                    """,
+                    (
+                        job.name,
+                        job.topic,
+                        job.interval,
+                        job.cron,
+                        job.jitter,
+                        json.dumps(job.payload, ensure_ascii=False),
+                        1 if job.enabled else 0,
+                        job.next_run,
+                        job.last_run,
+                    ),
+                )
+            for name in deletes:
+                con.execute("DELETE FROM scheduler_jobs WHERE name=?", (name,))
+            con.commit()
 
 
 class Scheduler:
     """
-    Minimal in-process scheduler:
-      * jobs are kept in-memory only (MVP);
+    In-process scheduler:
+      * jobs are ordered in a heap by next deadline; the loop sleeps exactly
+        until the earliest one (or until jobs change) instead of polling;
+      * a job runs either every ``interval`` seconds or on a ``cron``
+        expression, optionally with random ``jitter`` added to each deadline;
+      * job definitions and last/next run times persist in the sqlite DB;
+        jobs that became overdue while the node was down are spread over
+        ``boot_spread`` seconds at start instead of firing all at once;
       * on each tick, emits an event to the core bus instead of calling code.
 
     This keeps the execution model uniform with skills: everything reacts to
     events such as `sys.ystore.backup` rather than being invoked directly.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, store: _JobStore | None = None, *, persist: bool = True, boot_spread: float = 30.0) -> None:
         self._jobs: Dict[str, Job] = {}
+        # (next_run, seq, name, generation); устаревшие записи отбрасываются лениво
+        self._heap: List[Tuple[float, int, str, int]] = []
+        self._gens: Dict[str, int] = {}
+        self._seq = 0
         self._lock = asyncio.Lock()
         self._task: asyncio.Task | None = None
         self._stopped = asyncio.Event()
         self._stopped.set()
+        self._wake = asyncio.Event()
+        self._store = store
+        self._persist = persist
+        self._loaded = False
+        self._boot_spread = boot_spread
+        self._dirty: Set[str] = set()
+        self._flush_task: asyncio.Task | None = None
 
     async def start(self) -> None:
         if self._task and not self._task.done():
             return
+        await self._load_persisted()
         self._stopped.clear()
         self._task = asyncio.create_task(self._run(), name="adaos-scheduler")
-        _log.info("scheduler started")
+        _log.info("scheduler started jobs=%d", len(self._jobs))
 
     async def stop(self) -> None:
         self._stopped.set()
+        self._wake.set()
         if self._task and not self._task.done():
             self._task.cancel()
+        if self._flush_task and not self._flush_task.done():
+            try:
+                await self._flush_task
+            except Exception:
+                pass
 
-    async def ensure_every(self, name: str, interval: float, topic: str, payload: dict | None = None) -> Job:
+    def jobs(self) -> List[Job]:
+        return sorted(self._jobs.values(), key=lambda j: j.next_run)
+
+    async def ensure_every(
+        self, name: str, interval: float, topic: str, payload: dict | None = None, *, jitter: float = 0.0
+    ) -> Job:
         """
         Create or update a simple \"every N seconds\" job.
         """
         interval = float(interval)
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        return await self._ensure(name, topic, payload, interval=interval, cron=None, jitter=jitter)
+
+    async def ensure_cron(self, name: str, cron: str, topic: str, payload: dict | None = None, *, jitter: float = 0.0) -> Job:
+        """
+        Create or update a job fired on a 5-field cron expression (local time).
+        """
+        CronExpr(cron).next_after(time.time())  # validate early
+        return await self._ensure(name, topic, payload, interval=0.0, cron=cron, jitter=jitter)
+
+    async def _ensure(
+        self, name: str, topic: str, payload: dict | None, *, interval: float, cron: str | None, jitter: float
+    ) -> Job:
+        await self._load_persisted()
         now = time.time()
         async with self._lock:
             job = self._jobs.get(name)
             if job is None:
-                job = Job(
-                    name=name,
-                    topic=topic,
-                    interval=interval,
-                    payload=dict(payload or {}),
-                    next_run=now + interval,
-                )
+                job = Job(name=name, topic=topic, interval=interval, payload=dict(payload or {}), cron=cron, jitter=float(jitter))
+                job.next_run = job.compute_next(now)
                 self._jobs[name] = job
-                _log.info("scheduler job created name=%s topic=%s interval=%ss", name, topic, interval)
+                _log.info("scheduler job created name=%s topic=%s interval=%ss cron=%s", name, topic, interval, cron)
             else:
+                reschedule = job.interval != interval or job.cron != cron
                 job.topic = topic
                 job.interval = interval
+                job.cron = cron
+                job.jitter = float(jitter)
                 job.payload = dict(payload or {})
-                if job.next_run < now:
-                    job.next_run = now + interval
-                _log.info("scheduler job updated name=%s topic=%s interval=%ss", name, topic, interval)
-            return job
+                if job.next_run < now or reschedule:
+                    job.next_run = job.compute_next(now)
+                _log.info("scheduler job updated name=%s topic=%s interval=%ss cron=%s", name, topic, interval, cron)
+            self._schedule(job)
+        self._mark_dirty(name)
+        return job
 
     async def delete(self, name: str) -> None:
         async with self._lock:
             if self._jobs.pop(name, None) is not None:
+                self._gens[name] = self._gens.get(name, 0) + 1
                 _log.info("scheduler job deleted name=%s", name)
+                self._mark_dirty(name)
+
+    # --- heap ---
+
+    def _schedule(self, job: Job) -> None:
+        gen = self._gens.get(job.name, 0) + 1
+        self._gens[job.name] = gen
+        self._seq += 1
+        heapq.heappush(self._heap, (job.next_run, self._seq, job.name, gen))
+        if self._heap[0][2] == job.name and self._heap[0][3] == gen:
+            self._wake.set()
+
+    def _pop_due(self, now: float) -> List[Job]:
+        due: List[Job] = []
+        while self._heap and self._heap[0][0] <= now:
+            _, _, name, gen = heapq.heappop(self._heap)
+            job = self._jobs.get(name)
+            if job is None or self._gens.get(name) != gen or not job.enabled:
+                continue
+            due.append(job)
+        return due
 
     async def _run(self) -> None:
         try:
             while not self._stopped.is_set():
-                async with self._lock:
-                    jobs = [j for j in self._jobs.values() if j.enabled]
-
-                if not jobs:
-                    await asyncio.sleep(0.5)
-                    continue
-
+                self._wake.clear()
                 now = time.time()
-                due = [j for j in jobs if j.next_run <= now]
-                if not due:
-                    sleep_for = max(0.1, min(j.next_run for j in jobs) - now)
-                    await asyncio.sleep(sleep_for)
-                    continue
-
-                for job in due:
-                    job.next_run = now + job.interval
+                for job in self._pop_due(now):
+                    job.last_run = now
+                    try:
+                        job.next_run = job.compute_next(now)
+                    except ValueError:
+                        _log.warning("scheduler job disabled name=%s: cron never matches", job.name)
+                        job.enabled = False
+                    else:
+                        self._schedule(job)
+                    self._mark_dirty(job.name)
                     asyncio.create_task(self._fire(job), name=f"adaos-scheduler-job-{job.name}")
-                await asyncio.sleep(0)  # yield control
+
+                timeout = max(0.0, self._heap[0][0] - time.time()) if self._heap else None
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
         except asyncio.CancelledError:  # pragma: no cover - controlled shutdown
             pass
         except Exception:  # pragma: no cover - defensive logging
@@ -116,6 +355,80 @@ class Scheduler:
         except Exception:  # pragma: no cover - defensive logging
             _log.warning("scheduler job failed name=%s topic=%s", job.name, job.topic, exc_info=True)
 
+    # --- persistence ---
+
+    def _resolve_store(self) -> Optional[_JobStore]:
+        if self._store is None and self._persist:
+            try:
+                from adaos.services.agent_context import get_ctx
+
+                self._store = _JobStore(get_ctx().sql)
+            except Exception:
+                _log.warning("scheduler persistence unavailable, jobs are in-memory only", exc_info=True)
+                self._persist = False
+        return self._store
+
+    async def _load_persisted(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        store = self._resolve_store()
+        if store is None:
+            return
+        try:
+            persisted = await asyncio.to_thread(store.load)
+        except Exception:
+            _log.warning("failed to load scheduler jobs", exc_info=True)
+            return
+        now = time.time()
+        async with self._lock:
+            for job in persisted:
+                if job.name in self._jobs:
+                    continue
+                if job.next_run <= now:
+                    # пропущенные за время простоя запуски не стартуют разом
+                    job.next_run = now + random.uniform(0.0, self._boot_spread)
+                self._jobs[job.name] = job
+                if job.enabled:
+                    self._schedule(job)
+        if persisted:
+            _log.info("scheduler restored jobs=%d", len(persisted))
+
+    def _mark_dirty(self, name: str) -> None:
+        if self._store is None:
+            return
+        self._dirty.add(name)
+        if self._flush_task is None or self._flush_task.done():
+            try:
+                self._flush_task = asyncio.get_running_loop().create_task(self._flush(), name="adaos-scheduler-persist")
+            except RuntimeError:
+                pass
+
+    async def _flush(self) -> None:
+        store = self._store
+        while self._dirty and store is not None:
+            names, self._dirty = self._dirty, set()
+            upserts = [self._copy(self._jobs[n]) for n in names if n in self._jobs]
+            deletes = [n for n in names if n not in self._jobs]
+            try:
+                await asyncio.to_thread(store.write, upserts, deletes)
+            except Exception:
+                _log.warning("failed to persist scheduler jobs", exc_info=True)
+
+    @staticmethod
+    def _copy(job: Job) -> Job:
+        return Job(
+            name=job.name,
+            topic=job.topic,
+            interval=job.interval,
+            payload=dict(job.payload),
+            enabled=job.enabled,
+            next_run=job.next_run,
+            cron=job.cron,
+            jitter=job.jitter,
+            last_run=job.last_run,
+        )
+
 
 _SCHEDULER: Scheduler | None = None
 
@@ -132,4 +445,3 @@ async def start_scheduler() -> None:
     Public entrypoint used from bootstrap to start the background loop.
     """
     await get_scheduler().start()
-
@@ -0,0 +1,172 @@
+"""Content-addressed cache of skill Python dependencies.
+
+Preparing a skill runtime used to run ``pip install --upgrade`` (and up to
+three fallbacks) on every prepare, even when nothing changed. Here a
+dependency set is identified by a hash of:
+
+- the interpreter (path and version);
+- the requirement arguments (the text of ``requirements.in`` rather than its path);
+- the constraints file text.
+
+The outcome of the first successful install is recorded under
+``<cache_dir>/skill_deps/<hash>/``:
+
+- ``env`` — the requirements were installed into the interpreter environment;
+  later prepares only check that the direct requirements are still present;
+- ``target`` — the packages live in ``site/`` next to the record, shared by
+  every skill/version with the same set; a slot's ``vendor`` becomes a link to
+  it (a copy where links are unavailable).
+
+Identical sets are installed once per host, also when several skills are
+prepared in parallel (per-hash lock). Installs into the interpreter
+environment are serialised, because pip must not write to one site-packages
+concurrently. ``ADAOS_SKILL_DEPS_CACHE=0`` disables the cache.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import threading
+import uuid
+from contextlib import contextmanager
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+_NAME_RE = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)")
+_RECORD = "record.json"
+
+# pip не должен писать в один site-packages из нескольких потоков сразу
+ENV_INSTALL_LOCK = threading.Lock()
+
+
+def enabled() -> bool:
+    return (os.getenv("ADAOS_SKILL_DEPS_CACHE") or "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def _read_text(path: Path) -> str:
+    try:
+        return path.read_text(encoding="utf-8")
+    except OSError:
+        return ""
+
+
+def requirement_names(python_args: Sequence[str]) -> List[str]:
+    """Distribution names of the direct requirements (``-r`` files expanded one level)."""
+    names: List[str] = []
+    lines: List[str] = []
+    args = list(python_args)
+    i = 0
+    while i < len(args):
+        if args[i] in {"-r", "--requirement"} and i + 1 < len(args):
+            lines.extend(_read_text(Path(args[i + 1])).splitlines())
+            i += 2
+            continue
+        lines.append(args[i])
+        i += 1
+    for line in lines:
+        line = line.split("#", 1)[0].strip()
+        if not line or line.startswith("-") or "://" in line or line.startswith((".", "/")):
+            continue
+        match = _NAME_RE.match(line)
+        if match:
+            names.append(match.group(1))
+    return names
+
+
+def dependency_key(python_args: Sequence[str], constraints: Optional[Path]) -> str:
+    h = hashlib.sha256()
+    h.update(f"{sys.executable}\0{sys.version}\0".encode("utf-8"))
+    args = list(python_args)
+    i = 0
+    while i < len(args):
+        if args[i] in {"-r", "--requirement"} and i + 1 < len(args):
+            h.update(b"-r\0" + _read_text(Path(args[i + 1])).encode("utf-8") + b"\0")
+            i += 2
+            continue
+        h.update(args[i].encode("utf-8") + b"\0")
+        i += 1
+    if constraints is not None:
+        h.update(b"-c\0" + _read_text(constraints).encode("utf-8"))
+    return h.hexdigest()[:32]
+
+
+class DependencyStore:
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    @contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        with self._locks_guard:
+            lk = self._locks.setdefault(key, threading.Lock())
+        with lk:
+            yield
+
+    def site_dir(self, key: str) -> Path:
+        return self.root / key / "site"
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """A usable record for ``key`` or ``None`` (not installed / no longer valid)."""
+        try:
+            record = json.loads((self.root / key / _RECORD).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        mode = record.get("mode")
+        if mode == "target":
+            return record if self.site_dir(key).is_dir() else None
+        if mode == "env":
+            for name in record.get("requirements") or []:
+                try:
+                    metadata.distribution(name)
+                except metadata.PackageNotFoundError:
+                    return None
+            return record
+        return None
+
+    def record(self, key: str, mode: str, requirements: Sequence[str]) -> None:
+        folder = self.root / key
+        folder.mkdir(parents=True, exist_ok=True)
+        tmp = folder / f".{_RECORD}.{uuid.uuid4().hex}"
+        tmp.write_text(json.dumps({"mode": mode, "requirements": list(requirements)}), encoding="utf-8")
+        os.replace(tmp, folder / _RECORD)
+
+    def staging_dir(self, key: str) -> Path:
+        path = self.root / f".{key}.{uuid.uuid4().hex}"
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def publish(self, key: str, staged: Path) -> Path:
+        """Move a finished ``pip --target`` install into the store."""
+        target = self.site_dir(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.replace(staged, target)
+        except OSError:
+            # параллельно опубликовал другой процесс — берём его копию
+            shutil.rmtree(staged, ignore_errors=True)
+            if not target.is_dir():
+                raise
+        return target
+
+    @staticmethod
+    def link(site: Path, vendor_dir: Path) -> None:
+        """Point ``vendor_dir`` at a stored install (symlink, or copy where links are unavailable)."""
+        if vendor_dir.is_symlink() or vendor_dir.is_file():
+            vendor_dir.unlink()
+        elif vendor_dir.exists():
+            shutil.rmtree(vendor_dir, ignore_errors=True)
+        vendor_dir.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.symlink(site, vendor_dir, target_is_directory=True)
+        except (OSError, NotImplementedError):
+            shutil.copytree(site, vendor_dir)
+
+
+__all__ = ["DependencyStore", "ENV_INSTALL_LOCK", "dependency_key", "enabled", "requirement_names"]
@@ -1,6 +1,7 @@
 # src\adaos\services\skill\manager.py
 from __future__ import annotations
 
+import copy
 import importlib
 import json
 import os
@@ -16,6 +17,7 @@ from typing import Any, Dict, Iterable, Mapping, Optional
 import yaml
 
 from adaos.domain import SkillMeta, SkillRecord
+from adaos.sdk.data.skill_memory import use_env_path
 from adaos.ports import EventBus, GitClient, SkillRepository, SkillRegistry
 from adaos.ports.paths import PathProvider
 from adaos.services.eventbus import emit
@@ -27,16 +29,22 @@ from adaos.services.settings import Settings
 from adaos.services.agent_context import AgentContext, get_ctx, use_ctx
 from adaos.services.skill.runtime_env import SkillRuntimeEnvironment, SkillSlotPaths
 from adaos.services.skill.tests_runner import TestResult, run_tests
-from adaos.skills.runtime_runner import execute_tool
+from adaos.skills.runtime_runner import execute_tool, invoke_tool, resolve_tool, should_expand_keywords
+from adaos.skills.process_pool import WorkerSpec, get_process_pool, isolation_mode
 from adaos.services.skill.validation import SkillValidationService, ValidationReport
 from adaos.services.crypto.secrets_service import SecretsService
 from adaos.services.skill.secrets_backend import SkillSecretsBackend
 from adaos.services.skill.resolver import SkillPathResolver
+from adaos.services.skill import deps_cache, tool_dispatch
+from adaos.services.skill.tool_cache import CachePolicy, cache_policy, get_tool_cache
+from adaos.services.skill.runtime import invalidate_skill_handler
 from adaos.services.capacity import install_skill_in_capacity, uninstall_skill_from_capacity
 from adaos.services.yjs.webspace import default_webspace_id
 import ast
 
 _name_re = re.compile(r"^[a-zA-Z0-9_\-\/]+$")
+# общий на процесс кэш зависимостей (по корню кэша), чтобы блокировки по хэшу работали между менеджерами
+_DEP_STORES: Dict[Path, deps_cache.DependencyStore] = {}
 
 
 @dataclass(slots=True)
@@ -699,6 +707,7 @@ class SkillManager:
         except PermissionError as exc:
             remove_error = exc
         self.cleanup_runtime(name, purge_data=True)
+        self._on_runtime_changed(name)
         if remove_error is not None:
             raise RuntimeError(f"не удалось удалить рабочую копию навыка '{name}'. Закройте файлы под " f"путем {(root / 'skills' / name)} и повторите попытку.") from remove_error
         emit(self.bus, "skill.uninstalled", {"id": name}, "skill.mgr")
@@ -866,6 +875,41 @@ class SkillManager:
             tests=tests,
         )
 
+    def prepare_runtimes(
+        self,
+        names: Iterable[str],
+        *,
+        run_tests: bool = False,
+        max_workers: int | None = None,
+    ) -> Dict[str, RuntimeInstallResult | Exception]:
+        """
+        Prepare runtimes of several skills in parallel. Skills with the same
+        dependency set share one install (see :mod:`deps_cache`). Returns the
+        result or the raised exception per skill.
+        """
+        ordered = list(dict.fromkeys(str(n) for n in names if n))
+        if not ordered:
+            return {}
+        if max_workers is None:
+            try:
+                max_workers = int(os.getenv("ADAOS_SKILL_PREPARE_WORKERS") or 4)
+            except ValueError:
+                max_workers = 4
+        workers = max(1, min(max_workers, len(ordered)))
+
+        from concurrent.futures import ThreadPoolExecutor
+        from contextvars import copy_context
+
+        def _one(name: str) -> RuntimeInstallResult | Exception:
+            try:
+                return self.prepare_runtime(name, run_tests=run_tests)
+            except Exception as exc:
+                return exc
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="adaos-prepare") as pool:
+            futures = {name: pool.submit(copy_context().run, _one, name) for name in ordered}
+            return {name: fut.result() for name, fut in futures.items()}
+
     def activate_runtime(self, name: str, *, version: str | None = None, slot: str | None = None) -> str:
         env = self._runtime_env(name)
         target_version = version or self._latest_prepared_version(env) or env.resolve_active_version()
@@ -886,6 +930,7 @@ class SkillManager:
         history["last_active_at"] = datetime.now(timezone.utc).isoformat()
         env.write_version_metadata(target_version, metadata)
         self._smoke_import(env=env, name=name, version=target_version)
+        self._on_runtime_changed(name)
         try:
             install_skill_in_capacity(name, target_version, active=True)
             try:
@@ -908,7 +953,9 @@ class SkillManager:
         if not version:
             raise RuntimeError("no active version")
         env.prepare_version(version)
-        return env.rollback_slot(version)
+        slot = env.rollback_slot(version)
+        self._on_runtime_changed(name)
+        return slot
 
     def dev_rollback_runtime(self, name: str) -> str:
         env = self._runtime_env_dev(name)
@@ -1133,12 +1180,143 @@ class SkillManager:
         allow_inactive: bool = False,
         slot: str | None = None,
     ) -> Any:
-        status = self.runtime_status(name)
         env = self._runtime_env(name)
+        skills_root = self.ctx.paths.skills_dir()
+        # Горячий путь: активный слот уже разрешён — только поиск в таблице.
+        entry = tool_dispatch.lookup(env, skills_root, tool) if slot is None else None
+        if entry is None:
+            entry, cacheable = self._resolve_tool_dispatch(env, name, tool, allow_inactive=allow_inactive, slot=slot)
+            if cacheable:
+                tool_dispatch.store(skills_root, tool, entry)
+
+        if entry.cache is not None:
+            # Идемпотентный инструмент: ответ из памяти, одинаковые параллельные вызовы — одним исполнением.
+            cache = get_tool_cache()
+            key = cache.make_key(name, entry.version, entry.slot, entry.tool, entry.cache, payload)
+            return cache.call(key, entry.cache.ttl, lambda: self._execute_tool(env, name, entry, payload, timeout))
+        return self._execute_tool(env, name, entry, payload, timeout)
+
+    def _execute_tool(
+        self,
+        env: SkillRuntimeEnvironment,
+        name: str,
+        entry: tool_dispatch.ToolDispatch,
+        payload: Mapping[str, Any],
+        timeout: float | None,
+    ) -> Any:
+        execution_timeout = timeout or entry.timeout
+
+        if entry.isolation == "process":
+            # Отдельный долгоживущий процесс на (навык, версия, слот): sys.path хаба
+            # не трогается, таймаут обрывает сам процесс.
+            spec = WorkerSpec(
+                skill=name,
+                version=entry.version,
+                slot=entry.slot,
+                skill_dir=str(entry.skill_dir),
+                extra_paths=tuple(str(p) for p in entry.extra_paths),
+                skill_env=str(entry.skill_env_path),
+                secrets_path=str(entry.secrets_path),
+                base_dir=str(self.ctx.settings.base_dir) if self.ctx.settings else "",
+            )
+            result = get_process_pool().call(spec, module=entry.module, attr=entry.attr, payload=payload, timeout=execution_timeout)
+            self._persist_tool_env(env, entry)
+            return result
+
+        ctx = self.ctx
+        previous = ctx.skill_ctx.get()
+        if entry.secrets is None or entry.caps is not ctx.caps:
+            entry.secrets = SecretsService(SkillSecretsBackend(entry.secrets_path), ctx.caps)
+            entry.caps = ctx.caps
+        # Секреты и .skill_env.json навыка — только для этого вызова: run_tool
+        # идёт из пула потоков, общий ctx.secrets и os.environ подменять нельзя.
+        call_ctx = copy.copy(ctx)
+        call_ctx.secrets = entry.secrets
+
+        def _call_tool() -> Any:
+            with use_ctx(call_ctx), use_env_path(entry.skill_env_path):
+                if entry.func is None:
+                    func = resolve_tool(entry.skill_dir, module=entry.module, attr=entry.attr, extra_paths=entry.extra_paths)
+                    entry.expand = should_expand_keywords(func)
+                    entry.func = func
+                return invoke_tool(entry.func, payload, expand=entry.expand)
+
+        try:
+            if not ctx.skill_ctx.set(name, entry.skill_dir):
+                raise RuntimeError(f"failed to establish context for skill '{name}'")
+
+            if execution_timeout:
+                from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+                from contextvars import copy_context
+
+                # Без `with`: shutdown(wait=True) ждал бы зависший поток и съедал таймаут.
+                # Сам поток остановить нельзя — для этого есть isolation=process.
+                pool = ThreadPoolExecutor(max_workers=1)
+                try:
+                    ctxvars = copy_context()
+                    future = pool.submit(lambda: ctxvars.run(_call_tool))
+                    try:
+                        result = future.result(timeout=execution_timeout)
+                    except FuturesTimeoutError as exc:
+                        future.cancel()
+                        raise TimeoutError(f"tool '{entry.tool}' timed out after {execution_timeout} seconds") from exc
+                finally:
+                    pool.shutdown(wait=False)
+            else:
+                result = _call_tool()
+        finally:
+            if previous is None:
+                ctx.skill_ctx.clear()
+            else:
+                ctx.skill_ctx.set(previous.name, Path(previous.path))
+
+        self._persist_tool_env(env, entry)
+        return result
+
+    def declared_cache_policy(self, name: str, tool: str) -> Optional[CachePolicy]:
+        """
+        ``cache`` policy the skill declares for ``tool``: from the resolved
+        manifest of the active slot, else from the workspace ``skill.yaml``.
+        The hub uses it to tell idempotent tools apart when it proxies a call
+        for a skill it cannot run itself.
+        """
+        try:
+            data = json.loads(Path(self.runtime_status(name)["resolved_manifest"]).read_text(encoding="utf-8"))
+            spec = (data.get("tools") or {}).get(tool)
+            if isinstance(spec, Mapping):
+                return cache_policy(spec)
+        except Exception:
+            pass
+        root = self.ctx.paths.skills_workspace_dir()
+        root = root() if callable(root) else root
+        try:
+            manifest = yaml.safe_load((Path(root) / name / "skill.yaml").read_text(encoding="utf-8")) or {}
+        except Exception:
+            return None
+        for spec in manifest.get("tools") or []:
+            if isinstance(spec, Mapping) and spec.get("name") == tool:
+                return cache_policy(spec)
+        return None
+
+    def _resolve_tool_dispatch(
+        self,
+        env: SkillRuntimeEnvironment,
+        name: str,
+        tool: str | None,
+        *,
+        allow_inactive: bool,
+        slot: str | None,
+    ) -> tuple[tool_dispatch.ToolDispatch, bool]:
+        """
+        Full (slow) resolution of a tool call. The second value tells whether
+        the result describes the active slot and may be cached.
+        """
+        status = self.runtime_status(name)
         version = status.get("version")
         active_slot = status.get("active_slot")
         manifest_path = Path(status["resolved_manifest"])
         slot_name = active_slot
+        cacheable = bool(status.get("ready", True)) and (slot is None or slot == active_slot)
 
         if not status.get("ready", True):
             target_slot = slot or status.get("pending_slot")
@@ -1168,6 +1346,7 @@ class SkillManager:
             manifest_path = candidate
             slot_name = slot
 
+        manifest_mtime = tool_dispatch.file_stamp(manifest_path)
         data = json.loads(manifest_path.read_text(encoding="utf-8"))
         tools = data.get("tools") or {}
         if tool:
@@ -1181,64 +1360,38 @@ class SkillManager:
             available = ", ".join(sorted(tools)) or "<none>"
             raise KeyError(f"tool '{target_tool}' not found (available: {available})")
 
-        module = tool_spec.get("module")
-        attr = tool_spec.get("callable") or target_tool
         skill_dir = Path(data.get("source") or (self.ctx.paths.skills_dir() / name))
         slot_name = data.get("slot") or slot_name
-        slot = env.build_slot_paths(version or data.get("version"), slot_name)
+        version = version or data.get("version")
+        slot_paths = env.build_slot_paths(version, slot_name)
         runtime_info = data.get("runtime", {})
-        extra_paths = [Path(p) for p in runtime_info.get("python_paths", []) if p]
-        skill_env_path = Path(runtime_info.get("skill_env") or slot.skill_env_path)
-
-        ctx = self.ctx
-        previous = ctx.skill_ctx.get()
-        prev_env = os.environ.get("ADAOS_SKILL_ENV_PATH")
-        prev_secrets = ctx.secrets
-        ctx.secrets = SecretsService(SkillSecretsBackend(env.data_root() / "files" / "secrets.json"), ctx.caps)
-        execution_timeout = timeout or tool_spec.get("timeout_seconds")
-
-        def _call_tool() -> Any:
-            with use_ctx(ctx):
-                return execute_tool(
-                    skill_dir,
-                    module=module,
-                    attr=attr,
-                    payload=payload,
-                    extra_paths=extra_paths,
-                )
-
-        try:
-            if not ctx.skill_ctx.set(name, skill_dir):
-                raise RuntimeError(f"failed to establish context for skill '{name}'")
-            os.environ["ADAOS_SKILL_ENV_PATH"] = str(skill_env_path)
-
-            if execution_timeout:
-                from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
-                from contextvars import copy_context
-
-                with ThreadPoolExecutor(max_workers=1) as pool:
-                    ctxvars = copy_context()
-                    future = pool.submit(lambda: ctxvars.run(_call_tool))
-                    try:
-                        result = future.result(timeout=execution_timeout)
-                    except FuturesTimeoutError as exc:
-                        future.cancel()
-                        raise TimeoutError(f"tool '{target_tool}' timed out after {execution_timeout} seconds") from exc
-            else:
-                result = _call_tool()
-        finally:
-            ctx.secrets = prev_secrets
-            if previous is None:
-                ctx.skill_ctx.clear()
-            else:
-                ctx.skill_ctx.set(previous.name, Path(previous.path))
-            if prev_env is None:
-                os.environ.pop("ADAOS_SKILL_ENV_PATH", None)
-            else:
-                os.environ["ADAOS_SKILL_ENV_PATH"] = prev_env
+        entry = tool_dispatch.ToolDispatch(
+            skill=name,
+            version=str(version or ""),
+            slot=str(slot_name or ""),
+            tool=target_tool,
+            manifest_path=manifest_path,
+            manifest_mtime=manifest_mtime,
+            module=tool_spec.get("module"),
+            attr=tool_spec.get("callable") or target_tool,
+            skill_dir=skill_dir,
+            extra_paths=tuple(Path(p) for p in runtime_info.get("python_paths", []) if p),
+            skill_env_path=Path(runtime_info.get("skill_env") or slot_paths.skill_env_path),
+            slot_paths=slot_paths,
+            secrets_path=env.data_root() / "files" / "secrets.json",
+            timeout=tool_spec.get("timeout_seconds"),
+            isolation=isolation_mode(tool_spec, runtime_info),
+            cache=cache_policy(tool_spec),
+        )
+        return entry, cacheable and manifest_mtime is not None
 
-        self._persist_skill_env(env, slot)
-        return result
+    def _persist_tool_env(self, env: SkillRuntimeEnvironment, entry: tool_dispatch.ToolDispatch) -> None:
+        # копируем .skill_env.json только если инструмент его поменял
+        stamp = tool_dispatch.file_stamp(entry.slot_paths.skill_env_path)
+        if stamp is None or stamp == entry.env_stamp:
+            return
+        self._persist_skill_env(env, entry.slot_paths)
+        entry.env_stamp = stamp
 
     def run_dev_tool(
         self,
@@ -1309,13 +1462,12 @@ class SkillManager:
 
         ctx = self.ctx
         previous = ctx.skill_ctx.get()
-        prev_env = os.environ.get("ADAOS_SKILL_ENV_PATH")
-        prev_secrets = ctx.secrets
-        ctx.secrets = SecretsService(SkillSecretsBackend(env.data_root() / "files" / "secrets.json"), ctx.caps)
+        call_ctx = copy.copy(ctx)
+        call_ctx.secrets = SecretsService(SkillSecretsBackend(env.data_root() / "files" / "secrets.json"), ctx.caps)
         execution_timeout = timeout or tool_spec.get("timeout_seconds")
 
         def _call_tool() -> Any:
-            with use_ctx(ctx):
+            with use_ctx(call_ctx), use_env_path(skill_env_path):
                 return execute_tool(
                     skill_dir,
                     module=module,
@@ -1330,17 +1482,12 @@ class SkillManager:
         except Exception:
             pass
         try:
-            os.environ["ADAOS_SKILL_ENV_PATH"] = str(skill_env_path)
             result = _call_tool()
         finally:
             if previous is None:
                 ctx.skill_ctx.clear()
             else:
                 ctx.skill_ctx.set(previous.name, Path(previous.path))
-            if prev_env is None:
-                os.environ.pop("ADAOS_SKILL_ENV_PATH", None)
-            else:
-                os.environ["ADAOS_SKILL_ENV_PATH"] = prev_env
 
         self._persist_skill_env(env, slot)
         return result
@@ -1348,6 +1495,13 @@ class SkillManager:
     # ------------------------------------------------------------------
     # Internal helpers
     # ------------------------------------------------------------------
+    def _on_runtime_changed(self, name: str) -> None:
+        """Drop per-skill runtime state bound to the previous version/slot."""
+        tool_dispatch.invalidate(name)
+        invalidate_skill_handler(name)
+        get_process_pool().retire(name)
+        get_tool_cache().invalidate(name)
+
     def _runtime_env(self, name: str) -> SkillRuntimeEnvironment:
         return SkillRuntimeEnvironment(
             skills_root=self.ctx.paths.skills_dir(),
@@ -1493,20 +1647,84 @@ class SkillManager:
             return []
 
         constraints = self._constraints_file()
+        vendor_dir = slot.vendor_dir
+        if not deps_cache.enabled():
+            paths = self._run_dependency_install(slot=slot, python_args=python_args, constraints=constraints, target=vendor_dir)
+            if not paths:
+                self._clear_vendor(vendor_dir)
+            return paths
+
+        # Один и тот же набор зависимостей ставится один раз на хост, дальше — из кэша.
+        store = self._dependency_store()
+        key = deps_cache.dependency_key(python_args, constraints)
+        with store.lock(key):
+            record = store.lookup(key)
+            if record is None:
+                staged = store.staging_dir(key)
+                try:
+                    installed = self._run_dependency_install(slot=slot, python_args=python_args, constraints=constraints, target=staged)
+                    if installed:
+                        store.publish(key, staged)
+                        mode = "target"
+                    else:
+                        mode = "env"
+                finally:
+                    if staged.exists():
+                        shutil.rmtree(staged, ignore_errors=True)
+                store.record(key, mode, deps_cache.requirement_names(python_args))
+                record = {"mode": mode}
+        if record["mode"] == "target":
+            store.link(store.site_dir(key), vendor_dir)
+            return [str(vendor_dir)]
+        self._clear_vendor(vendor_dir)
+        return []
+
+    def _dependency_store(self) -> deps_cache.DependencyStore:
+        root = Path(self.ctx.paths.cache_dir()) / "skill_deps"
+        store = _DEP_STORES.get(root)
+        if store is None:
+            store = _DEP_STORES.setdefault(root, deps_cache.DependencyStore(root))
+        return store
+
+    @staticmethod
+    def _clear_vendor(vendor_dir: Path) -> None:
+        if vendor_dir.is_symlink():
+            vendor_dir.unlink()
+        elif vendor_dir.exists():
+            for child in vendor_dir.iterdir():
+                if child.is_dir() and not child.is_symlink():
+                    shutil.rmtree(child, ignore_errors=True)
+                else:
+                    try:
+                        child.unlink()
+                    except FileNotFoundError:
+                        pass
+
+    def _run_dependency_install(
+        self,
+        *,
+        slot: SkillSlotPaths,
+        python_args: list[str],
+        constraints: Path | None,
+        target: Path,
+    ) -> list[str]:
+        """
+        Install ``python_args``: into the interpreter environment (returns ``[]``)
+        or, as a fallback, with ``--target`` into ``target`` (returns ``[target]``).
+        """
+        # Без --upgrade: уже удовлетворённые требования pip не трогает и не резолвит заново.
         base_cmd = [
             str(sys.executable),
             "-m",
             "pip",
             "install",
-            "--upgrade",
             "--disable-pip-version-check",
         ]
         if constraints:
             base_cmd.extend(["-c", str(constraints)])
 
         shared_cmd = [*base_cmd, *python_args]
-        vendor_dir = slot.vendor_dir
-        
+
         def _run(cmd: list[str]) -> tuple[bool, str]:
             try:
                 p = subprocess.run(cmd, capture_output=True, text=True)
@@ -1517,62 +1735,45 @@ class SkillManager:
             return ok, out
 
         # 1) Try pip in current interpreter; bootstrap pip if missing
-        ok, out = _run(shared_cmd)
-        if not ok and ("No module named pip" in out or "No module named pip" in out.replace("\r", "\n")):
-            _run([str(sys.executable), "-m", "ensurepip", "--upgrade"])  # best-effort
+        with deps_cache.ENV_INSTALL_LOCK:
             ok, out = _run(shared_cmd)
+            if not ok and ("No module named pip" in out or "No module named pip" in out.replace("\r", "\n")):
+                _run([str(sys.executable), "-m", "ensurepip", "--upgrade"])  # best-effort
+                ok, out = _run(shared_cmd)
         if ok:
-            # clean vendor if present
-            if vendor_dir.exists():
-                for child in vendor_dir.iterdir():
-                    if child.is_dir():
-                        shutil.rmtree(child, ignore_errors=True)
-                    else:
-                        try:
-                            child.unlink()
-                        except FileNotFoundError:
-                            pass
             return []
 
-        # 2) Fallback: pip --target vendor (after ensurepip)
-        vendor_dir.mkdir(parents=True, exist_ok=True)
+        # 2) Fallback: pip --target (after ensurepip)
+        target.mkdir(parents=True, exist_ok=True)
         vendor_cmd = [
             *base_cmd,
             "--target",
-            str(vendor_dir),
+            str(target),
             "--no-warn-script-location",
             *python_args,
         ]
         ok2, out2 = _run(vendor_cmd)
         if not ok2 and ("No module named pip" in out2 or "No module named pip" in out2.replace("\r", "\n")):
-            _run([str(sys.executable), "-m", "ensurepip", "--upgrade"])  # best-effort
+            with deps_cache.ENV_INSTALL_LOCK:
+                _run([str(sys.executable), "-m", "ensurepip", "--upgrade"])  # best-effort
             ok2, out2 = _run(vendor_cmd)
         if ok2:
-            return [str(vendor_dir)]
+            return [str(target)]
 
         # 3) Last resort: try `uv pip install` (if available)
-        uv_base = ["uv", "pip", "install", "--upgrade"]
+        uv_base = ["uv", "pip", "install"]
         if constraints:
             uv_base.extend(["-c", str(constraints)])
-        ok3, out3 = _run([*uv_base, *python_args])
+        with deps_cache.ENV_INSTALL_LOCK:
+            ok3, out3 = _run([*uv_base, *python_args])
         if ok3:
-            # uv installs into environment; keep vendor clean
-            if vendor_dir.exists():
-                for child in vendor_dir.iterdir():
-                    if child.is_dir():
-                        shutil.rmtree(child, ignore_errors=True)
-                    else:
-                        try:
-                            child.unlink()
-                        except FileNotFoundError:
-                            pass
             return []
 
-        # Try uv with --target vendor
-        uv_vendor = [*uv_base, "--target", str(vendor_dir), "--no-warn-script-location", *python_args]
+        # Try uv with --target
+        uv_vendor = [*uv_base, "--target", str(target), "--no-warn-script-location", *python_args]
         ok4, out4 = _run(uv_vendor)
         if ok4:
-            return [str(vendor_dir)]
+            return [str(target)]
 
         # Failed all strategies
         raise RuntimeError(
@@ -1720,6 +1921,8 @@ class SkillManager:
                 },
                 "permissions": item.get("permissions") or manifest.get("permissions"),
                 "secrets": self._preserve_secret_placeholders(item.get("secrets", [])),
+                "isolation": item.get("isolation"),
+                "cache": item.get("cache"),
             }
 
         if not default_tool and len(tools) == 1:
@@ -1741,6 +1944,7 @@ class SkillManager:
                 "tests": str(slot.tests_dir),
                 "python_paths": list(python_paths),
                 "skill_env": str(slot.skill_env_path),
+                "isolation": (manifest.get("runtime") or {}).get("isolation"),
             },
             "tools": tools,
             "default_tool": default_tool,
@@ -1790,10 +1994,14 @@ class SkillManager:
         os.replace(tmp, slot.resolved_manifest)
 
     def _remove_tree(self, path: Path) -> None:
+        if path.is_symlink():
+            # vendor слота может ссылаться на общий кэш зависимостей — удаляем только ссылку
+            path.unlink()
+            return
         if not path.exists():
             return
         for child in path.iterdir():
-            if child.is_dir():
+            if child.is_dir() and not child.is_symlink():
                 self._remove_tree(child)
             else:
                 try:
@@ -13,14 +13,20 @@ import asyncio
 import importlib
 import importlib.util
 import sys
+import threading
+import time
+from dataclasses import dataclass
 from inspect import isawaitable
 from pathlib import Path
-from typing import Any, Mapping, Optional
+from types import ModuleType
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
 
 from adaos.services.agent_context import AgentContext, get_ctx
 from adaos.services.skill.runtime_env import SkillRuntimeEnvironment
 
 _SLOT_NAMES = ("A", "B")
+# Как часто (не чаще) сверять mtime исходников загруженного обработчика.
+_SOURCE_RECHECK_S = 1.0
 
 
 def _ensure_sys_paths(skill_name: str, slot_root: Path) -> None:
@@ -61,6 +67,83 @@ def _clear_skill_modules(skill_name: str) -> None:
             sys.modules.pop(name, None)
 
 
+def _source_stamp(skill_dir: Path) -> int:
+    """Latest mtime (ns) among the skill's Python sources."""
+
+    latest = 0
+    try:
+        for path in skill_dir.rglob("*.py"):
+            try:
+                latest = max(latest, path.stat().st_mtime_ns)
+            except OSError:
+                continue
+    except OSError:
+        pass
+    return latest
+
+
+@dataclass(slots=True)
+class _LoadedHandler:
+    version: str
+    slot: str
+    skill_dir: Path
+    module: ModuleType
+    handle: Callable[..., Any]
+    source_stamp: int
+    checked_at: float
+    import_s: float
+
+
+@dataclass(slots=True)
+class _HandlerCounters:
+    hits: int = 0
+    loads: int = 0
+    reloads: int = 0
+    import_s: float = 0.0
+    last_import_s: float = 0.0
+
+
+# Загруженные handlers.main по (skills_root, skill): модуль живёт между вызовами,
+# перезагрузка — только при смене версии/слота или изменении исходников.
+_HANDLERS: Dict[Tuple[str, str], _LoadedHandler] = {}
+_HANDLER_COUNTERS: Dict[str, _HandlerCounters] = {}
+_HANDLERS_LOCK = threading.Lock()
+
+
+def invalidate_skill_handler(skill_name: Optional[str] = None) -> None:
+    """Forget loaded handler modules for ``skill_name`` (all skills when ``None``)."""
+
+    with _HANDLERS_LOCK:
+        for key in [k for k in _HANDLERS if skill_name is None or k[1] == skill_name]:
+            del _HANDLERS[key]
+
+
+def skill_handler_stats() -> list[Dict[str, Any]]:
+    """Per-skill hit rate and import timings of the loaded-handler registry."""
+
+    rows = []
+    with _HANDLERS_LOCK:
+        loaded = {key[1]: entry for key, entry in _HANDLERS.items()}
+        for skill, c in sorted(_HANDLER_COUNTERS.items()):
+            calls = c.hits + c.loads
+            entry = loaded.get(skill)
+            rows.append(
+                {
+                    "skill": skill,
+                    "version": entry.version if entry else None,
+                    "slot": entry.slot if entry else None,
+                    "calls": calls,
+                    "hits": c.hits,
+                    "loads": c.loads,
+                    "reloads": c.reloads,
+                    "hit_rate": round(c.hits / calls, 4) if calls else 0.0,
+                    "import_ms_total": round(c.import_s * 1000.0, 3),
+                    "import_ms_last": round(c.last_import_s * 1000.0, 3),
+                }
+            )
+    return rows
+
+
 class SkillRuntimeError(RuntimeError):
     """Base error for problems while interacting with skill code."""
 
@@ -212,7 +295,46 @@ async def run_skill_handler(
     """
 
     agent_ctx = ctx or get_ctx()
+    loaded = _load_skill_handler(skill_name, agent_ctx)
+    handle_fn = loaded.handle
+    skill_dir = loaded.skill_dir
+
+    skill_ctx_port = agent_ctx.skill_ctx
+    previous = skill_ctx_port.get()
+    if not skill_ctx_port.set(skill_name, skill_dir):
+        raise SkillRuntimeError(f"failed to establish context for skill '{skill_name}'")
+    try:
+        result = handle_fn(topic, payload)
+        if isawaitable(result):
+            result = await result
+        return result
+    finally:
+        if previous is None:
+            skill_ctx_port.clear()
+        else:
+            skill_ctx_port.set(previous.name, previous.path)
+
+
+def _load_skill_handler(skill_name: str, agent_ctx: AgentContext) -> _LoadedHandler:
+    """Return the loaded ``handlers.main`` of the active slot, importing it on a miss."""
+
+    env = _runtime_env(skill_name, agent_ctx)
     version = resolve_active_version(skill_name, ctx=agent_ctx)
+    slot = env.read_active_slot(version)
+    key = (str(agent_ctx.paths.skills_dir()), skill_name)
+    counters = _HANDLER_COUNTERS.setdefault(skill_name, _HandlerCounters())
+
+    entry = _HANDLERS.get(key)
+    if entry is not None and entry.version == version and entry.slot == slot:
+        now = time.monotonic()
+        if now - entry.checked_at < _SOURCE_RECHECK_S:
+            counters.hits += 1
+            return entry
+        if _source_stamp(entry.skill_dir) == entry.source_stamp:
+            entry.checked_at = now
+            counters.hits += 1
+            return entry
+
     slot_path = find_skill_slot(skill_name, ctx=agent_ctx, version=version)
     src_path = slot_path / "src"
     if not src_path.is_dir():
@@ -226,6 +348,8 @@ async def run_skill_handler(
             f"Skill package for '{skill_name}' not found: {skill_dir}"
         )
 
+    stamp = _source_stamp(skill_dir)
+    started = time.perf_counter()
     _ensure_sys_paths(skill_name, slot_path)
     _clear_skill_modules(skill_name)
     module_name = f"skills.{skill_name}.handlers.main"
@@ -240,21 +364,26 @@ async def run_skill_handler(
         raise SkillHandlerMissingFunctionError(
             f"'handle' not found in {module_name}"
         )
-
-    skill_ctx_port = agent_ctx.skill_ctx
-    previous = skill_ctx_port.get()
-    if not skill_ctx_port.set(skill_name, skill_dir):
-        raise SkillRuntimeError(f"failed to establish context for skill '{skill_name}'")
-    try:
-        result = handle_fn(topic, payload)
-        if isawaitable(result):
-            result = await result
-        return result
-    finally:
-        if previous is None:
-            skill_ctx_port.clear()
-        else:
-            skill_ctx_port.set(previous.name, previous.path)
+    elapsed = time.perf_counter() - started
+
+    loaded = _LoadedHandler(
+        version=version,
+        slot=slot,
+        skill_dir=skill_dir,
+        module=module,
+        handle=handle_fn,
+        source_stamp=stamp,
+        checked_at=time.monotonic(),
+        import_s=elapsed,
+    )
+    with _HANDLERS_LOCK:
+        _HANDLERS[key] = loaded
+    counters.loads += 1
+    if entry is not None:
+        counters.reloads += 1
+    counters.import_s += elapsed
+    counters.last_import_s = elapsed
+    return loaded
 
 
 def run_skill_handler_sync(
@@ -388,6 +517,8 @@ __all__ = [
     "find_skill_dir",
     "run_skill_handler",
     "run_skill_handler_sync",
+    "invalidate_skill_handler",
+    "skill_handler_stats",
     "run_skill_prep",
     "run_dev_skill_prep",
 ]
@@ -0,0 +1,209 @@
+"""Result cache for idempotent skill tools.
+
+A tool opts in through its manifest entry::
+
+    tools:
+      - name: get_weather
+        cache: { ttl: 300, key: [city, units] }
+
+``ttl`` is in seconds, ``key`` lists the payload fields that identify a
+result (the whole payload when omitted). Results are kept per
+(skill, version, slot, tool, key) in a bounded LRU
+(``ADAOS_TOOL_CACHE_MAX_ENTRIES``, default 1024). Concurrent identical calls
+are coalesced: one caller runs the tool, the rest wait for its result
+(single-flight). Errors are never cached, nor are results that cannot be
+deep-copied (locks, clients, generators): waiting callers then run the tool
+themselves.
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+
+@dataclass(frozen=True, slots=True)
+class CachePolicy:
+    ttl: float
+    key: Optional[Tuple[str, ...]] = None
+
+
+def cache_policy(tool_spec: Mapping[str, Any]) -> Optional[CachePolicy]:
+    """Parse the ``cache`` setting (``{ttl, key}``) of a resolved tool entry."""
+    raw = tool_spec.get("cache")
+    if not isinstance(raw, Mapping):
+        return None
+    try:
+        ttl = float(raw.get("ttl") or 0)
+    except (TypeError, ValueError):
+        return None
+    if ttl <= 0:
+        return None
+    fields = raw.get("key")
+    key = tuple(str(f) for f in fields) if isinstance(fields, (list, tuple)) else None
+    return CachePolicy(ttl=ttl, key=key)
+
+
+def _env_max_entries() -> int:
+    try:
+        return max(int(os.getenv("ADAOS_TOOL_CACHE_MAX_ENTRIES") or 1024), 1)
+    except ValueError:
+        return 1024
+
+
+@dataclass(slots=True)
+class _ToolStats:
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    errors: int = 0
+    uncacheable: int = 0
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+_Key = Tuple[str, str, str, str, str]
+# Результат лидера не копируется — ожидающие выполняют инструмент сами.
+_UNCACHEABLE = object()
+
+
+class ToolResultCache:
+    def __init__(self, *, max_entries: Optional[int] = None) -> None:
+        self.max_entries = max_entries or _env_max_entries()
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[_Key, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[_Key, _Flight] = {}
+        self._stats: Dict[Tuple[str, str], _ToolStats] = {}
+
+    @staticmethod
+    def make_key(skill: str, version: str, slot: str, tool: str, policy: CachePolicy, payload: Mapping[str, Any]) -> _Key:
+        if policy.key is None:
+            subject: Any = payload
+        else:
+            subject = [payload.get(field) for field in policy.key]
+        blob = json.dumps(subject, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+        return (skill, version, slot, tool, blob)
+
+    def _tool_stats(self, skill: str, tool: str) -> _ToolStats:
+        st = self._stats.get((skill, tool))
+        if st is None:
+            st = self._stats[(skill, tool)] = _ToolStats()
+        return st
+
+    def call(self, key: _Key, ttl: float, compute: Callable[[], Any]) -> Any:
+        """Return the cached result for ``key`` or run ``compute`` once for all concurrent callers."""
+        skill, _, _, tool, _ = key
+        with self._lock:
+            st = self._tool_stats(skill, tool)
+            cached = self._entries.get(key)
+            if cached is not None:
+                if cached[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    st.hits += 1
+                    return copy.deepcopy(cached[1])
+                del self._entries[key]
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                st.misses += 1
+            else:
+                st.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            if flight.result is _UNCACHEABLE:
+                return compute()
+            return copy.deepcopy(flight.result)
+
+        # Запись рейса снимается и ожидающие будятся при любом исходе,
+        # иначе они повисли бы на flight.done навсегда.
+        stored: Any = _UNCACHEABLE
+        try:
+            result = compute()
+            try:
+                stored = copy.deepcopy(result)
+            except Exception:
+                stored = _UNCACHEABLE
+        except BaseException as exc:
+            flight.error = exc
+            with self._lock:
+                st.errors += 1
+            raise
+        finally:
+            flight.result = stored
+            with self._lock:
+                self._inflight.pop(key, None)
+                if stored is _UNCACHEABLE:
+                    if flight.error is None:
+                        st.uncacheable += 1
+                else:
+                    self._entries[key] = (time.monotonic() + ttl, stored)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            flight.done.set()
+        return result
+
+    def invalidate(self, skill: Optional[str] = None) -> None:
+        """Drop cached results of ``skill`` (all skills when ``None``)."""
+        with self._lock:
+            if skill is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if k[0] == skill]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            sizes: Dict[Tuple[str, str], int] = {}
+            for key in self._entries:
+                sizes[(key[0], key[3])] = sizes.get((key[0], key[3]), 0) + 1
+            tools = []
+            for (skill, tool), st in sorted(self._stats.items()):
+                total = st.hits + st.misses + st.coalesced
+                tools.append(
+                    {
+                        "skill": skill,
+                        "tool": tool,
+                        "entries": sizes.get((skill, tool), 0),
+                        "hits": st.hits,
+                        "misses": st.misses,
+                        "coalesced": st.coalesced,
+                        "errors": st.errors,
+                        "uncacheable": st.uncacheable,
+                        "hit_ratio": round((st.hits + st.coalesced) / total, 4) if total else 0.0,
+                    }
+                )
+            return {"entries": len(self._entries), "max_entries": self.max_entries, "tools": tools}
+
+
+_CACHE: ToolResultCache | None = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_tool_cache() -> ToolResultCache:
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = ToolResultCache()
+    return _CACHE
+
+
+__all__ = ["CachePolicy", "ToolResultCache", "cache_policy", "get_tool_cache"]
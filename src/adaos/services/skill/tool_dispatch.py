@@ -0,0 +1,123 @@
+"""Cached tool dispatch table for :meth:`SkillManager.run_tool`.
+
+Resolving a tool call from scratch means reading the version markers,
+``meta.json`` and ``resolved.manifest.json`` and re-creating the slot layout.
+For the active slot this rarely changes, so the resolved entry (module,
+callable, calling convention, timeout, paths) is kept per
+(skills root, skill, tool) and validated against
+(version, slot, manifest mtime):
+
+- in-process changes (activate/rollback/uninstall) call :func:`invalidate`;
+- changes made by another process (CLI) are noticed by a cheap marker/stat
+  re-check, done at most once per ``_RECHECK_S`` per entry.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from adaos.services.skill.runtime_env import SkillRuntimeEnvironment, SkillSlotPaths
+from adaos.services.skill.tool_cache import CachePolicy
+
+_RECHECK_S = 1.0
+
+
+@dataclass(slots=True)
+class ToolDispatch:
+    skill: str
+    version: str
+    slot: str
+    tool: str
+    manifest_path: Path
+    manifest_mtime: Optional[int]
+    module: Optional[str]
+    attr: str
+    skill_dir: Path
+    extra_paths: Tuple[Path, ...]
+    skill_env_path: Path
+    slot_paths: SkillSlotPaths
+    secrets_path: Path
+    timeout: Optional[float]
+    isolation: str
+    cache: Optional[CachePolicy] = None
+    # заполняются лениво при первом вызове
+    func: Optional[Callable[..., Any]] = None
+    expand: bool = False
+    secrets: Any = None
+    caps: Any = None
+    env_stamp: Optional[Tuple[int, int]] = None
+    checked_at: float = 0.0
+
+
+_Key = Tuple[str, str, Optional[str]]
+_TABLE: Dict[_Key, ToolDispatch] = {}
+_LOCK = threading.Lock()
+_HITS = 0
+_MISSES = 0
+
+
+def file_stamp(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def _still_current(env: SkillRuntimeEnvironment, entry: ToolDispatch) -> bool:
+    try:
+        version = env.resolve_active_version()
+        if version != entry.version or env.read_active_slot(version) != entry.slot:
+            return False
+    except OSError:
+        return False
+    return file_stamp(entry.manifest_path) == entry.manifest_mtime
+
+
+def lookup(env: SkillRuntimeEnvironment, skills_root: Path, tool: Optional[str]) -> Optional[ToolDispatch]:
+    global _HITS, _MISSES
+    key = (str(skills_root), env.skill_name, tool)
+    entry = _TABLE.get(key)
+    if entry is not None:
+        now = time.monotonic()
+        if now - entry.checked_at < _RECHECK_S or _still_current(env, entry):
+            entry.checked_at = now
+            _HITS += 1
+            return entry
+        with _LOCK:
+            if _TABLE.get(key) is entry:
+                del _TABLE[key]
+    _MISSES += 1
+    return None
+
+
+def store(skills_root: Path, tool: Optional[str], entry: ToolDispatch) -> None:
+    entry.checked_at = time.monotonic()
+    with _LOCK:
+        _TABLE[(str(skills_root), entry.skill, tool)] = entry
+
+
+def invalidate(skill: Optional[str] = None) -> None:
+    """Forget cached entries of ``skill`` (all skills when ``None``)."""
+    with _LOCK:
+        if skill is None:
+            _TABLE.clear()
+            return
+        for key in [k for k in _TABLE if k[1] == skill]:
+            del _TABLE[key]
+
+
+def stats() -> Dict[str, Any]:
+    total = _HITS + _MISSES
+    return {
+        "entries": len(_TABLE),
+        "hits": _HITS,
+        "misses": _MISSES,
+        "hit_ratio": round(_HITS / total, 4) if total else 0.0,
+    }
+
+
+__all__ = ["ToolDispatch", "lookup", "store", "invalidate", "stats", "file_stamp"]
@@ -0,0 +1,232 @@
+"""
+Off-loop execution of skill tool calls.
+
+Tool implementations are synchronous (``SkillManager.run_tool``), so calling
+them from an ``async`` endpoint blocks the event loop together with the Yjs
+websocket and SSE streams. :class:`ToolExecutor` runs them on a bounded worker
+pool instead:
+
+- at most ``per_skill`` calls of one skill run concurrently;
+- at most ``queue_limit`` calls of one skill wait for a slot, further calls are
+  rejected with :class:`ToolQueueFull` (HTTP 429 in the API);
+- free workers are handed out round-robin across skills with queued calls, so
+  a burst for one skill does not starve the others.
+
+Tuning: ``ADAOS_TOOL_WORKERS``, ``ADAOS_TOOL_SKILL_CONCURRENCY``,
+``ADAOS_TOOL_QUEUE_LIMIT``.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional
+
+
+class ToolQueueFull(RuntimeError):
+    """Raised when a skill already has ``queue_limit`` calls waiting."""
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(int(os.getenv(name) or default), 1)
+    except ValueError:
+        return default
+
+
+class _Job:
+    __slots__ = ("skill", "fn", "future", "loop", "enqueued")
+
+    def __init__(self, skill: str, fn: Callable[[], Any], future: asyncio.Future, loop: asyncio.AbstractEventLoop) -> None:
+        self.skill = skill
+        self.fn = fn
+        self.future = future
+        self.loop = loop
+        self.enqueued = time.perf_counter()
+
+
+class _SkillStats:
+    __slots__ = ("completed", "errors", "rejected", "wait_s", "run_s", "max_run_s")
+
+    def __init__(self) -> None:
+        self.completed = 0
+        self.errors = 0
+        self.rejected = 0
+        self.wait_s = 0.0
+        self.run_s = 0.0
+        self.max_run_s = 0.0
+
+
+def _resolve(future: asyncio.Future, done: Future) -> None:
+    if future.done():
+        return
+    exc = done.exception()
+    if exc is not None:
+        future.set_exception(exc)
+    else:
+        future.set_result(done.result())
+
+
+class ToolExecutor:
+    def __init__(
+        self,
+        *,
+        workers: Optional[int] = None,
+        per_skill: Optional[int] = None,
+        queue_limit: Optional[int] = None,
+    ) -> None:
+        self.workers = workers or _env_int("ADAOS_TOOL_WORKERS", min(32, (os.cpu_count() or 1) + 4))
+        self.per_skill = per_skill or _env_int("ADAOS_TOOL_SKILL_CONCURRENCY", 2)
+        self.queue_limit = queue_limit or _env_int("ADAOS_TOOL_QUEUE_LIMIT", 32)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="adaos-tool")
+        # RLock: done-callback может выполниться синхронно внутри submit()
+        self._lock = threading.RLock()
+        self._pending: Dict[str, Deque[_Job]] = {}
+        # навыки с ожидающими вызовами в порядке обслуживания (round-robin)
+        self._ring: Deque[str] = deque()
+        self._running: Dict[str, int] = {}
+        self._busy = 0
+        self._busy_s = 0.0
+        self._stats: Dict[str, _SkillStats] = {}
+        self._started = time.perf_counter()
+
+    async def run(self, skill: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Queue ``fn(*args, **kwargs)`` for ``skill`` and await its result.
+        Context variables (agent context, trace) are propagated to the worker.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+        job = _Job(skill, call, future, loop)
+        with self._lock:
+            queue = self._pending.get(skill)
+            if queue is not None and len(queue) >= self.queue_limit:
+                self._skill_stats(skill).rejected += 1
+                raise ToolQueueFull(f"too many queued calls for skill '{skill}' (limit {self.queue_limit})")
+            if queue is None:
+                queue = self._pending[skill] = deque()
+                self._ring.append(skill)
+            queue.append(job)
+            self._pump_locked()
+        try:
+            return await future
+        except asyncio.CancelledError:
+            # клиент ушёл: если вызов ещё в очереди — убираем его
+            with self._lock:
+                queue = self._pending.get(skill)
+                if queue is not None and job in queue:
+                    queue.remove(job)
+                    if not queue:
+                        self._drop_skill_locked(skill)
+            raise
+
+    def _skill_stats(self, skill: str) -> _SkillStats:
+        st = self._stats.get(skill)
+        if st is None:
+            st = self._stats[skill] = _SkillStats()
+        return st
+
+    def _drop_skill_locked(self, skill: str) -> None:
+        self._pending.pop(skill, None)
+        try:
+            self._ring.remove(skill)
+        except ValueError:
+            pass
+
+    def _pump_locked(self) -> None:
+        while self._busy < self.workers and self._ring:
+            for _ in range(len(self._ring)):
+                skill = self._ring[0]
+                self._ring.rotate(-1)
+                if self._running.get(skill, 0) < self.per_skill:
+                    break
+            else:
+                return  # все навыки с очередью упёрлись в свой лимит
+            queue = self._pending[skill]
+            job = queue.popleft()
+            if not queue:
+                self._drop_skill_locked(skill)
+            if job.future.done():
+                continue
+            started = time.perf_counter()
+            self._skill_stats(skill).wait_s += started - job.enqueued
+            self._running[skill] = self._running.get(skill, 0) + 1
+            self._busy += 1
+            done = self._pool.submit(job.fn)
+            done.add_done_callback(functools.partial(self._finish, job, started))
+
+    def _finish(self, job: _Job, started: float, done: Future) -> None:
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._running[job.skill] -= 1
+            self._busy -= 1
+            self._busy_s += elapsed
+            st = self._skill_stats(job.skill)
+            st.completed += 1
+            if done.exception() is not None:
+                st.errors += 1
+            st.run_s += elapsed
+            st.max_run_s = max(st.max_run_s, elapsed)
+            self._pump_locked()
+        try:
+            job.loop.call_soon_threadsafe(_resolve, job.future, done)
+        except RuntimeError:
+            pass  # цикл уже закрыт
+
+    def load(self) -> int:
+        """Calls running or waiting right now (reported to the hub)."""
+        with self._lock:
+            return self._busy + sum(len(q) for q in self._pending.values())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            uptime = max(time.perf_counter() - self._started, 1e-9)
+            skills = []
+            for skill in sorted(set(self._stats) | set(self._pending) | set(self._running)):
+                st = self._stats.get(skill) or _SkillStats()
+                started = st.completed + self._running.get(skill, 0)
+                skills.append(
+                    {
+                        "skill": skill,
+                        "running": self._running.get(skill, 0),
+                        "queued": len(self._pending.get(skill, ())),
+                        "completed": st.completed,
+                        "errors": st.errors,
+                        "rejected": st.rejected,
+                        "wait_ms_avg": round(st.wait_s / started * 1000.0, 3) if started else 0.0,
+                        "run_ms_avg": round(st.run_s / st.completed * 1000.0, 3) if st.completed else 0.0,
+                        "run_ms_max": round(st.max_run_s * 1000.0, 3),
+                    }
+                )
+            return {
+                "workers": self.workers,
+                "per_skill": self.per_skill,
+                "queue_limit": self.queue_limit,
+                "busy": self._busy,
+                "queued": sum(len(q) for q in self._pending.values()),
+                "utilisation": round(self._busy / self.workers, 3),
+                "utilisation_avg": round(self._busy_s / (uptime * self.workers), 4),
+                "skills": skills,
+            }
+
+
+_EXECUTOR: ToolExecutor | None = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def get_tool_executor() -> ToolExecutor:
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        with _EXECUTOR_LOCK:
+            if _EXECUTOR is None:
+                _EXECUTOR = ToolExecutor()
+    return _EXECUTOR
+
+
+__all__ = ["ToolExecutor", "ToolQueueFull", "get_tool_executor"]
@@ -7,6 +7,7 @@ from .store import (
     reset_ystore_for_webspace,
     ystores_root,
     ystore_path_for_webspace,
+    ystore_stats,
 )
 from .webspace import default_webspace_id, dev_webspace_id
 
@@ -19,6 +20,7 @@ __all__ = [
     "reset_ystore_for_webspace",
     "ystores_root",
     "ystore_path_for_webspace",
+    "ystore_stats",
     "default_webspace_id",
     "dev_webspace_id",
 ]
@@ -2,16 +2,30 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import os
 import threading
+from collections import OrderedDict
 from contextlib import contextmanager, asynccontextmanager
-from typing import Iterator, AsyncIterator, Awaitable, Optional, TypeVar, Callable, Any
+from typing import Iterator, AsyncIterator, Awaitable, List, Optional, TypeVar, Callable, Any
 
 import y_py as Y
 
-from adaos.services.yjs.store import get_ystore_for_webspace
+from adaos.services.yjs.store import AdaosMemoryYStore, get_ystore_for_webspace
 
 T = TypeVar("T")
 _log = logging.getLogger("adaos.yjs.doc")
+_EMPTY_UPDATE = b"\x00\x00"
+
+
+def _resident_enabled() -> bool:
+    return (os.getenv("ADAOS_YDOC_RESIDENT") or "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def _env_max_replicas() -> int:
+    try:
+        return max(int(os.getenv("ADAOS_YDOC_REPLICAS") or 8), 1)
+    except ValueError:
+        return 8
 
 
 def _run_blocking(coro: Awaitable[T]) -> T:
@@ -81,44 +95,149 @@ def _run_on_room_thread(room, fn: Callable[[], None]) -> bool:
     return False
 
 
-def _encode_diff(ydoc: Y.YDoc, before: bytes | None) -> bytes | None:
+def _transaction_update(event: Any) -> Optional[bytes]:
     try:
-        if before is not None:
-            return Y.encode_state_as_update(ydoc, before)
-        return Y.encode_state_as_update(ydoc)
+        update = event.get_update()
     except Exception:
         return None
+    return update if update and update != _EMPTY_UPDATE else None
+
+
+def _capture_updates(ydoc: Y.YDoc) -> List[bytes]:
+    """
+    Collect the updates of transactions committed on ``ydoc`` from now on.
+
+    These are exactly the changes to persist. A diff against the entry state
+    vector would carry the whole delete set every time, so a document whose
+    keys are overwritten over and over would still grow the log with each
+    write.
+    """
+    captured: List[bytes] = []
+
+    def _on_transaction(event: Any) -> None:
+        update = _transaction_update(event)
+        if update is not None:
+            captured.append(update)
+
+    ydoc.observe_after_transaction(_on_transaction)
+    return captured
+
+
+class _Replica:
+    """
+    Resident copy of a webspace document.
+
+    ``Y.YDoc`` is bound to the thread that created it, so replicas live in a
+    thread-local table and are only ever touched (and dropped) by their owner
+    thread. Local transactions are captured as they commit (see
+    :func:`_capture_updates`); updates applied while catching up are not.
+    """
+
+    __slots__ = ("ydoc", "store", "seq", "pending", "applying", "_sub")
+
+    def __init__(self, store: AdaosMemoryYStore) -> None:
+        self.ydoc = Y.YDoc()
+        self.store = store
+        self.seq = -1
+        self.pending: List[bytes] = []
+        self.applying = False
+        self._sub = self.ydoc.observe_after_transaction(self._on_transaction)
+
+    def _on_transaction(self, event: Any) -> None:
+        if self.applying:
+            return
+        update = _transaction_update(event)
+        if update is not None:
+            self.pending.append(update)
+
+    async def catch_up(self) -> None:
+        """Apply store writes made since the last visit (by rooms, other threads or replicas)."""
+        seq, updates = await self.store.updates_since(self.seq)
+        self.applying = True
+        try:
+            for update in updates:
+                try:
+                    Y.apply_update(self.ydoc, update)
+                except BaseException:
+                    # Битые updates считаем отсутствующими, как и при полном replay.
+                    pass
+        finally:
+            self.applying = False
+        self.seq = seq
+
+    def take_pending(self) -> List[bytes]:
+        pending, self.pending = self.pending, []
+        return pending
+
+
+class _ThreadReplicas(threading.local):
+    def __init__(self) -> None:
+        self.docs: "OrderedDict[str, _Replica]" = OrderedDict()
+
+
+_REPLICAS = _ThreadReplicas()
+
+
+def _replica_for(webspace_id: str, store: AdaosMemoryYStore) -> _Replica:
+    docs = _REPLICAS.docs
+    replica = docs.get(webspace_id)
+    if replica is None or replica.store is not store:
+        # после reset_ystore_for_webspace у webspace новый store — старая реплика не годится
+        replica = docs[webspace_id] = _Replica(store)
+    docs.move_to_end(webspace_id)
+    while len(docs) > _env_max_replicas():
+        docs.popitem(last=False)
+    return replica
+
+
+def _drop_replica(webspace_id: str, replica: _Replica) -> None:
+    if _REPLICAS.docs.get(webspace_id) is replica:
+        del _REPLICAS.docs[webspace_id]
+
+
+def _owned_live_room(webspace_id: str):
+    """
+    The in-process YRoom for ``webspace_id`` when it runs on this thread and
+    already persists/broadcasts its own updates, else ``None``.
+    """
+    room = _resolve_live_room(webspace_id)
+    if room is None or getattr(room, "_thread_id", None) != threading.get_ident():
+        return None
+    if not getattr(room, "ready", False) or getattr(room, "_task_group", None) is None:
+        return None
+    if getattr(room, "ystore", None) is not get_ystore_for_webspace(webspace_id):
+        return None
+    return room
 
 
 @contextmanager
 def get_ydoc(webspace_id: str) -> Iterator[Y.YDoc]:
     """
     Synchronously load a webspace-backed YDoc, applying persisted updates on
-    entry and writing the resulting state back on exit.
+    entry and writing the changes made inside the block back on exit.
     """
     _log.debug("get_ydoc enter webspace=%s", webspace_id)
     ystore = get_ystore_for_webspace(webspace_id)
     ydoc = Y.YDoc()
 
-    async def _load() -> bytes | None:
+    async def _load() -> None:
         await ystore.start()
         try:
             await ystore.apply_updates(ydoc)
         except BaseException:
             # Treat corrupted updates as "no state"; start from empty doc.
             pass
-        try:
-            return Y.encode_state_vector(ydoc)
-        except Exception:
-            return None
 
-    before = _run_blocking(_load())
+    _run_blocking(_load())
+    captured = _capture_updates(ydoc)
     try:
         yield ydoc
     finally:
-        async def _flush() -> bytes | None:
+        async def _flush() -> None:
             try:
-                await ystore.encode_state_as_update(ydoc)
+                for update in captured:
+                    await ystore.write(update)
+                await ystore.settle()
             except Exception:
                 pass
             finally:
@@ -126,20 +245,86 @@ def get_ydoc(webspace_id: str) -> Iterator[Y.YDoc]:
                     await ystore.stop()
                 except Exception:
                     pass
-            return _encode_diff(ydoc, before)
 
         try:
-            update = _run_blocking(_flush())
+            _run_blocking(_flush())
         except Exception as exc:
             _log.warning("get_ydoc flush failed for webspace=%s: %s", webspace_id, exc, exc_info=True)
-            update = None
-        _schedule_room_update(webspace_id, update)
+        for update in captured:
+            _schedule_room_update(webspace_id, update)
 
 
 @asynccontextmanager
 async def async_get_ydoc(webspace_id: str) -> AsyncIterator[Y.YDoc]:
     """
     Async counterpart of :func:`get_ydoc` for use inside running event loops.
+
+    The document is resident: the block gets a per-thread replica and, on
+    exit, only the transactions made inside it are applied. When the
+    webspace's YRoom runs on this loop the replica is synced from the room's
+    YDoc and the changes go to the room (which persists and broadcasts them
+    itself); otherwise the replica is caught up with the store and the changes
+    are written to the store and forwarded to the room. If the block raises,
+    the replica is discarded and nothing is persisted or broadcast.
+    ``ADAOS_YDOC_RESIDENT=0`` restores the load-and-replay behaviour.
+    """
+    if not _resident_enabled():
+        async with _replayed_ydoc(webspace_id) as ydoc:
+            yield ydoc
+        return
+
+    room = _owned_live_room(webspace_id)
+    if room is not None:
+        # Транзакции в room.ydoc сразу уходят в store и клиентам, откатить их
+        # нельзя, поэтому блок работает с репликой, а в комнату попадает
+        # только успешный результат.
+        replica = _replica_for(webspace_id, room.ystore)
+        replica.applying = True
+        try:
+            Y.apply_update(replica.ydoc, Y.encode_state_as_update(room.ydoc, Y.encode_state_vector(replica.ydoc)))
+        finally:
+            replica.applying = False
+        replica.take_pending()
+        try:
+            yield replica.ydoc
+        except BaseException:
+            _drop_replica(webspace_id, replica)
+            raise
+        for update in replica.take_pending():
+            Y.apply_update(room.ydoc, update)
+        return
+
+    ystore = get_ystore_for_webspace(webspace_id)
+    await ystore.start()
+    replica = _replica_for(webspace_id, ystore)
+    await replica.catch_up()
+    replica.take_pending()
+    try:
+        yield replica.ydoc
+    except BaseException:
+        _drop_replica(webspace_id, replica)
+        raise
+    updates = replica.take_pending()
+    for update in updates:
+        try:
+            await ystore.write(update)
+        except Exception as exc:
+            _log.warning("async_get_ydoc write failed for webspace=%s: %s", webspace_id, exc, exc_info=True)
+            _drop_replica(webspace_id, replica)
+            break
+    else:
+        if updates and replica.seq + len(updates) == ystore.seq:
+            # в лог попали только наши записи — перечитывать их не нужно
+            replica.seq = ystore.seq
+    for update in updates:
+        _schedule_room_update(webspace_id, update)
+
+
+@asynccontextmanager
+async def _replayed_ydoc(webspace_id: str) -> AsyncIterator[Y.YDoc]:
+    """
+    Non-resident variant: replay the whole store into a fresh YDoc and write
+    the changes made inside the block back on exit.
     """
     # Debug log omitted to reduce noise in dev logs.
     ystore = get_ystore_for_webspace(webspace_id)
@@ -151,17 +336,16 @@ async def async_get_ydoc(webspace_id: str) -> AsyncIterator[Y.YDoc]:
         except BaseException:
             # Treat corrupted updates as "no state"; start from empty doc.
             pass
-        try:
-            before = Y.encode_state_vector(ydoc)
-        except Exception:
-            before = None
+        captured = _capture_updates(ydoc)
         yield ydoc
-        try:
-            await ystore.encode_state_as_update(ydoc)
-        except Exception as exc:
-            _log.warning("async_get_ydoc encode_state_as_update failed for webspace=%s: %s", webspace_id, exc, exc_info=True)
-        update = _encode_diff(ydoc, before)
-        _schedule_room_update(webspace_id, update)
+        for update in captured:
+            try:
+                await ystore.write(update)
+            except Exception as exc:
+                _log.warning("async_get_ydoc write failed for webspace=%s: %s", webspace_id, exc, exc_info=True)
+                break
+        for update in captured:
+            _schedule_room_update(webspace_id, update)
     finally:
         try:
             await ystore.stop()
@@ -71,6 +71,7 @@ class WorkspaceWebsocketServer(WebsocketServer):
                     interval=6000.0,
                     topic="sys.ystore.backup",
                     payload={"webspace_id": webspace_id},
+                    jitter=60.0,
                 )
             except Exception:
                 _ylog.warning("failed to register YStore backup job for webspace=%s", webspace_id, exc_info=True)
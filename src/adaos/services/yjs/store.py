@@ -1,9 +1,14 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import logging
+import os
+import struct
 import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import AsyncIterator, Dict, List, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 import anyio
 import y_py as Y
@@ -16,6 +21,56 @@ from adaos.sdk.core.decorators import subscribe
 
 _log = logging.getLogger("adaos.yjs.ystore")
 
+# Режим хранения: "memory" — лог в памяти + редкие снапшоты (как раньше),
+# "journal" — каждый update дописывается в журнал на диске, журнал
+# периодически сворачивается в снапшот в фоне.
+_MODES = ("memory", "journal")
+_JOURNAL_COMPACT_BYTES = 4 * 1024 * 1024
+# Пороги сворачивания лога в памяти: по числу updates и по суммарному размеру.
+_MAX_UPDATES = 256
+_MAX_BYTES = 4 * 1024 * 1024
+_RECORD_HEADER = struct.Struct(">I")
+# Пустой update (транзакция без изменений) и сколько последних записей
+# помнить для отбрасывания повторов.
+_EMPTY_UPDATE = b"\x00\x00"
+_DEDUP_WINDOW = 64
+
+
+def _env_mode() -> str:
+    mode = (os.getenv("ADAOS_YSTORE_MODE") or "memory").strip().lower()
+    return mode if mode in _MODES else "memory"
+
+
+def _env_int(name: str, default: int, minimum: int) -> int:
+    try:
+        return max(int(os.getenv(name) or default), minimum)
+    except ValueError:
+        return default
+
+
+def _env_fsync() -> bool:
+    return (os.getenv("ADAOS_YSTORE_FSYNC") or "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _merge_updates(updates: List[Tuple[bytes, bytes, float]]) -> bytes:
+    ydoc = Y.YDoc()
+    for update, _meta, _ts in updates:
+        Y.apply_update(ydoc, update)  # type: ignore[arg-type]
+    return Y.encode_state_as_update(ydoc)  # type: ignore[arg-type]
+
+
+def _write_snapshot(path: Path, snapshot: bytes) -> bool:
+    tmp = Path(str(path) + ".tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_bytes(snapshot)
+        tmp.replace(path)
+        _log.debug("YStore snapshot written for webspace=%s path=%s", path.name.removesuffix(".sqlite3"), path)
+        return True
+    except Exception as exc:
+        _log.warning("failed to write YStore snapshot %s: %s", path, exc, exc_info=True)
+        return False
+
 
 def _persist_snapshot(path: Path, updates: List[Tuple[bytes, bytes, float]]) -> None:
     """
@@ -30,19 +85,82 @@ def _persist_snapshot(path: Path, updates: List[Tuple[bytes, bytes, float]]) ->
             _log.warning("failed to remove stale YStore snapshot %s: %s", path, exc, exc_info=True)
         return
 
-    ydoc = Y.YDoc()
-    for update, _meta, _ts in updates:
-        Y.apply_update(ydoc, update)  # type: ignore[arg-type]
-    snapshot = Y.encode_state_as_update(ydoc)  # type: ignore[arg-type]
+    _write_snapshot(path, _merge_updates(updates))
 
-    tmp = Path(str(path) + ".tmp")
+
+def _fold_updates(path: Optional[Path], updates: List[Tuple[bytes, bytes, float]]) -> bytes:
+    """
+    Merge the in-memory log into one update (worker thread); optionally
+    persist it as the snapshot too.
+    """
+    snapshot = _merge_updates(updates)
+    if path is not None:
+        _write_snapshot(path, snapshot)
+    return snapshot
+
+
+def _compact_journal(path: Path, rotated: Path, updates: List[Tuple[bytes, bytes, float]]) -> Optional[bytes]:
+    """
+    Fold the current state into a snapshot and drop the rotated journal.
+
+    Runs in a worker thread. The rotated journal is removed only after the
+    snapshot has been replaced atomically, so a crash at any point leaves
+    either the old snapshot + journal or the new snapshot on disk.
+    """
+    snapshot = _merge_updates(updates)
+    if not _write_snapshot(path, snapshot):
+        return None
     try:
-        path.parent.mkdir(parents=True, exist_ok=True)
-        tmp.write_bytes(snapshot)
-        tmp.replace(path)
-        _log.debug("YStore snapshot written for webspace=%s path=%s", path.name.removesuffix(".sqlite3"), path)
+        rotated.unlink()
+    except FileNotFoundError:
+        pass
     except Exception as exc:
-        _log.warning("failed to write YStore snapshot %s: %s", path, exc, exc_info=True)
+        _log.warning("failed to remove compacted YStore journal %s: %s", rotated, exc, exc_info=True)
+    return snapshot
+
+
+def _read_journal(path: Path) -> Tuple[List[bytes], int]:
+    """
+    Parse length-prefixed update records. A truncated tail (crash mid-append)
+    is ignored; returns the records and the offset where the valid part ends.
+    """
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        return [], 0
+    out: List[bytes] = []
+    pos = 0
+    size = len(data)
+    while pos + _RECORD_HEADER.size <= size:
+        (length,) = _RECORD_HEADER.unpack_from(data, pos)
+        start = pos + _RECORD_HEADER.size
+        if start + length > size:
+            _log.warning("truncated YStore journal record in %s at offset %d", path, pos)
+            break
+        out.append(data[start : start + length])
+        pos = start + length
+    return out, pos
+
+
+def _load_persisted(path: Path, journal: Path, rotated: Path) -> List[bytes]:
+    updates: List[bytes] = []
+    try:
+        if path.exists():
+            updates.append(path.read_bytes())
+    except Exception as exc:  # pragma: no cover - IO errors are logged only
+        _log.warning("failed to read YStore snapshot %s: %s", path, exc, exc_info=True)
+    # Оставшийся после сбоя .compacting идёт до актуального журнала.
+    for jp in (rotated, journal):
+        try:
+            records, valid = _read_journal(jp)
+            updates.extend(records)
+            # Оборванный хвост отрезаем до первой дозаписи: иначе новые
+            # записи легли бы после мусора и не читались при следующем старте.
+            if jp.exists() and jp.stat().st_size > valid:
+                os.truncate(jp, valid)
+        except Exception as exc:  # pragma: no cover
+            _log.warning("failed to read YStore journal %s: %s", jp, exc, exc_info=True)
+    return updates
 
 
 def ystores_root() -> Path:
@@ -68,6 +186,14 @@ def ystore_path_for_webspace(webspace_id: str) -> Path:
     return ystores_root() / f"{safe}.sqlite3"
 
 
+def ystore_journal_path_for_webspace(webspace_id: str) -> Path:
+    """
+    Append-only update journal used by the ``journal`` store mode.
+    """
+    snapshot = ystore_path_for_webspace(webspace_id)
+    return snapshot.with_name(snapshot.name.removesuffix(".sqlite3") + ".journal")
+
+
 class AdaosMemoryYStore(BaseYStore):
     """
     In-memory YStore with optional periodic snapshots to disk.
@@ -77,9 +203,22 @@ class AdaosMemoryYStore(BaseYStore):
       snapshot from disk (if present).
     - `backup_to_disk()` compresses the current log into a single
       `Y.encode_state_as_update(ydoc)` blob and writes it atomically.
+
+    In ``journal`` mode (``ADAOS_YSTORE_MODE=journal``) every update is also
+    appended to `<webspace>.journal` (in a worker thread, concurrent writes
+    share one append), so durability lags by a single write instead of the
+    backup interval. A torn tail left by a crash is truncated on load. Once the journal grows past
+    ``ADAOS_YSTORE_COMPACT_BYTES`` (or on `sys.ystore.backup`) it is folded into
+    the snapshot in a worker thread and the in-memory log is replaced by the
+    merged state.
+
+    In both modes the in-memory log is also folded (off-loop) once it holds
+    more than ``ADAOS_YSTORE_MAX_UPDATES`` updates or ``ADAOS_YSTORE_MAX_BYTES``
+    bytes, or after ``document_ttl`` seconds of inactivity, so `read()` for a
+    joining client replays a handful of updates regardless of uptime.
     """
 
-    def __init__(self, path: str, *, document_ttl: float | None = None):
+    def __init__(self, path: str, *, document_ttl: float | None = None, mode: str | None = None):
         # BaseYStore expects these attributes; its __init__ is abstract/no-op.
         self.path = path
         self.metadata_callback = None
@@ -91,6 +230,35 @@ class AdaosMemoryYStore(BaseYStore):
         self._starting: bool = False
         self._task_group = None
         self._running: bool = False
+        self.mode = mode if mode in _MODES else _env_mode()
+        self._compact_bytes = _env_int("ADAOS_YSTORE_COMPACT_BYTES", _JOURNAL_COMPACT_BYTES, 1024)
+        self._max_updates = _env_int("ADAOS_YSTORE_MAX_UPDATES", _MAX_UPDATES, 2)
+        self._max_bytes = _env_int("ADAOS_YSTORE_MAX_BYTES", _MAX_BYTES, 1024)
+        self._mem_bytes = 0
+        # Байты, дописанные после последней компактизации (порог MAX_BYTES
+        # считается по ним, а не по размеру самого состояния).
+        self._pending_bytes = 0
+        self._compactions = 0
+        self._last_compaction_ms = 0.0
+        self._last_compaction_at: float | None = None
+        self._fsync = _env_fsync()
+        self._journal = None
+        self._journal_bytes = 0
+        # Записи, ожидающие дозаписи в журнал (в порядке _updates), и лок,
+        # под которым журнал пишется/ротируется в рабочем потоке.
+        self._journal_pending: List[bytes] = []
+        self._journal_io: Lock = Lock()
+        # Растёт при любой неаддитивной замене _updates (компактизация, reset),
+        # чтобы компактизация не подменила чужой префикс.
+        self._epoch = 0
+        # Счётчик записей (write) и сколько последних элементов _updates — это
+        # ещё не свёрнутые записи: по ним резидентные реплики догоняют лог.
+        self._seq = 0
+        self._raw_tail = 0
+        self._recent: "OrderedDict[bytes, None]" = OrderedDict()
+        self._deduplicated = 0
+        self._compaction: asyncio.Task | None = None
+        self._closed = False
 
     async def start(self, *, task_status: TaskStatus[None] = TASK_STATUS_IGNORED):
         """
@@ -108,28 +276,251 @@ class AdaosMemoryYStore(BaseYStore):
 
     async def write(self, data: bytes) -> None:  # type: ignore[override]
         """
-        Append an update to the in-memory log, with optional TTL-based squashing.
+        Append an update to the in-memory log; schedule compaction when the log
+        grows past the configured limits (or after a ``document_ttl`` idle gap).
+
+        Empty updates and byte-identical repeats of a recent write (a room
+        echoing an update that was already persisted) are dropped: applying
+        them again would not change the document.
         """
+        if not data or data == _EMPTY_UPDATE:
+            self._deduplicated += 1
+            return
+        if self.mode == "journal":
+            await self._load_from_disk_if_needed()
         metadata = await self.get_metadata()
+        digest = hashlib.blake2b(data, digest_size=16).digest()
         now = time.time()
         async with self._lock:
-            if self.document_ttl is not None and self._updates:
-                last_ts = self._updates[-1][2]
-                if now - last_ts > self.document_ttl:
-                    # Squash history into a single snapshot.
-                    ydoc = Y.YDoc()
-                    for update, _meta, _ts in self._updates:
-                        Y.apply_update(ydoc, update)  # type: ignore[arg-type]
-                    self._updates.clear()
-                    squashed = Y.encode_state_as_update(ydoc)  # type: ignore[arg-type]
-                    self._updates.append((squashed, metadata, now))
-                    return
-
+            if digest in self._recent:
+                self._recent.move_to_end(digest)
+                self._deduplicated += 1
+                return
+            self._recent[digest] = None
+            if len(self._recent) > _DEDUP_WINDOW:
+                self._recent.popitem(last=False)
+            idle = (
+                self.document_ttl is not None
+                and bool(self._updates)
+                and now - self._updates[-1][2] > self.document_ttl
+            )
             self._updates.append((data, metadata, now))
+            self._seq += 1
+            self._raw_tail += 1
+            self._mem_bytes += len(data)
+            self._pending_bytes += len(data)
+            if self.mode == "journal" and not self._closed:
+                self._journal_pending.append(data)
+            if idle or self._over_limits():
+                self._schedule_compaction()
+        if self.mode == "journal":
+            await self._flush_journal()
+
+    @property
+    def seq(self) -> int:
+        """Number of updates written to this store (see :meth:`updates_since`)."""
+        return self._seq
+
+    def _over_limits(self) -> bool:
+        return (
+            len(self._updates) > self._max_updates
+            or self._pending_bytes > self._max_bytes
+            or (self.mode == "journal" and self._journal_bytes >= self._compact_bytes)
+        )
+
+    async def _flush_journal(self) -> None:
+        """
+        Append the pending records in a worker thread. Concurrent writers
+        share one write (and one fsync): whoever takes ``_journal_io`` first
+        flushes everything queued so far, the rest find the queue empty.
+        """
+        async with self._journal_io:
+            records, self._journal_pending = self._journal_pending, []
+            if not records or self._closed:
+                return
+            journal = ystore_journal_path_for_webspace(self.path)
+            try:
+                await anyio.to_thread.run_sync(self._append_journal, journal, records)
+            except Exception as exc:
+                _log.warning("failed to append YStore journal for webspace=%s: %s", self.path, exc, exc_info=True)
+
+    def _append_journal(self, journal: Path, records: List[bytes]) -> None:
+        """
+        Append length-prefixed records; runs in a worker thread under
+        ``self._journal_io``. A failed write is cut back, so the journal never
+        keeps a torn record in the middle.
+        """
+        if self._closed:
+            return
+        if self._journal is None:
+            self._journal = open(journal, "ab")
+        fh = self._journal
+        start = fh.tell()
+        try:
+            fh.write(b"".join(_RECORD_HEADER.pack(len(data)) + data for data in records))
+            fh.flush()
+            if self._fsync:
+                os.fsync(fh.fileno())
+        except Exception:
+            try:
+                fh.truncate(start)
+            except Exception:
+                self._close_journal()
+            raise
+        self._journal_bytes = fh.tell()
+
+    def _close_journal(self) -> None:
+        journal, self._journal = self._journal, None
+        if journal is not None:
+            try:
+                journal.close()
+            except Exception:
+                pass
+
+    def _rotate_journal(self, journal: Path, pending: List[bytes]) -> Path:
+        """
+        Flush ``pending`` and move the live journal aside for compaction;
+        runs in a worker thread under ``self._journal_io``.
+        """
+        if pending:
+            try:
+                self._append_journal(journal, pending)
+            except Exception as exc:
+                _log.warning("failed to append YStore journal for webspace=%s: %s", self.path, exc, exc_info=True)
+        self._close_journal()
+        rotated = journal.with_name(journal.name + ".compacting")
+        if journal.exists():
+            if rotated.exists():
+                # Предыдущая компактизация не дошла до конца — дописываем.
+                with open(rotated, "ab") as dst:
+                    dst.write(journal.read_bytes())
+                journal.unlink()
+            else:
+                journal.replace(rotated)
+        self._journal_bytes = 0
+        return rotated
+
+    def _schedule_compaction(self) -> None:
+        if self._compaction is not None and not self._compaction.done():
+            return
+        try:
+            self._compaction = asyncio.get_running_loop().create_task(self._compaction_loop())
+        except RuntimeError:
+            self._compaction = None
+
+    async def _compaction_loop(self) -> None:
+        # Пока шла компактизация, могли накопиться новые updates — повторяем.
+        try:
+            while await self.compact() and self._over_limits():
+                pass
+        except Exception as exc:
+            _log.warning("YStore compaction failed for webspace=%s: %s", self.path, exc, exc_info=True)
+
+    async def settle(self) -> None:
+        """
+        Wait for a compaction started on the current loop. For callers whose
+        loop ends right after writing (``get_ydoc`` runs each flush in
+        ``asyncio.run``), where the task would otherwise be cancelled and the
+        log would never be folded.
+        """
+        task = self._compaction
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            return
+        try:
+            await asyncio.shield(task)
+        except Exception:
+            pass
+
+    async def compact(self, *, persist: bool = False) -> bool:
+        """
+        Merge the in-memory log into a single update in a worker thread and
+        replace the compacted prefix with it. In ``journal`` mode (or with
+        ``persist=True``) the merged state also becomes the on-disk snapshot.
+        Returns True when the in-memory log was replaced.
+        """
+        journal = self.mode == "journal"
+        await self._load_from_disk_if_needed()
+        metadata = await self.get_metadata()
+        rotated: Optional[Path] = None
+        if journal:
+            async with self._journal_io:
+                async with self._lock:
+                    if self._closed or not self._updates:
+                        return False
+                    updates = list(self._updates)
+                    epoch = self._epoch
+                    pending, self._journal_pending = self._journal_pending, []
+                journal_path = ystore_journal_path_for_webspace(self.path)
+                rotated = await anyio.to_thread.run_sync(self._rotate_journal, journal_path, pending)
+        else:
+            async with self._lock:
+                if self._closed or len(self._updates) < (1 if persist else 2):
+                    return False
+                updates = list(self._updates)
+                epoch = self._epoch
+
+        path = ystore_path_for_webspace(self.path)
+        started = time.perf_counter()
+        if rotated is not None:
+            snapshot = await anyio.to_thread.run_sync(_compact_journal, path, rotated, updates)
+        else:
+            snapshot = await anyio.to_thread.run_sync(_fold_updates, path if persist else None, updates)
+        if snapshot is None:
+            return False
+        replaced = False
+        async with self._lock:
+            self._compactions += 1
+            self._last_compaction_ms = (time.perf_counter() - started) * 1000.0
+            self._last_compaction_at = time.time()
+            if self._epoch == epoch and len(self._updates) >= len(updates):
+                self._updates[: len(updates)] = [(snapshot, metadata, updates[-1][2])]
+                self._epoch += 1
+                self._raw_tail = len(self._updates) - 1
+                self._mem_bytes = sum(len(u) for u, _m, _t in self._updates)
+                self._pending_bytes = self._mem_bytes - len(snapshot)
+                replaced = True
+        _log.debug(
+            "YStore compacted webspace=%s updates=%d -> %d bytes in %.1fms",
+            self.path,
+            len(updates),
+            len(snapshot),
+            self._last_compaction_ms,
+        )
+        return replaced
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Size of the in-memory log and compaction counters for this webspace.
+        """
+        return {
+            "webspace_id": self.path,
+            "mode": self.mode,
+            "updates": len(self._updates),
+            "bytes": self._mem_bytes,
+            "journal_bytes": self._journal_bytes,
+            "compactions": self._compactions,
+            "deduplicated": self._deduplicated,
+            "last_compaction_ms": round(self._last_compaction_ms, 3),
+            "last_compaction_at": self._last_compaction_at,
+        }
+
+    def close(self) -> None:
+        """
+        Release the journal handle; the store ignores further writes to disk.
+        """
+        self._closed = True
+        self._journal_pending = []
+        self._close_journal()
+        task, self._compaction = self._compaction, None
+        if task is not None and not task.done():
+            task.cancel()
 
     async def _load_from_disk_if_needed(self) -> None:
         if self._loaded_from_disk:
             return
+        if self.mode == "journal":
+            await self._load_journal_mode()
+            return
         path = ystore_path_for_webspace(self.path)
         if not path.exists():
             self._loaded_from_disk = True
@@ -147,8 +538,24 @@ class AdaosMemoryYStore(BaseYStore):
         async with self._lock:
             if not self._updates:
                 self._updates.append((data, metadata, now))
+                self._mem_bytes = len(data)
         self._loaded_from_disk = True
 
+    async def _load_journal_mode(self) -> None:
+        path = ystore_path_for_webspace(self.path)
+        journal = ystore_journal_path_for_webspace(self.path)
+        rotated = journal.with_name(journal.name + ".compacting")
+        persisted = await anyio.to_thread.run_sync(_load_persisted, path, journal, rotated)
+        metadata = await self.get_metadata()
+        now = time.time()
+        async with self._lock:
+            if self._loaded_from_disk:
+                return
+            if not self._updates:
+                self._updates.extend((update, metadata, now) for update in persisted)
+                self._mem_bytes = self._pending_bytes = sum(len(u) for u in persisted)
+            self._loaded_from_disk = True
+
     async def read(self) -> AsyncIterator[tuple[bytes, bytes]]:  # type: ignore[override]
         """
         Async iterator over stored updates (update, metadata).
@@ -162,15 +569,34 @@ class AdaosMemoryYStore(BaseYStore):
         for update, metadata, _ts in snapshot:
             yield update, metadata
 
+    async def updates_since(self, seq: int) -> Tuple[int, List[bytes]]:
+        """
+        Updates a reader that has seen the log up to write ``seq`` is missing,
+        plus the current write counter. When those writes were already folded
+        (or ``seq`` is unknown, e.g. ``-1``) the whole log is returned;
+        re-applying updates is idempotent.
+        """
+        await self._load_from_disk_if_needed()
+        async with self._lock:
+            missing = self._seq - seq
+            if 0 <= missing <= self._raw_tail and seq >= 0:
+                tail = self._updates[len(self._updates) - missing :] if missing else []
+            else:
+                tail = self._updates
+            return self._seq, [update for update, _meta, _ts in tail]
+
     async def backup_to_disk(self) -> None:
         """
         Persist the current YDoc state as a single update snapshot.
         """
+        await self._load_from_disk_if_needed()
         async with self._lock:
-            updates = list(self._updates)
-
+            empty = not self._updates
+        if not empty:
+            await self.compact(persist=True)
+            return
         path = ystore_path_for_webspace(self.path)
-        await anyio.to_thread.run_sync(_persist_snapshot, path, updates)
+        await anyio.to_thread.run_sync(_persist_snapshot, path, [])
 
 
 _YSTORE_CACHE: Dict[str, AdaosMemoryYStore] = {}
@@ -190,6 +616,15 @@ def get_ystore_for_webspace(webspace_id: str) -> AdaosMemoryYStore:
     return store
 
 
+def ystore_stats() -> List[Dict[str, Any]]:
+    """
+    Per-webspace memory/update-count metrics for all live stores, largest first.
+    """
+    rows = [store.stats() for store in list(_YSTORE_CACHE.values())]
+    rows.sort(key=lambda r: r["bytes"], reverse=True)
+    return rows
+
+
 def reset_ystore_for_webspace(webspace_id: str) -> None:
     """
     Drop any in-memory Y updates for the given webspace so that future access
@@ -199,13 +634,20 @@ def reset_ystore_for_webspace(webspace_id: str) -> None:
     store = _YSTORE_CACHE.pop(webspace_id, None)
     if store is not None:
         try:
+            store.close()
             store._updates.clear()  # type: ignore[attr-defined]
+            store._mem_bytes = store._pending_bytes = 0  # type: ignore[attr-defined]
+            store._raw_tail = 0  # type: ignore[attr-defined]
+            store._recent.clear()  # type: ignore[attr-defined]
+            store._epoch += 1  # type: ignore[attr-defined]
         except Exception:
             pass
     try:
         path = ystore_path_for_webspace(webspace_id)
-        if path.exists():
-            path.unlink()
+        journal = ystore_journal_path_for_webspace(webspace_id)
+        for p in (path, journal, journal.with_name(journal.name + ".compacting")):
+            if p.exists():
+                p.unlink()
     except Exception:
         _log.warning("failed to remove YStore snapshot for webspace=%s", webspace_id, exc_info=True)
 
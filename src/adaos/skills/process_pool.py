@@ -0,0 +1,364 @@
+"""Process-isolated execution of skill tools.
+
+Each (skill, version, slot) gets its own long-lived worker processes. A worker
+imports the skill once and then serves tool calls over a
+:func:`multiprocessing.Pipe` (length-prefixed frames with a JSON body), so:
+
+- skills do not touch ``sys.path``/``sys.modules`` of the hub process;
+- CPU-heavy tools run in parallel across cores;
+- a timeout really stops the tool: the worker is killed and replaced.
+
+Idle workers are kept warm up to ``warm`` per skill slot
+(``ADAOS_TOOL_WORKER_WARM``, default 1).
+
+Tool errors keep their type for a few builtin exceptions (``_ERRORS``);
+everything else, as well as a worker that crashed or failed to start, is
+raised as :class:`ToolWorkerError`.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import multiprocessing as mp
+import os
+import threading
+import traceback
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+_log = logging.getLogger("adaos.skills.process_pool")
+
+_START_TIMEOUT_S = 60.0
+_ERRORS: Dict[str, type] = {
+    cls.__name__: cls for cls in (ValueError, KeyError, TypeError, FileNotFoundError, PermissionError, TimeoutError)
+}
+
+
+class ToolWorkerError(Exception):
+    """
+    Tool failure inside a worker process, or the worker itself crashed or did
+    not start (``unavailable``). Deliberately not a ``RuntimeError``: the tool
+    API reads ``RuntimeError`` as "skill not present locally" and would proxy
+    the call to another node, running the tool a second time.
+    """
+
+    def __init__(self, message: str, *, remote_type: str = "", unavailable: bool = False) -> None:
+        super().__init__(message)
+        self.remote_type = remote_type
+        self.unavailable = unavailable
+
+
+def _env_warm() -> int:
+    try:
+        return max(int(os.getenv("ADAOS_TOOL_WORKER_WARM") or 1), 0)
+    except ValueError:
+        return 1
+
+
+@dataclass(frozen=True, slots=True)
+class WorkerSpec:
+    """What a worker process is bound to; equal specs share workers."""
+
+    skill: str
+    version: str
+    slot: str
+    skill_dir: str
+    extra_paths: Tuple[str, ...] = ()
+    skill_env: str = ""
+    secrets_path: str = ""
+    base_dir: str = ""
+
+
+def _encode(obj: Mapping[str, Any]) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def _worker_main(conn, spec: WorkerSpec) -> None:  # pragma: no cover - runs in a child process
+    """Entry point of a worker process: bootstrap once, then serve calls."""
+    if spec.base_dir:
+        os.environ["ADAOS_BASE_DIR"] = spec.base_dir
+    if spec.skill_env:
+        os.environ["ADAOS_SKILL_ENV_PATH"] = spec.skill_env
+    try:
+        from adaos.apps.bootstrap import init_ctx
+
+        ctx = init_ctx()
+        ctx.skill_ctx.set(spec.skill, Path(spec.skill_dir))
+        if spec.secrets_path:
+            from adaos.services.crypto.secrets_service import SecretsService
+            from adaos.services.skill.secrets_backend import SkillSecretsBackend
+
+            ctx.secrets = SecretsService(SkillSecretsBackend(Path(spec.secrets_path)), ctx.caps)
+    except Exception:
+        # Инструменты без SDK-зависимостей работают и без контекста.
+        _log.warning("tool worker for %s: context bootstrap failed", spec.skill, exc_info=True)
+
+    from adaos.skills.runtime_runner import execute_tool
+
+    conn.send_bytes(_encode({"ready": True, "pid": os.getpid()}))
+    extra = [Path(p) for p in spec.extra_paths]
+    while True:
+        try:
+            request = json.loads(conn.recv_bytes())
+        except (EOFError, OSError):
+            return
+        try:
+            result = execute_tool(
+                Path(spec.skill_dir),
+                module=request.get("module"),
+                attr=request["attr"],
+                payload=request.get("payload") or {},
+                extra_paths=extra,
+            )
+            reply = {"ok": True, "result": result}
+        except BaseException as exc:  # noqa: BLE001 - returned to the caller
+            reply = {
+                "ok": False,
+                "error": {"type": type(exc).__name__, "message": str(exc), "traceback": traceback.format_exc()},
+            }
+        try:
+            conn.send_bytes(_encode(reply))
+        except (EOFError, OSError):
+            return
+
+
+class _Worker:
+    def __init__(self, spec: WorkerSpec) -> None:
+        ctx = mp.get_context("spawn")
+        self.spec = spec
+        self.conn, child = ctx.Pipe(duplex=True)
+        self.proc = ctx.Process(
+            target=_worker_main,
+            args=(child, spec),
+            name=f"adaos-tool-{spec.skill}",
+            daemon=True,
+        )
+        self.proc.start()
+        child.close()
+        self.ready = False
+        self.calls = 0
+
+    def wait_ready(self, timeout: float = _START_TIMEOUT_S) -> None:
+        if self.ready:
+            return
+        if not self.conn.poll(timeout):
+            self.kill()
+            raise ToolWorkerError(f"tool worker for skill '{self.spec.skill}' did not start in {timeout:.0f}s", unavailable=True)
+        try:
+            json.loads(self.conn.recv_bytes())
+        except (EOFError, OSError) as exc:
+            self.kill()
+            raise ToolWorkerError(f"tool worker for skill '{self.spec.skill}' exited during start", unavailable=True) from exc
+        self.ready = True
+
+    def alive(self) -> bool:
+        return self.proc.is_alive()
+
+    def call(self, request: Mapping[str, Any], timeout: Optional[float]) -> Dict[str, Any]:
+        self.wait_ready()
+        self.conn.send_bytes(_encode(request))
+        if not self.conn.poll(timeout):
+            raise TimeoutError
+        self.calls += 1
+        return json.loads(self.conn.recv_bytes())
+
+    def kill(self) -> None:
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+        if self.proc.is_alive():
+            self.proc.kill()
+        self.proc.join(timeout=5)
+
+
+@dataclass
+class _SlotState:
+    idle: List[_Worker] = field(default_factory=list)
+    busy: int = 0
+    spawned: int = 0
+    calls: int = 0
+    timeouts: int = 0
+    crashes: int = 0
+
+
+class SkillProcessPool:
+    def __init__(self, *, warm: Optional[int] = None) -> None:
+        self.warm = _env_warm() if warm is None else warm
+        self._lock = threading.Lock()
+        self._slots: Dict[WorkerSpec, _SlotState] = {}
+
+    def _spawn(self, spec: WorkerSpec) -> _Worker:
+        worker = _Worker(spec)
+        with self._lock:
+            self._slot(spec).spawned += 1
+        return worker
+
+    def _slot(self, spec: WorkerSpec) -> _SlotState:
+        state = self._slots.get(spec)
+        if state is None:
+            state = self._slots[spec] = _SlotState()
+        return state
+
+    def _count(self, spec: WorkerSpec, counter: str) -> None:
+        with self._lock:
+            state = self._slots.get(spec)
+            if state is not None:
+                setattr(state, counter, getattr(state, counter) + 1)
+
+    def _acquire(self, spec: WorkerSpec) -> _Worker:
+        stale: List[_Worker] = []
+        with self._lock:
+            # новая версия/слот навыка — старые воркеры больше не нужны
+            for other in [s for s in self._slots if s.skill == spec.skill and s != spec]:
+                stale.extend(self._slots[other].idle)
+                self._slots[other].idle.clear()
+                if not self._slots[other].busy:
+                    del self._slots[other]
+            state = self._slot(spec)
+            worker = None
+            while state.idle:
+                candidate = state.idle.pop()
+                if candidate.alive():
+                    worker = candidate
+                    break
+                state.crashes += 1
+            state.busy += 1
+            first = state.spawned == 0
+        for w in stale:
+            w.kill()
+        if worker is None:
+            try:
+                worker = self._spawn(spec)
+            except BaseException:
+                with self._lock:
+                    state.busy -= 1
+                raise
+            if first and self.warm > 1:
+                threading.Thread(target=self.prewarm, args=(spec, self.warm - 1), daemon=True).start()
+        return worker
+
+    def _release(self, worker: _Worker, *, keep: bool) -> None:
+        with self._lock:
+            state = self._slots.get(worker.spec)
+            if state is not None:
+                state.busy -= 1
+                if keep and len(state.idle) < max(self.warm, 1):
+                    state.idle.append(worker)
+                    return
+        worker.kill()
+
+    def prewarm(self, spec: WorkerSpec, count: Optional[int] = None) -> None:
+        """Start workers for ``spec`` in advance, up to ``count`` idle ones."""
+        target = self.warm if count is None else count
+        while True:
+            with self._lock:
+                if len(self._slot(spec).idle) >= target:
+                    return
+            worker = self._spawn(spec)
+            try:
+                worker.wait_ready()
+            except ToolWorkerError:
+                _log.warning("prewarm of tool worker for %s failed", spec.skill, exc_info=True)
+                return
+            with self._lock:
+                self._slot(spec).idle.append(worker)
+
+    def call(
+        self,
+        spec: WorkerSpec,
+        *,
+        module: Optional[str],
+        attr: str,
+        payload: Mapping[str, Any],
+        timeout: Optional[float] = None,
+    ) -> Any:
+        worker = self._acquire(spec)
+        keep = False
+        try:
+            reply = worker.call({"module": module, "attr": attr, "payload": dict(payload)}, timeout)
+            keep = True
+        except TimeoutError:
+            self._count(spec, "timeouts")
+            raise TimeoutError(f"tool '{attr}' timed out after {timeout} seconds") from None
+        except (EOFError, OSError) as exc:
+            self._count(spec, "crashes")
+            raise ToolWorkerError(
+                f"tool worker for skill '{spec.skill}' crashed: {exc or type(exc).__name__}", unavailable=True
+            ) from exc
+        finally:
+            self._count(spec, "calls")
+            self._release(worker, keep=keep)
+
+        if reply.get("ok"):
+            return reply.get("result")
+        error = reply.get("error") or {}
+        _log.debug("tool %s:%s failed in worker:\n%s", spec.skill, attr, error.get("traceback", ""))
+        exc_type = _ERRORS.get(error.get("type") or "")
+        message = error.get("message") or "tool failed"
+        if exc_type is not None:
+            raise exc_type(message)
+        remote_type = error.get("type") or "Error"
+        raise ToolWorkerError(f"{remote_type}: {message}", remote_type=remote_type)
+
+    def retire(self, skill: str) -> None:
+        """Stop idle workers of ``skill`` (on activate/rollback/uninstall)."""
+        victims: List[_Worker] = []
+        with self._lock:
+            for spec in [s for s in self._slots if s.skill == skill]:
+                victims.extend(self._slots[spec].idle)
+                self._slots[spec].idle.clear()
+                if not self._slots[spec].busy:
+                    del self._slots[spec]
+        for w in victims:
+            w.kill()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            victims = [w for state in self._slots.values() for w in state.idle]
+            self._slots.clear()
+        for w in victims:
+            w.kill()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {
+                    "skill": spec.skill,
+                    "version": spec.version,
+                    "slot": spec.slot,
+                    "idle": len(state.idle),
+                    "busy": state.busy,
+                    "spawned": state.spawned,
+                    "calls": state.calls,
+                    "timeouts": state.timeouts,
+                    "crashes": state.crashes,
+                }
+                for spec, state in self._slots.items()
+            ]
+
+
+_POOL: SkillProcessPool | None = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_process_pool() -> SkillProcessPool:
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                _POOL = SkillProcessPool()
+                atexit.register(_POOL.shutdown)
+    return _POOL
+
+
+def isolation_mode(tool_spec: Mapping[str, Any], runtime_info: Mapping[str, Any]) -> str:
+    """``process`` or ``inproc``: tool setting, then manifest runtime, then ``ADAOS_TOOL_ISOLATION``."""
+    mode = tool_spec.get("isolation") or runtime_info.get("isolation") or os.getenv("ADAOS_TOOL_ISOLATION") or "inproc"
+    return "process" if str(mode).strip().lower() == "process" else "inproc"
+
+
+__all__ = ["SkillProcessPool", "ToolWorkerError", "WorkerSpec", "get_process_pool", "isolation_mode"]
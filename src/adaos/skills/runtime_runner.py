@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import importlib
 from pathlib import Path
-from typing import Any, Iterable, Mapping
+from typing import Any, Callable, Iterable, Mapping
 
 
 def execute_tool(
@@ -17,6 +17,19 @@ def execute_tool(
 ) -> Any:
     """Execute a tool callable inside the skill package and return the result."""
 
+    func = resolve_tool(skill_dir, module=module, attr=attr, extra_paths=extra_paths)
+    return invoke_tool(func, payload, expand=should_expand_keywords(func))
+
+
+def resolve_tool(
+    skill_dir: Path,
+    *,
+    module: str | None,
+    attr: str,
+    extra_paths: Iterable[Path] | None = None,
+) -> Callable[..., Any]:
+    """Import the skill module and return the tool callable."""
+
     import sys
 
     skill_path = Path(skill_dir).resolve()
@@ -57,6 +70,11 @@ def execute_tool(
             raise
     if not callable(func):
         raise TypeError(f"attribute '{attr}' from module '{module_name}' is not callable")
+    return func
+
+
+def invoke_tool(func: Callable[..., Any], payload: Mapping[str, Any], *, expand: bool) -> Any:
+    """Call a resolved tool; ``expand`` selects ``func(**payload)`` over ``func(payload)``."""
 
     mapping = dict(payload)
     meta = mapping.get("_meta")
@@ -67,16 +85,16 @@ def execute_tool(
 
     if io_meta is not None and isinstance(meta, Mapping):
         with io_meta(meta):
-            if _should_expand_keywords(func):
+            if expand:
                 return func(**mapping)
             return func(mapping)
 
-    if _should_expand_keywords(func):
+    if expand:
         return func(**mapping)
     return func(mapping)
 
 
-def _should_expand_keywords(func) -> bool:
+def should_expand_keywords(func) -> bool:
     try:
         import inspect
 
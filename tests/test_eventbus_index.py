@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from adaos.domain import Event
+from adaos.services.eventbus import LocalEventBus
+
+
+def _ev(topic: str) -> Event:
+    return Event(type=topic, payload={}, source="test", ts=0.0)
+
+
+def test_publish_matches_prefixes_in_registration_order():
+    bus = LocalEventBus()
+    seen: list[str] = []
+    bus.subscribe("skills.activated", lambda e: seen.append("exact"))
+    bus.subscribe("*", lambda e: seen.append("star"))
+    bus.subscribe("skills.", lambda e: seen.append("skills"))
+    bus.subscribe("scenarios.", lambda e: seen.append("scenarios"))
+    bus.subscribe("", lambda e: seen.append("all"))
+
+    bus.publish(_ev("skills.activated"))
+    # как в прежнем линейном проходе: префиксы в порядке первой регистрации,
+    # "" и "*" — разные префиксы
+    assert seen == ["exact", "star", "skills", "all"]
+
+    seen.clear()
+    bus.publish(_ev("sys.ready"))
+    assert seen == ["star", "all"]
+
+    seen.clear()
+    bus.subscribe("*", lambda e: seen.append("star2"))
+    bus.publish(_ev("skills.x"))
+    assert seen == ["star", "star2", "skills", "all"]
+
+
+def test_subscribe_after_publish_invalidates_snapshot():
+    bus = LocalEventBus()
+    seen: list[str] = []
+    bus.subscribe("tg.input", lambda e: seen.append("a"))
+    bus.publish(_ev("tg.input.message"))
+    bus.subscribe("tg.", lambda e: seen.append("b"))
+    bus.publish(_ev("tg.input.message"))
+
+    assert seen == ["a", "a", "b"]
+    assert bus.subscriptions_count() == 2
+
+
+def test_queued_dispatch_bounds_in_flight_and_counts_drops():
+    import asyncio
+
+    from adaos.services.eventbus import DispatchPolicy
+
+    bus = LocalEventBus(dispatch="queued", policy=DispatchPolicy(queue_size=3, max_in_flight=2, overflow="drop"))
+    running = 0
+    peak = 0
+    handled: list[str] = []
+
+    async def slow(ev: Event) -> None:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        handled.append(ev.type)
+        running -= 1
+
+    bus.subscribe("tg.input", slow)
+
+    async def scenario() -> None:
+        for i in range(10):
+            bus.publish(_ev(f"tg.input.{i}"))
+        for _ in range(50):
+            await asyncio.sleep(0.01)
+            if not bus.dispatch_stats()[0]["in_flight"]:
+                break
+
+    asyncio.run(scenario())
+    stats = bus.dispatch_stats()[0]
+    assert peak == 2
+    # обработчики стартуют только на следующей итерации цикла: в очередь влезли три события
+    assert len(handled) == 3
+    assert stats["dropped"] == 7
+    assert stats["depth"] == 0 and stats["in_flight"] == 0
+
+
+def test_queued_dispatch_coalesces_same_type_and_blocks_async_publishers():
+    import asyncio
+
+    from adaos.services.eventbus import DispatchPolicy
+
+    bus = LocalEventBus()
+    coalesced: list[int] = []
+    blocked: list[int] = []
+
+    async def on_state(ev: Event) -> None:
+        await asyncio.sleep(0.005)
+        coalesced.append(ev.payload["n"])
+
+    async def on_job(ev: Event) -> None:
+        await asyncio.sleep(0.005)
+        blocked.append(ev.payload["n"])
+
+    bus.subscribe("ui.state", on_state, policy=DispatchPolicy(queue_size=4, overflow="coalesce"))
+    bus.subscribe("jobs.", on_job, policy=DispatchPolicy(queue_size=2, overflow="block"))
+
+    async def scenario() -> None:
+        for n in range(5):
+            bus.publish(Event(type="ui.state", payload={"n": n}, source="test", ts=0.0))
+        for n in range(6):
+            await bus.publish_async(Event(type="jobs.run", payload={"n": n}, source="test", ts=0.0))
+        while any(s["depth"] or s["in_flight"] for s in bus.dispatch_stats()):
+            await asyncio.sleep(0.005)
+
+    asyncio.run(scenario())
+    # до первого запуска обработчика все события схлопнулись в последнее
+    assert coalesced == [4]
+    assert blocked == list(range(6))
+    state, jobs = bus.dispatch_stats()
+    assert state["coalesced"] == 4 and state["dropped"] == 0
+    assert jobs["dropped"] == 0
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from adaos.apps.api import observe_api
+from adaos.apps.api.auth import require_token
+from adaos.domain import Event
+from adaos.services.eventbus import LocalEventBus
+from adaos.services.handler_stats import HANDLER_STATS, HandlerStats, LatencyHistogram
+
+
+def test_histogram_percentiles_within_bucket_error():
+    hist = LatencyHistogram()
+    for ms in range(1, 1001):
+        hist.record(ms / 1000.0)
+    assert abs(hist.percentile(50) - 500) / 500 < 0.07
+    assert abs(hist.percentile(99) - 990) / 990 < 0.07
+    assert hist.percentile(100) <= 1000.0
+
+
+def test_stats_cap_topics_per_handler():
+    stats = HandlerStats()
+    for i in range(100):
+        stats.record("h", f"topic.{i}", 0.001, error=i % 10 == 0)
+    rows = stats.snapshot(by_topic=True)
+    assert len(rows) == 65
+    assert {"calls": 100, "errors": 10}.items() <= stats.snapshot()[0].items()
+
+
+def test_handlers_endpoint_reports_bus_handlers():
+    HANDLER_STATS.reset()
+
+    def on_ping(ev):
+        if ev.payload.get("fail"):
+            raise RuntimeError("boom")
+
+    # собственная шина: подписка не должна пережить тест
+    bus = LocalEventBus()
+    bus.subscribe("stats.ping", on_ping)
+    bus.publish(Event(type="stats.ping", payload={}, source="test", ts=0.0))
+    bus.publish(Event(type="stats.ping", payload={"fail": True}, source="test", ts=0.0))
+
+    app = FastAPI()
+    app.include_router(observe_api.router, prefix="/api/observe")
+    app.dependency_overrides[require_token] = lambda: None
+    try:
+        body = TestClient(app).get("/api/observe/handlers").json()
+    finally:
+        HANDLER_STATS.reset()
+
+    row = next(r for r in body["handlers"] if r["handler"].endswith("on_ping"))
+    assert row["calls"] == 2 and row["errors"] == 1
+    assert {"p50_ms", "p95_ms", "p99_ms"} <= row.keys()
+
+
+def test_handler_labels_do_not_keep_handlers_alive():
+    import gc
+    import weakref
+
+    from adaos.services import eventbus
+
+    def make():
+        return lambda ev: None
+
+    handler = make()
+    ref = weakref.ref(handler)
+    assert eventbus._handler_label(handler).endswith("<lambda>")
+    del handler
+    gc.collect()
+    assert ref() is None
+
+    class Slotted:
+        __slots__ = ()
+
+        def __call__(self, ev):
+            return None
+
+    # не weakref-able вызываемые объекты метятся без кэша
+    assert eventbus._handler_label(Slotted()).startswith(__name__)
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import yaml
+
+from adaos.services.agent_context import get_ctx
+from adaos.services.interpreter import prematch
+from adaos.services.interpreter.prematch import IntentPrematcher
+
+
+def _setup(tmp_path: Path, monkeypatch) -> Path:
+    ctx = get_ctx()
+    config = Path(ctx.paths.state_dir()) / "interpreter" / "config.yaml"
+    config.parent.mkdir(parents=True, exist_ok=True)
+    config.write_text(
+        yaml.safe_dump(
+            {
+                "intents": [
+                    {"intent": "greet", "examples": ["Привет!", "добрый день"]},
+                    {"intent": "weather", "examples": ["погода в [Москва](city)", "какая погода {city} {date}"]},
+                    {"intent": "lights_on", "examples": ["включи свет"]},
+                ]
+            },
+            allow_unicode=True,
+        ),
+        encoding="utf-8",
+    )
+    skill_file = tmp_path / "intents.yml"
+    skill_file.write_text(
+        yaml.safe_dump(
+            {"intents": [{"intent": "lamp_on", "examples": ["включи свет", "зажги лампу в [спальне](room)"]}]},
+            allow_unicode=True,
+        ),
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(prematch, "skill_intent_files", lambda ctx: [("lamp", skill_file)])
+    return skill_file
+
+
+def test_exact_and_template_matches(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    m = IntentPrematcher(get_ctx())
+
+    assert m.match("  ПРИВЕТ ")["intent"] == {"name": "greet", "confidence": 1.0}
+    res = m.match("Погода в Нижнем Новгороде")
+    assert res["intent"]["name"] == "weather" and res["prematch"] == "template"
+    assert [(e["entity"], e["value"]) for e in res["entities"]] == [("city", "Нижнем Новгороде")]
+    res = m.match("зажги лампу в Детской")
+    assert res["intent"]["name"] == "lamp_on" and res["entities"][0]["value"] == "Детской"
+
+    assert m.match("включи свет") is None  # одна фраза у двух интентов — решает Rasa
+    assert m.match("расскажи анекдот") is None
+    st = m.stats()
+    assert (st["exact_hits"], st["template_hits"], st["fallthrough"]) == (1, 2, 2)
+    assert st["hit_ratio"] == 0.6
+
+
+def test_refresh_reparses_only_changed_sources(tmp_path, monkeypatch):
+    skill_file = _setup(tmp_path, monkeypatch)
+    m = IntentPrematcher(get_ctx())
+    assert m.refresh() is True
+    assert m.stats()["reparsed_sources"] == 2
+
+    skill_file.write_text(skill_file.read_text(encoding="utf-8"), encoding="utf-8")  # та же запись заново
+    assert m.refresh() is False
+
+    skill_file.write_text(yaml.safe_dump({"intents": [{"intent": "lamp_on", "examples": ["зажги лампу"]}]}, allow_unicode=True), encoding="utf-8")
+    assert m.refresh() is True
+    assert m.stats()["reparsed_sources"] == 3
+    assert m.match("включи свет")["intent"]["name"] == "lights_on"
+    assert m.match("зажги лампу")["intent"]["name"] == "lamp_on"
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import asyncio
+
+from adaos.services.agent_context import get_ctx
+from adaos.services.interpreter import trainer as trainer_mod
+from adaos.services.interpreter.trainer import RasaTrainer
+from adaos.services.interpreter.workspace import IntentMapping, InterpreterWorkspace
+
+
+def _trainer(monkeypatch) -> tuple[RasaTrainer, list]:
+    ws = InterpreterWorkspace(get_ctx())
+    trainer = RasaTrainer(ws)
+    calls: list = []
+
+    def _run(cmd, *, cwd=None):
+        calls.append(cmd)
+        trainer._model_path().write_bytes(b"model")
+
+    monkeypatch.setattr(trainer, "_run", _run)
+    monkeypatch.setattr(trainer, "_ensure_rasa_installed", lambda: None)
+    return trainer, calls
+
+
+def test_train_skips_unchanged_and_finetunes_new_examples(monkeypatch):
+    trainer, calls = _trainer(monkeypatch)
+    ws = trainer.ws
+    ws.upsert_intent(IntentMapping(intent="lights_on", skill="lamp", examples=["включи свет"]))
+
+    meta = trainer.train()
+    assert meta["extra"]["mode"] == "full" and "--finetune" not in calls[-1]
+
+    assert trainer.train().get("skipped") is True
+    assert len(calls) == 1
+
+    # новые примеры для существующего интента — дообучение
+    ws.upsert_intent(IntentMapping(intent="lights_on", skill="lamp", examples=["включи свет", "зажги свет"]))
+    meta = trainer.train()
+    assert meta["extra"]["mode"] == "finetune" and meta["extra"]["finetune_streak"] == 1
+    assert "--finetune" in calls[-1]
+
+    # новый интент меняет набор меток — обучение с нуля
+    ws.upsert_intent(IntentMapping(intent="lights_off", skill="lamp", examples=["выключи свет"]))
+    meta = trainer.train()
+    assert meta["extra"]["mode"] == "full" and "--finetune" not in calls[-1]
+
+    monkeypatch.setenv("ADAOS_INTERPRETER_FINETUNE_MAX", "1")
+    for i, mode in enumerate(["finetune", "full"]):
+        ws.upsert_intent(IntentMapping(intent="lights_off", skill="lamp", examples=["выключи свет", f"погаси свет {i}"]))
+        assert trainer.train()["extra"]["mode"] == mode
+    assert len(calls) == 5
+
+
+def test_intent_changed_during_training_is_not_marked_trained(monkeypatch):
+    trainer, calls = _trainer(monkeypatch)
+    ws = trainer.ws
+    ws.upsert_intent(IntentMapping(intent="lights_on", skill="lamp", examples=["включи свет"]))
+
+    def _run(cmd, *, cwd=None):
+        calls.append(cmd)
+        trainer._model_path().write_bytes(b"model")
+        if len(calls) == 1:
+            ws.upsert_intent(IntentMapping(intent="lights_on", skill="lamp", examples=["включи свет", "зажги свет"]))
+
+    monkeypatch.setattr(trainer, "_run", _run)
+    trainer.train()
+    # повторный запуск (его ставит schedule_training) должен обучить новую версию
+    assert trainer.train().get("skipped") is not True
+    assert len(calls) == 2
+    assert trainer.train().get("skipped") is True
+
+
+def test_schedule_training_debounces_burst(monkeypatch):
+    runs: list = []
+
+    def _train(ctx, note):
+        runs.append(note)
+        return {"trained_at": "now", "extra": {"mode": "full"}}
+
+    monkeypatch.setattr(trainer_mod, "_train_blocking", _train)
+
+    async def _burst() -> None:
+        ctx = get_ctx()
+        task = None
+        for reason in ["skills.activated", "skills.activated", "scenarios.synced"]:
+            task = trainer_mod.schedule_training(ctx, reason=reason, delay=0.05)
+            await asyncio.sleep(0.01)
+        await task
+
+    asyncio.run(_burst())
+    assert runs == ["auto-train: skills.activated, scenarios.synced"]
+    assert trainer_mod.training_stats()["pending"] is False
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+
+import y_py as Y
+
+from adaos.services.nlu import dispatcher, routing
+from adaos.services.nlu.routing import NLURoutingTable
+
+
+def _scenarios() -> dict:
+    return {
+        "web_desktop": {"nlu": {"intents": {"desktop.open": {"actions": [{"target": "desktop.toggleInstall", "params": {"id": "apps"}}]}}}},
+        "weather": {
+            "nlu": {
+                "intents": {
+                    "weather.show": {
+                        "actions": [
+                            {
+                                "type": "callSkill",
+                                "target": "weather.city_changed",
+                                "params": {"city": "$slot.city", "ws": "$ctx.webspace_id", "sc": "$ctx.scenario_id", "q": "$text", "x": "$unknown", "n": 3},
+                            },
+                            {"target": ""},
+                        ]
+                    }
+                }
+            }
+        },
+    }
+
+
+def _dispatch(monkeypatch, table: NLURoutingTable, payload: dict) -> list:
+    emitted = []
+    monkeypatch.setattr(dispatcher, "get_routing_table", lambda: table)
+    monkeypatch.setattr(dispatcher, "bus_emit", lambda bus, topic, data, source: emitted.append((topic, data)))
+    asyncio.run(dispatcher._on_nlp_intent_detected(payload))
+    return emitted
+
+
+def test_routes_follow_live_room_without_reading_doc(monkeypatch):
+    content = _scenarios()
+    monkeypatch.setattr(routing.scenarios_loader, "read_content", lambda sid, space="workspace": content.get(sid, {}))
+
+    @asynccontextmanager
+    async def _no_doc(webspace_id):
+        raise AssertionError("YDoc must not be opened for a live webspace")
+        yield
+
+    monkeypatch.setattr(routing, "async_get_ydoc", _no_doc)
+    table = NLURoutingTable()
+    ydoc = Y.YDoc()
+    table.observe_room("ws1", ydoc)
+
+    emitted = _dispatch(monkeypatch, table, {"intent": "desktop.open", "webspace_id": "ws1"})
+    assert [t for t, _ in emitted] == ["desktop.toggleInstall"]
+
+    ui = ydoc.get_map("ui")
+    with ydoc.begin_transaction() as txn:
+        ui.set(txn, "current_scenario", "weather")
+    emitted = _dispatch(monkeypatch, table, {"intent": "weather.show", "webspace_id": "ws1", "slots": {"city": "Берлин"}, "text": "погода в Берлине"})
+    assert len(emitted) == 1
+    topic, data = emitted[0]
+    assert topic == "weather.city_changed"
+    assert data["city"] == "Берлин" and data["ws"] == "ws1" and data["sc"] == "weather"
+    assert data["q"] == "погода в Берлине" and data["x"] is None and data["n"] == 3
+    assert data["_meta"] == {"webspace_id": "ws1", "scenario_id": "weather"}
+
+    for _ in range(50):
+        _dispatch(monkeypatch, table, {"intent": "weather.show", "webspace_id": "ws1"})
+    stats = table.stats()
+    assert stats["doc_reads"] == 0 and stats["compiles"] == 2
+
+    # новое содержимое сценария (например, после scenario.installed) перекомпилируется
+    content["weather"] = {"nlu": {"intents": {"weather.show": {"actions": [{"target": "weather.refresh"}]}}}}
+    emitted = _dispatch(monkeypatch, table, {"intent": "weather.show", "webspace_id": "ws1"})
+    assert [t for t, _ in emitted] == ["weather.refresh"]
+
+
+def test_webspace_without_room_is_read_once_and_follows_events(monkeypatch):
+    content = _scenarios()
+    monkeypatch.setattr(routing.scenarios_loader, "read_content", lambda sid, space="workspace": content.get(sid, {}))
+    doc = Y.YDoc()
+    with doc.begin_transaction() as txn:
+        doc.get_map("ui").set(txn, "current_scenario", "weather")
+    reads = []
+
+    @asynccontextmanager
+    async def _doc(webspace_id):
+        reads.append(webspace_id)
+        yield doc
+
+    monkeypatch.setattr(routing, "async_get_ydoc", _doc)
+    table = NLURoutingTable()
+    monkeypatch.setattr(routing, "_TABLE", table)
+
+    for _ in range(5):
+        emitted = _dispatch(monkeypatch, table, {"intent": "weather.show", "webspace_id": "ws2"})
+        assert [t for t, _ in emitted] == ["weather.city_changed"]
+    assert reads == ["ws2"]
+
+    asyncio.run(routing._on_scenario_set({"scenario_id": "web_desktop", "webspace_id": "ws2"}))
+    emitted = _dispatch(monkeypatch, table, {"intent": "desktop.open", "webspace_id": "ws2"})
+    assert [t for t, _ in emitted] == ["desktop.toggleInstall"]
+    assert reads == ["ws2"]
+
+    asyncio.run(routing._on_scenarios_synced({"scenario_id": "weather", "webspace_id": "ws2"}))
+    _dispatch(monkeypatch, table, {"intent": "weather.show", "webspace_id": "ws2"})
+    assert reads == ["ws2", "ws2"]
+
+
+def test_scenario_set_in_dev_webspace_reads_dev_space(monkeypatch):
+    from adaos.services.workspaces import index as workspace_index
+
+    workspace_index.ensure_workspace("dev-ws")
+    workspace_index.set_display_name("dev-ws", "DEV: sandbox")
+    spaces = {"workspace": {}, "dev": {"dev_only": {"nlu": {}}}}
+    monkeypatch.setattr(routing.scenarios_loader, "read_content", lambda sid, space="workspace": spaces[space].get(sid, {}))
+    table = NLURoutingTable()
+    monkeypatch.setattr(routing, "_TABLE", table)
+
+    asyncio.run(routing._on_scenario_set({"scenario_id": "dev_only", "webspace_id": "dev-ws"}))
+    asyncio.run(routing._on_scenario_set({"scenario_id": "dev_only", "webspace_id": "ws3"}))
+    assert table._current == {"dev-ws": "dev_only"}
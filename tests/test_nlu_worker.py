@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+import textwrap
+import time
+
+import pytest
+
+from adaos.services.interpreter.worker import NLUWorker, NLUWorkerError
+
+# Подменяет rasa в воркере: «модель» — JSON {текст: интент}, загрузка медленная.
+_FAKE_RASA = """
+import json, time
+
+class Interpreter:
+    @classmethod
+    def load(cls, path):
+        time.sleep(0.2)
+        with open(path, encoding="utf-8") as f:
+            model = json.load(f)
+        if model.get("broken"):
+            raise ValueError("broken model")
+        obj = cls()
+        obj.model = model
+        return obj
+
+    def parse(self, text):
+        if text == "crash":
+            import os
+            os._exit(3)
+        return {"text": text, "intent": {"name": self.model.get(text, "nlu_fallback"), "confidence": 1.0}}
+"""
+
+
+@pytest.fixture
+def worker(tmp_path):
+    pkg = tmp_path / "site" / "rasa" / "nlu"
+    pkg.mkdir(parents=True)
+    (tmp_path / "site" / "rasa" / "__init__.py").write_text("", encoding="utf-8")
+    (pkg / "__init__.py").write_text("", encoding="utf-8")
+    (pkg / "model.py").write_text(textwrap.dedent(_FAKE_RASA), encoding="utf-8")
+    model = tmp_path / "interpreter_latest.tar.gz"
+    model.write_text(json.dumps({"привет": "greet"}), encoding="utf-8")
+    env = dict(os.environ, PYTHONPATH=str(tmp_path / "site"))
+    w = NLUWorker(sys.executable, lambda: model, env=env, max_batch=8)
+    yield w, model
+    w.close()
+
+
+def test_worker_loads_once_and_batches(worker):
+    w, _model = worker
+    assert w.parse("привет", timeout=30)["intent"]["name"] == "greet"
+    pid = w.stats()["pid"]
+
+    futures = [w.submit(f"t{i}") for i in range(20)]
+    assert [f.result(30)["text"] for f in futures] == [f"t{i}" for i in range(20)]
+
+    st = w.stats()
+    assert st["pid"] == pid and st["requests"] == 21
+    assert st["batches"] < 21
+    assert st["p50_ms"] > 0 and st["p99_ms"] >= st["p50_ms"]
+
+
+def test_worker_hot_swaps_model_and_survives_crash(worker, monkeypatch):
+    w, model = worker
+    monkeypatch.setattr("adaos.services.interpreter.worker._RECHECK_S", 0.0)
+    assert w.parse("привет", timeout=30)["intent"]["name"] == "greet"
+
+    model.write_text(json.dumps({"привет": "hello"}), encoding="utf-8")
+    os.utime(model, ns=(time.time_ns(), time.time_ns() + 10_000_000))
+    deadline = time.monotonic() + 30
+    while w.parse("привет", timeout=30)["intent"]["name"] != "hello":
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    assert w.stats()["swaps"] == 1
+
+    with pytest.raises(NLUWorkerError):
+        w.parse("crash", timeout=30)
+    assert w.parse("привет", timeout=30)["intent"]["name"] == "hello"
+    assert w.stats()["restarts"] == 1
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import os
+
+import yaml
+
+from adaos.services import node_config
+from adaos.services.agent_context import get_ctx
+
+
+def test_config_snapshot_is_cached_and_invalidated(monkeypatch):
+    first = node_config.config_snapshot()
+    assert node_config.config_snapshot() is first
+
+    node_config.set_role("member", hub_url="http://hub:8777")
+    conf = node_config.config_snapshot()
+    assert conf is not first and conf.role == "member"
+
+    # внешняя правка node.yaml подхватывается по mtime
+    monkeypatch.setattr(node_config, "_SNAPSHOT_RECHECK_S", 0.0)
+    path = get_ctx().paths.base_dir() / "node.yaml"
+    data = yaml.safe_load(path.read_text(encoding="utf-8"))
+    data["role"] = "hub"
+    path.write_text(yaml.safe_dump(data), encoding="utf-8")
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert node_config.config_snapshot().role == "hub"
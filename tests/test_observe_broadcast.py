@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import asyncio
+
+from adaos.services.observe import EventBroadcaster
+
+
+def test_broadcaster_fans_out_only_matching_events():
+    async def scenario():
+        bc = EventBroadcaster(history=10)
+        q_all = bc.subscribe(topic_prefix=None, node_id=None, since_ts=None)
+        q_net = bc.subscribe(topic_prefix="net.subnet.", node_id=None, since_ts=None)
+        q_node = bc.subscribe(topic_prefix="ui.", node_id="n2", since_ts=None)
+
+        await bc.publish({"topic": "net.subnet.joined", "node_id": "n1", "ts": 1.0})
+        await bc.publish({"topic": "ui.notify", "node_id": "n2", "ts": 2.0})
+        await bc.publish({"topic": "ui.notify", "node_id": "n1", "ts": 3.0})
+
+        assert q_all.qsize() == 3
+        assert q_net.qsize() == 1 and q_net.get_nowait()["topic"] == "net.subnet.joined"
+        assert q_node.qsize() == 1 and q_node.get_nowait()["ts"] == 2.0
+
+        bc.unsubscribe(q_all)
+        await bc.publish({"topic": "sys.tick", "node_id": "n1", "ts": 4.0})
+        assert q_all.qsize() == 3
+        assert len(bc.stats()) == 2
+
+    asyncio.run(scenario())
+
+
+def test_broadcaster_counts_drops_and_replays_from_ring():
+    async def scenario():
+        bc = EventBroadcaster(history=5)
+        q = bc.subscribe(topic_prefix="demo.", node_id=None, since_ts=None)
+        for i in range(510):
+            await bc.publish({"topic": "demo.tick", "node_id": "n1", "ts": float(i)})
+        assert bc.stats()[0]["dropped"] == 10
+        assert q.get_nowait()["ts"] == 10.0
+
+        assert [e["ts"] for e in bc.replay(topic_prefix="demo.", node_id=None, since_ts=507.0)] == [507.0, 508.0, 509.0]
+        assert [e["ts"] for e in bc.replay(topic_prefix=None, node_id="n1", last=2)] == [508.0, 509.0]
+
+    asyncio.run(scenario())
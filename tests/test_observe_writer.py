@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import gzip
+import json
+
+from adaos.services import observe
+
+
+def test_event_log_writer_batches_and_rotates(tmp_path, monkeypatch):
+    monkeypatch.setattr(observe, "BASE_DIR", tmp_path)
+    monkeypatch.setattr(observe, "_MAX_BYTES", 2000)
+    writer = observe._EventLogWriter(capacity=1000, fsync="batch")
+    try:
+        for i in range(100):
+            writer.write({"topic": "demo.tick", "payload": {"i": i}})
+        assert writer.flush()
+    finally:
+        writer.close()
+
+    logs = tmp_path / "logs"
+    current = (logs / "events.log").read_text(encoding="utf-8").splitlines() if (logs / "events.log").exists() else []
+    archived = []
+    for n in (3, 2, 1):
+        gz = logs / f"events.log.{n}.gz"
+        if gz.exists():
+            archived += gzip.decompress(gz.read_bytes()).decode("utf-8").splitlines()
+    assert (logs / "events.log.1.gz").exists()
+    assert writer.written == 100 and writer.dropped == 0
+    # самые свежие записи всегда в текущем файле или последнем архиве
+    seen = [json.loads(line)["payload"]["i"] for line in archived + current]
+    assert seen == sorted(seen) and seen[-1] == 99
+
+
+def test_event_log_writer_ring_buffer_drops_oldest(tmp_path, monkeypatch):
+    monkeypatch.setattr(observe, "BASE_DIR", tmp_path)
+    writer = observe._EventLogWriter(capacity=5)
+    # подменяем поток записи, чтобы буфер не опустошался во время проверки
+    writer._thread = type("_Alive", (), {"is_alive": lambda self: True})()
+    for i in range(8):
+        writer.write({"i": i})
+    assert [e["i"] for e in writer._buf] == [3, 4, 5, 6, 7]
+    assert writer.dropped == 3
+
+
+def test_push_spool_survives_restart_and_requeues(tmp_path):
+    path = tmp_path / "state" / "observe_push.jsonl"
+    spool = observe._PushSpool(path)
+    for i in range(5):
+        spool.add({"i": i})
+    spool.flush()
+
+    # новый процесс: журнал забирается целиком, неотправленный остаток возвращается
+    restarted = observe._PushSpool(path)
+    backlog = restarted.claim()
+    assert [e["i"] for e in backlog] == [0, 1, 2, 3, 4]
+    restarted.requeue(backlog[3:])
+    assert [e["i"] for e in observe._PushSpool(path).claim()] == [3, 4]
+    restarted.ack()
+    assert observe._PushSpool(path).claim() == []
+
+
+def test_push_spool_claim_merges_journal_into_sending_and_caps_pending(tmp_path):
+    path = tmp_path / "state" / "observe_push.jsonl"
+    spool = observe._PushSpool(path, max_pending=3)
+    spool.add({"i": 0})
+    spool.flush()
+    assert spool.take_journaled() and not spool.take_journaled()
+    assert [e["i"] for e in spool.claim()] == [0]  # отправка не подтверждена
+
+    # без event loop переполнение сбрасывается на диск сразу
+    for i in range(1, 4):
+        spool.add({"i": i})
+    assert not spool.has_pending() and spool.take_journaled()
+    assert [e["i"] for e in spool.claim()] == [0, 1, 2, 3]
+    spool.ack()
+    assert spool.claim() == []
+
+
+def test_ingest_accepts_gzip_batches(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from adaos.apps.api import observe_api
+    from adaos.apps.api.auth import require_token
+    from adaos.services.agent_context import get_ctx
+    from adaos.services.node_config import load_config
+
+    ctx = get_ctx()
+    previous = ctx.config
+    object.__setattr__(ctx, "config", load_config())
+    written = []
+    monkeypatch.setattr(observe_api, "_write_local", written.append)
+
+    app = FastAPI()
+    app.include_router(observe_api.router, prefix="/api/observe")
+    app.dependency_overrides[require_token] = lambda: None
+    body = gzip.compress(json.dumps({"node_id": "m1", "events": [{"topic": "a"}, {"topic": "b"}]}).encode())
+    try:
+        r = TestClient(app).post(
+            "/api/observe/ingest", content=body, headers={"Content-Encoding": "gzip", "Content-Type": "application/json"}
+        )
+    finally:
+        object.__setattr__(ctx, "config", previous)
+    assert r.status_code == 200 and r.json()["ingested"] == 2
+    assert [e["node_id"] for e in written] == ["m1", "m1"]
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+
+from adaos.services.router import delivery
+from adaos.services.router.delivery import DeliveryPipeline
+
+
+class _Directory:
+    def get_node(self, node_id):
+        return {"node_id": node_id, "subnet_id": "sn-" + node_id}
+
+    def is_online(self, node_id):
+        return True
+
+    def get_node_base_url(self, node_id):
+        return f"http://{node_id}.local"
+
+    def list_known_nodes(self):
+        return []
+
+
+def _conf() -> SimpleNamespace:
+    return SimpleNamespace(node_id="hub", subnet_id="sn-hub", role="hub", hub_url=None, token="t")
+
+
+def test_slow_telegram_does_not_delay_console_and_retries(monkeypatch):
+    monkeypatch.setattr(delivery, "get_directory", lambda: _Directory())
+    monkeypatch.setattr(delivery, "_load_node_yaml", lambda base=None: {"nats": {"alias": "home"}})
+    printed: list = []
+    monkeypatch.setattr(delivery, "print_text", lambda text, **kw: printed.append(text))
+    tg_calls: list = []
+    console: list = []
+
+    async def _handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/io/tg/send":
+            tg_calls.append(request.content)
+            await asyncio.sleep(0.2)
+            return httpx.Response(503 if len(tg_calls) == 1 else 200)
+        console.append((request.url.host, time.perf_counter()))
+        return httpx.Response(200)
+
+    async def _run() -> float:
+        pipeline = DeliveryPipeline(backoff_s=0.01, transport=httpx.MockTransport(_handler))
+        pipeline.bind(asyncio.get_running_loop())
+        started = time.perf_counter()
+        for i in range(3):
+            pipeline.notify(f"msg {i}", source="t", conf=_conf(), api_base="http://root", routes=[("telegram", "hub"), ("console", "member")])
+        publish_s = time.perf_counter() - started
+        for _ in range(200):
+            if pipeline.stats()["telegram:hub"]["delivered"] == 3:
+                break
+            await asyncio.sleep(0.02)
+        stats = pipeline.stats()
+        await pipeline.close()
+        assert stats["telegram:hub"]["delivered"] == 3 and stats["telegram:hub"]["retries"] == 1
+        assert stats["console:member"]["delivered"] == 3
+        # консоль доставлена, пока Telegram ещё отвечал на первое сообщение
+        assert console[-1][1] - started < 0.2
+        assert b"[home]: msg 0" in tg_calls[0]
+        return publish_s
+
+    assert asyncio.run(_run()) < 0.05
+    assert printed == []
+
+
+def test_failed_routes_fall_back_to_local_print(monkeypatch):
+    monkeypatch.setattr(delivery, "get_directory", lambda: _Directory())
+    printed: list = []
+    monkeypatch.setattr(delivery, "print_text", lambda text, **kw: printed.append(text))
+
+    async def _handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("down", request=request)
+
+    async def _run() -> dict:
+        pipeline = DeliveryPipeline(attempts=2, backoff_s=0.01, transport=httpx.MockTransport(_handler))
+        pipeline.bind(asyncio.get_running_loop())
+        pipeline.notify("hello", source="t", conf=_conf(), api_base="http://root", routes=[("console", "member")])
+        pipeline.notify("printed", source="t", conf=_conf(), api_base="http://root", routes=[("console", "member")], delivered=True)
+        await asyncio.sleep(0.1)
+        stats = pipeline.stats()
+        await pipeline.close()
+        return stats
+
+    stats = asyncio.run(_run())
+    assert printed == ["hello"]
+    assert stats["console:member"]["failed"] == 2 and stats["console:member"]["retries"] == 2
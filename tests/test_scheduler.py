@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime
+
+import pytest
+
+from adaos.services import scheduler as sched_mod
+from adaos.services.agent_context import get_ctx
+from adaos.services.scheduler import CronExpr, Scheduler, _JobStore
+
+
+def test_cron_next_after():
+    base = datetime(2026, 3, 2, 10, 7).timestamp()  # понедельник
+    assert datetime.fromtimestamp(CronExpr("*/15 * * * *").next_after(base)) == datetime(2026, 3, 2, 10, 15)
+    assert datetime.fromtimestamp(CronExpr("30 2 * * *").next_after(base)) == datetime(2026, 3, 3, 2, 30)
+    assert datetime.fromtimestamp(CronExpr("0 9 * * 0").next_after(base)) == datetime(2026, 3, 8, 9, 0)
+    assert datetime.fromtimestamp(CronExpr("0 0 1 1 *").next_after(base)) == datetime(2027, 1, 1, 0, 0)
+    with pytest.raises(ValueError):
+        CronExpr("61 * * * *")
+    with pytest.raises(ValueError):
+        CronExpr("0 0 30 2 *").next_after(base)
+
+
+def test_scheduler_fires_in_deadline_order(monkeypatch):
+    fired: list[str] = []
+
+    async def fake_emit(topic, payload, **kw):
+        fired.append(kw["job_name"])
+
+    monkeypatch.setattr(sched_mod, "bus_emit", fake_emit)
+
+    async def scenario():
+        s = Scheduler(persist=False)
+        await s.start()
+        await s.ensure_every("slow", 0.12, "demo.slow")
+        await s.ensure_every("fast", 0.05, "demo.fast")
+        await asyncio.sleep(0.2)
+        await s.stop()
+
+    asyncio.run(scenario())
+    assert fired[:3] == ["fast", "fast", "slow"]
+
+
+def test_scheduler_persists_and_spreads_overdue_jobs():
+    store = _JobStore(get_ctx().sql)
+
+    async def first_run():
+        s = Scheduler(store=store)
+        await s.ensure_every("backup.ws1", 6000.0, "sys.ystore.backup", {"webspace_id": "ws1"})
+        await s.ensure_cron("nightly", "0 3 * * *", "sys.nightly", jitter=60.0)
+        await s.stop()
+
+    asyncio.run(first_run())
+    rows = {j.name: j for j in store.load()}
+    assert rows["backup.ws1"].payload == {"webspace_id": "ws1"}
+    assert rows["nightly"].cron == "0 3 * * *"
+
+    # node was down past the deadline
+    overdue = rows["backup.ws1"]
+    overdue.next_run = time.time() - 10
+    store.write([overdue], [])
+
+    async def restart():
+        s = Scheduler(store=store, boot_spread=5.0)
+        await s.start()
+        jobs = {j.name: j for j in s.jobs()}
+        await s.stop()
+        return jobs
+
+    jobs = asyncio.run(restart())
+    now = time.time()
+    assert now - 1 <= jobs["backup.ws1"].next_run <= now + 5.0
+    assert jobs["nightly"].next_run == rows["nightly"].next_run
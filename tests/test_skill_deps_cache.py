@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import subprocess
+from pathlib import Path
+
+from adaos.services.agent_context import get_ctx
+from adaos.services.skill import manager as manager_mod
+from adaos.services.skill.manager import SkillManager
+from adaos.services.skill.runtime_env import SkillRuntimeEnvironment
+
+
+def _slot(name: str):
+    ctx = get_ctx()
+    env = SkillRuntimeEnvironment(skills_root=ctx.paths.skills_dir(), skill_name=name)
+    env.prepare_version("1.0.0")
+    return env, env.build_slot_paths("1.0.0", "A")
+
+
+def _fake_pip(monkeypatch, *, shared_ok: bool):
+    calls = []
+
+    def run(cmd, capture_output=True, text=True):
+        calls.append(cmd)
+        if "--target" in cmd:
+            target = Path(cmd[cmd.index("--target") + 1])
+            (target / "demo_pkg").mkdir(parents=True, exist_ok=True)
+            (target / "demo_pkg" / "__init__.py").write_text("VALUE = 1\n", encoding="utf-8")
+            return subprocess.CompletedProcess(cmd, 0, "", "")
+        return subprocess.CompletedProcess(cmd, 0 if shared_ok else 1, "", "" if shared_ok else "denied")
+
+    monkeypatch.setattr(manager_mod.subprocess, "run", run)
+    return calls
+
+
+def test_identical_dependency_sets_install_once(monkeypatch, tmp_path):
+    ctx = get_ctx()
+    mgr = SkillManager(git=ctx.git, paths=ctx.paths, caps=ctx.caps, bus=ctx.bus)
+    calls = _fake_pip(monkeypatch, shared_ok=False)
+    # pytest уже установлен в окружении, но запись в окружение «запрещена» — уходим в --target
+    manifest = {"dependencies": ["pytest>=7"]}
+
+    _, slot_a = _slot("deps_a")
+    _, slot_b = _slot("deps_b")
+    paths_a = mgr._install_python_dependencies(manifest=manifest, slot=slot_a, skill_dir=tmp_path)
+    pip_runs = len(calls)
+    paths_b = mgr._install_python_dependencies(manifest=manifest, slot=slot_b, skill_dir=tmp_path)
+    assert len(calls) == pip_runs  # второй навык — из кэша
+    assert all("--upgrade" not in cmd for cmd in calls)
+    assert paths_a == [str(slot_a.vendor_dir)] and paths_b == [str(slot_b.vendor_dir)]
+    assert (slot_b.vendor_dir / "demo_pkg" / "__init__.py").exists()
+
+    # удаление слота не должно задеть общий кэш
+    env_a, _ = _slot("deps_a")
+    env_a.cleanup_slot("1.0.0", "A")
+    mgr._remove_tree(slot_b.vendor_dir)
+    assert (mgr._dependency_store().root).exists()
+    paths_c = mgr._install_python_dependencies(manifest=manifest, slot=slot_a, skill_dir=tmp_path)
+    assert len(calls) == pip_runs and paths_c == [str(slot_a.vendor_dir)]
+
+
+def test_changed_requirements_reinstall(monkeypatch, tmp_path):
+    ctx = get_ctx()
+    mgr = SkillManager(git=ctx.git, paths=ctx.paths, caps=ctx.caps, bus=ctx.bus)
+    calls = _fake_pip(monkeypatch, shared_ok=True)
+    req = tmp_path / "requirements.in"
+    req.write_text("pytest\n", encoding="utf-8")
+    _, slot = _slot("deps_env")
+
+    assert mgr._install_python_dependencies(manifest={}, slot=slot, skill_dir=tmp_path) == []
+    assert mgr._install_python_dependencies(manifest={}, slot=slot, skill_dir=tmp_path) == []
+    assert len(calls) == 1
+    req.write_text("pytest\nrequests\n", encoding="utf-8")
+    mgr._install_python_dependencies(manifest={}, slot=slot, skill_dir=tmp_path)
+    assert len(calls) == 2
+
+
+def test_prepare_runtimes_in_parallel():
+    ctx = get_ctx()
+    mgr = SkillManager(git=ctx.git, paths=ctx.paths, caps=ctx.caps, bus=ctx.bus)
+    for name in ("par_a", "par_b"):
+        skill_dir = ctx.paths.skills_dir() / name
+        (skill_dir / "handlers").mkdir(parents=True)
+        (skill_dir / "handlers" / "main.py").write_text("def handle(topic, payload):\n    return None\n", encoding="utf-8")
+        (skill_dir / "skill.yaml").write_text(f"name: {name}\nversion: 1.0.0\n", encoding="utf-8")
+
+    results = mgr.prepare_runtimes(["par_a", "par_b", "missing_skill"], max_workers=2)
+    assert results["par_a"].version == "1.0.0" and results["par_b"].resolved_manifest.exists()
+    assert isinstance(results["missing_skill"], FileNotFoundError)
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import sys
+import textwrap
+
+import pytest
+
+from adaos.skills.process_pool import SkillProcessPool, WorkerSpec
+
+
+@pytest.fixture
+def pool_spec(tmp_path):
+    skill_dir = tmp_path / "skills" / "iso_skill"
+    handlers = skill_dir / "handlers"
+    handlers.mkdir(parents=True)
+    (handlers / "__init__.py").write_text("", encoding="utf-8")
+    (handlers / "main.py").write_text(
+        textwrap.dedent(
+            """
+            import os
+            import time
+
+            _calls = []
+
+            def echo(text: str, times: int = 1):
+                _calls.append(text)
+                return {"text": text * times, "pid": os.getpid(), "calls": len(_calls)}
+
+            def nap(seconds):
+                time.sleep(seconds["seconds"])
+                return "woke"
+
+            def fail(payload):
+                raise ValueError("bad payload")
+            """
+        ),
+        encoding="utf-8",
+    )
+    spec = WorkerSpec(skill="iso_skill", version="1.0.0", slot="A", skill_dir=str(skill_dir), base_dir=str(tmp_path / "base"))
+    pool = SkillProcessPool(warm=1)
+    yield pool, spec, skill_dir
+    pool.shutdown()
+
+
+def test_worker_is_reused_and_keeps_hub_sys_path_clean(pool_spec):
+    pool, spec, skill_dir = pool_spec
+    first = pool.call(spec, module="handlers.main", attr="echo", payload={"text": "a", "times": 2}, timeout=60)
+    second = pool.call(spec, module="handlers.main", attr="echo", payload={"text": "b"}, timeout=5)
+    assert first["text"] == "aa" and second["text"] == "b"
+    # тот же тёплый процесс, состояние модуля сохранилось
+    assert first["pid"] == second["pid"] and second["calls"] == 2
+    assert str(skill_dir) not in sys.path
+    with pytest.raises(ValueError, match="bad payload"):
+        pool.call(spec, module="handlers.main", attr="fail", payload={}, timeout=5)
+    (row,) = pool.stats()
+    assert row["spawned"] == 1 and row["calls"] == 3 and row["idle"] == 1
+
+
+def test_timeout_kills_worker(pool_spec):
+    pool, spec, _ = pool_spec
+    pid = pool.call(spec, module="handlers.main", attr="echo", payload={"text": "x"}, timeout=60)["pid"]
+    with pytest.raises(TimeoutError):
+        pool.call(spec, module="handlers.main", attr="nap", payload={"seconds": 30}, timeout=0.3)
+    again = pool.call(spec, module="handlers.main", attr="echo", payload={"text": "y"}, timeout=60)
+    assert again["pid"] != pid and again["calls"] == 1
+    (row,) = pool.stats()
+    assert row["timeouts"] == 1 and row["spawned"] == 2
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import os
 import shutil
 import textwrap
 from collections.abc import Callable
@@ -186,3 +187,34 @@ def test_run_skill_prep_missing_script_raises(skill_factory):
 
     with pytest.raises(SkillPrepScriptNotFoundError):
         run_skill_prep("no_prep")
+
+
+def test_run_skill_handler_keeps_module_loaded(skill_factory, monkeypatch):
+    from adaos.services.skill import runtime as runtime_mod
+
+    handler_source = textwrap.dedent(
+        """
+        CALLS = []
+
+        def handle(topic, payload):
+            CALLS.append(topic)
+            return {"calls": len(CALLS), "v": 1}
+        """
+    )
+    env, version = skill_factory("warm_skill", handler_source=handler_source, prep_source=None)
+
+    results = [run_skill_handler_sync("warm_skill", "t", {}) for _ in range(3)]
+    # модуль не переимпортируется — состояние уровня модуля сохраняется
+    assert [r["calls"] for r in results] == [1, 2, 3]
+    (row,) = [r for r in runtime_mod.skill_handler_stats() if r["skill"] == "warm_skill"]
+    assert row["loads"] == 1 and row["hits"] == 2
+
+    monkeypatch.setattr(runtime_mod, "_SOURCE_RECHECK_S", 0.0)
+    main = env.build_slot_paths(version, "A").src_dir / "skills" / "warm_skill" / "handlers" / "main.py"
+    main.write_text(handler_source.replace('"v": 1', '"v": 2'), encoding="utf-8")
+    st = main.stat()
+    os.utime(main, ns=(st.st_atime_ns, st.st_mtime_ns + 10_000_000))
+    reloaded = run_skill_handler_sync("warm_skill", "t", {})
+    assert reloaded == {"calls": 1, "v": 2}
+    (row,) = [r for r in runtime_mod.skill_handler_stats() if r["skill"] == "warm_skill"]
+    assert row["reloads"] == 1
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+
+from adaos.services.registry.subnet_rpc import LOAD_HEADER, SubnetRpcClient, SubnetRpcError
+
+NODES = [
+    {"node_id": "a", "base_url": "http://a.local"},
+    {"node_id": "b", "base_url": "http://b.local"},
+]
+
+
+def _client(handler, **kw) -> SubnetRpcClient:
+    rpc = SubnetRpcClient(**kw)
+    rpc._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    rpc._client_loop = asyncio.get_running_loop()
+    return rpc
+
+
+def test_retries_next_node_only_when_call_did_not_run():
+    seen = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url.host)
+        if request.url.host == "a.local":
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(200, json={"ok": True, "node": "b"}, headers={LOAD_HEADER: "3"})
+
+    async def main():
+        rpc = _client(handler)
+        result = await rpc.call_tool(NODES, {"tool": "s:t"}, token="x", timeout=1)
+        assert result.status == 200 and result.body["node"] == "b"
+        stats = {row["node_id"]: row for row in rpc.stats()}
+        assert stats["a"]["failures"] == 1 and stats["b"]["reported_in_flight"] == 3
+        # упавшая нода теперь в конце списка
+        assert [n["node_id"] for n in rpc.rank(NODES)] == ["b", "a"]
+
+    asyncio.run(main())
+    assert seen == ["a.local", "b.local"]
+
+
+def test_tool_error_is_not_retried():
+    seen = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url.host)
+        return httpx.Response(500, text="boom")
+
+    async def main():
+        rpc = _client(handler)
+        result = await rpc.call_tool(NODES, {"tool": "s:t"}, token="x", timeout=1)
+        assert result.status == 500
+
+    asyncio.run(main())
+    assert seen == ["a.local"]
+
+
+def test_hedged_call_returns_first_reply():
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "a.local":
+            await asyncio.sleep(1.0)
+        return httpx.Response(200, json={"node": request.url.host})
+
+    async def main():
+        rpc = _client(handler, hedge_after=0.05)
+        result = await rpc.call_tool(NODES, {"tool": "s:t"}, token="x", timeout=5, hedge=True)
+        assert result.node_id == "b"
+        assert {row["node_id"]: row["hedges_won"] for row in rpc.stats()}["b"] == 1
+
+    asyncio.run(main())
+
+
+def test_all_nodes_unreachable():
+    async def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("refused", request=request)
+
+    async def main():
+        rpc = _client(handler)
+        with pytest.raises(SubnetRpcError):
+            await rpc.call_tool(NODES, {"tool": "s:t"}, token="x", timeout=1)
+
+    asyncio.run(main())
+
+
+
+def test_inactive_nodes_rank_after_active_ones():
+    rpc = SubnetRpcClient()
+    nodes = [{"node_id": "c", "base_url": "http://c.local", "active": False}] + [dict(n, active=True) for n in NODES]
+    rpc.report_load("a", 5)
+    # загруженная активная нода всё равно впереди свободной неактивной
+    assert [n["node_id"] for n in rpc.rank(nodes)] == ["b", "a", "c"]
+
+
+def test_lost_hedge_is_not_counted_as_failure():
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "a.local":
+            await asyncio.sleep(1.0)
+        return httpx.Response(200, json={"node": request.url.host})
+
+    async def main():
+        rpc = _client(handler, hedge_after=0.05)
+        result = await rpc.call_tool(NODES, {"tool": "s:t"}, token="x", timeout=5, hedge=True)
+        assert result.node_id == "b"
+        await asyncio.sleep(0)  # даём отменённому запросу к "a" завершиться
+        stats = {row["node_id"]: row for row in rpc.stats()}
+        assert stats["a"]["failures"] == 0 and stats["a"]["in_flight"] == 0
+        # медленная, но исправная нода не получает штраф за сбой
+        assert rpc._nodes["a"].last_failure == 0.0
+
+    asyncio.run(main())
+
+
+def test_calls_without_hedge_flag_are_never_duplicated():
+    seen = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url.host)
+        await asyncio.sleep(0.2)
+        return httpx.Response(200, json={"node": request.url.host})
+
+    async def main():
+        rpc = _client(handler, hedge_after=0.01)
+        result = await rpc.call_tool(NODES, {"tool": "s:t"}, token="x", timeout=5)
+        assert result.node_id == "a"
+
+    asyncio.run(main())
+    assert seen == ["a.local"]
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import textwrap
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from adaos.apps.api import tool_bridge
+from adaos.apps.api.auth import require_token
+from adaos.services.agent_context import get_ctx
+from adaos.services.registry.subnet_rpc import RpcResult
+from adaos.services.skill.manager import SkillManager
+from adaos.skills.process_pool import SkillProcessPool, WorkerSpec
+
+
+class _Directory:
+    def find_nodes_with_skill(self, skill, require_online=True):
+        return [{"node_id": "member", "base_url": "http://member.local", "active": True}]
+
+    def get_node_base_url(self, node_id):
+        return "http://member.local"
+
+
+class _Rpc:
+    def __init__(self) -> None:
+        self.calls: list = []
+
+    async def call_tool(self, targets, body, **kw):
+        self.calls.append(targets)
+        raise AssertionError("tool failure must not be proxied")
+
+    def stats(self):
+        return []
+
+
+class _HedgingRpc:
+    hedge_after = 0.05
+
+    def __init__(self) -> None:
+        self.hedge: list = []
+
+    async def call_tool(self, targets, body, **kw):
+        self.hedge.append(kw.get("hedge"))
+        return RpcResult(status=200, body={"ok": True}, text="", node_id="member")
+
+
+def _hub_client() -> TestClient:
+    app = FastAPI()
+    app.include_router(tool_bridge.router, prefix="/api")
+    app.dependency_overrides[require_token] = lambda: None
+    return TestClient(app)
+
+
+def test_process_isolated_tool_error_is_500_without_proxy(monkeypatch, tmp_path):
+    skill_dir = tmp_path / "skills" / "iso_calc"
+    (skill_dir / "handlers").mkdir(parents=True)
+    (skill_dir / "handlers" / "__init__.py").write_text("", encoding="utf-8")
+    (skill_dir / "handlers" / "main.py").write_text(
+        textwrap.dedent(
+            """
+            def divide(a: int, b: int = 0):
+                return a / b
+            """
+        ),
+        encoding="utf-8",
+    )
+    spec = WorkerSpec(skill="iso_calc", version="1.0.0", slot="A", skill_dir=str(skill_dir), base_dir=str(tmp_path / "base"))
+    pool = SkillProcessPool(warm=1)
+
+    def run_tool(self, name, tool, payload, *, timeout=None, **kw):
+        return pool.call(spec, module="handlers.main", attr=tool, payload=payload, timeout=timeout or 60)
+
+    rpc = _Rpc()
+    monkeypatch.setattr(SkillManager, "run_tool", run_tool)
+    monkeypatch.setattr(tool_bridge, "get_directory", lambda: _Directory())
+    monkeypatch.setattr(tool_bridge, "get_subnet_rpc", lambda: rpc)
+
+    ctx = get_ctx()
+    previous = ctx.config
+    # хаб: при "навык не найден" он проксировал бы вызов на member
+    object.__setattr__(ctx, "config", SimpleNamespace(role="hub", token="t"))
+    try:
+        r = _hub_client().post("/api/tools/call", json={"tool": "iso_calc:divide", "arguments": {"a": 1}})
+    finally:
+        object.__setattr__(ctx, "config", previous)
+        pool.shutdown()
+
+    assert r.status_code == 500
+    assert "ZeroDivisionError" in r.json()["detail"]
+    assert rpc.calls == []
+
+
+def test_proxy_hedges_only_tools_declaring_cache(monkeypatch):
+    ctx = get_ctx()
+    skill_dir = ctx.paths.skills_workspace_dir() / "remote_lookup"
+    skill_dir.mkdir(parents=True, exist_ok=True)
+    (skill_dir / "skill.yaml").write_text(
+        textwrap.dedent(
+            """
+            name: remote_lookup
+            version: 1.0.0
+            tools:
+              - name: lookup
+                cache: {ttl: 60}
+              - name: book
+            """
+        ),
+        encoding="utf-8",
+    )
+
+    def run_tool(self, name, tool, payload, *, timeout=None, **kw):
+        raise RuntimeError(f"skill '{name}' is not installed")
+
+    rpc = _HedgingRpc()
+    monkeypatch.setattr(SkillManager, "run_tool", run_tool)
+    monkeypatch.setattr(tool_bridge, "get_directory", lambda: _Directory())
+    monkeypatch.setattr(tool_bridge, "get_subnet_rpc", lambda: rpc)
+
+    previous = ctx.config
+    object.__setattr__(ctx, "config", SimpleNamespace(role="hub", token="t"))
+    try:
+        client = _hub_client()
+        for tool in ("book", "lookup", "missing"):
+            r = client.post("/api/tools/call", json={"tool": f"remote_lookup:{tool}", "arguments": {}})
+            assert r.status_code == 200
+    finally:
+        object.__setattr__(ctx, "config", previous)
+
+    # неидемпотентный "book" и неизвестный инструмент никогда не дублируются
+    assert rpc.hedge == [False, True, False]
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import json
+import textwrap
+import threading
+import time
+
+import pytest
+
+from adaos.services.agent_context import get_ctx
+from adaos.services.skill import tool_dispatch
+from adaos.services.skill.manager import SkillManager
+from adaos.services.skill.runtime_env import SkillRuntimeEnvironment
+from adaos.services.skill.tool_cache import CachePolicy, ToolResultCache, get_tool_cache
+
+
+def test_concurrent_identical_calls_run_once():
+    cache = ToolResultCache()
+    policy = CachePolicy(ttl=60, key=("city",))
+    runs = []
+    gate = threading.Event()
+
+    def compute():
+        runs.append(1)
+        gate.wait(5)
+        return {"temp": 20}
+
+    key = cache.make_key("weather", "1.0.0", "A", "get", policy, {"city": "Riga", "trace": 1})
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.call(key, policy.ttl, compute))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    gate.set()
+    for t in threads:
+        t.join(5)
+    assert results == [{"temp": 20}] * 4 and len(runs) == 1
+
+    # поля вне key не влияют на ключ; результат отдаётся копией
+    same = cache.make_key("weather", "1.0.0", "A", "get", policy, {"city": "Riga", "trace": 2})
+    hit = cache.call(same, policy.ttl, compute)
+    hit["temp"] = 0
+    assert cache.call(same, policy.ttl, compute) == {"temp": 20} and len(runs) == 1
+
+    (row,) = cache.stats()["tools"]
+    assert (row["misses"], row["coalesced"], row["hits"]) == (1, 3, 2)
+
+
+def test_errors_are_not_cached():
+    cache = ToolResultCache()
+    key = cache.make_key("s", "1", "A", "t", CachePolicy(ttl=60), {})
+    with pytest.raises(ValueError):
+        cache.call(key, 60, lambda: (_ for _ in ()).throw(ValueError("x")))
+    assert cache.call(key, 60, lambda: "ok") == "ok"
+
+
+def test_uncopyable_result_releases_waiters_and_is_not_cached():
+    cache = ToolResultCache()
+    key = cache.make_key("s", "1", "A", "t", CachePolicy(ttl=60), {})
+    runs = []
+    gate = threading.Event()
+
+    def compute():
+        runs.append(1)
+        gate.wait(5)
+        return {"lock": threading.Lock()}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.call(key, 60, compute))) for _ in range(3)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    gate.set()
+    for t in threads:
+        t.join(5)
+    assert len(results) == 3 and not any(t.is_alive() for t in threads)
+    # ожидающие выполнили инструмент сами, в кэш ничего не попало
+    assert len(runs) == 3 and cache.stats()["entries"] == 0 and not cache._inflight
+    (row,) = cache.stats()["tools"]
+    assert row["uncacheable"] == 1
+
+
+def test_run_tool_uses_manifest_cache_policy():
+    tool_dispatch.invalidate()
+    get_tool_cache().invalidate()
+    ctx = get_ctx()
+    env = SkillRuntimeEnvironment(skills_root=ctx.paths.skills_dir(), skill_name="cached_skill")
+    env.prepare_version("1.0.0")
+    slot = env.build_slot_paths("1.0.0", "A")
+    skill_dir = slot.src_dir / "skills" / "cached_skill"
+    (skill_dir / "handlers").mkdir(parents=True)
+    (skill_dir / "handlers" / "__init__.py").write_text("", encoding="utf-8")
+    (skill_dir / "handlers" / "main.py").write_text(
+        textwrap.dedent(
+            """
+            CALLS = []
+
+            def lookup(city: str, units: str = "c"):
+                CALLS.append(city)
+                return {"city": city, "units": units, "n": len(CALLS)}
+            """
+        ),
+        encoding="utf-8",
+    )
+    manifest = {
+        "name": "cached_skill",
+        "version": "1.0.0",
+        "slot": "A",
+        "source": str(skill_dir),
+        "runtime": {"python_paths": [str(slot.src_dir)]},
+        "tools": {
+            "lookup": {
+                "name": "lookup",
+                "module": "skills.cached_skill.handlers.main",
+                "callable": "lookup",
+                "cache": {"ttl": 60, "key": ["city", "units"]},
+            }
+        },
+        "default_tool": "lookup",
+    }
+    slot.resolved_manifest.write_text(json.dumps(manifest), encoding="utf-8")
+    mgr = SkillManager(git=ctx.git, paths=ctx.paths, caps=ctx.caps, bus=ctx.bus)
+
+    first = mgr.run_tool("cached_skill", "lookup", {"city": "Oslo"})
+    assert mgr.run_tool("cached_skill", "lookup", {"city": "Oslo"}) == first
+    assert mgr.run_tool("cached_skill", "lookup", {"city": "Oslo", "units": "f"})["n"] == 2
+
+    mgr._on_runtime_changed("cached_skill")
+    assert get_tool_cache().stats()["entries"] == 0
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import json
+import os
+import textwrap
+
+from adaos.services.agent_context import get_ctx
+from adaos.services.skill import tool_dispatch
+from adaos.services.skill.manager import SkillManager
+from adaos.services.skill.runtime_env import SkillRuntimeEnvironment
+
+
+_GREET = """
+def greet(name: str, greeting: str = "hi"):
+    return f"{greeting} {name}"
+"""
+
+
+def _install(name: str, version: str = "1.0.0", source: str = _GREET, tool: str = "greet") -> SkillRuntimeEnvironment:
+    ctx = get_ctx()
+    env = SkillRuntimeEnvironment(skills_root=ctx.paths.skills_dir(), skill_name=name)
+    env.prepare_version(version)
+    slot = env.build_slot_paths(version, "A")
+    skill_dir = slot.src_dir / "skills" / name
+    (skill_dir / "handlers").mkdir(parents=True)
+    (skill_dir / "handlers" / "__init__.py").write_text("", encoding="utf-8")
+    (skill_dir / "handlers" / "main.py").write_text(textwrap.dedent(source), encoding="utf-8")
+    manifest = {
+        "name": name,
+        "version": version,
+        "slot": "A",
+        "source": str(skill_dir),
+        "runtime": {"python_paths": [str(slot.src_dir)]},
+        "tools": {tool: {"name": tool, "module": f"skills.{name}.handlers.main", "callable": tool}},
+        "default_tool": tool,
+    }
+    slot.resolved_manifest.write_text(json.dumps(manifest), encoding="utf-8")
+    return env
+
+
+def test_run_tool_resolves_once_and_revalidates(monkeypatch):
+    tool_dispatch.invalidate()
+    env = _install("dispatch_skill")
+    ctx = get_ctx()
+    mgr = SkillManager(git=ctx.git, paths=ctx.paths, caps=ctx.caps, bus=ctx.bus)
+
+    calls = {"status": 0}
+    original = SkillManager.runtime_status
+
+    def counting(self, name):
+        calls["status"] += 1
+        return original(self, name)
+
+    monkeypatch.setattr(SkillManager, "runtime_status", counting)
+
+    for _ in range(5):
+        assert mgr.run_tool("dispatch_skill", None, {"name": "bob"}) == "hi bob"
+    assert calls["status"] == 1
+
+    # новая сборка манифеста (другой mtime) замечается при повторной проверке
+    monkeypatch.setattr(tool_dispatch, "_RECHECK_S", 0.0)
+    manifest = env.build_slot_paths("1.0.0", "A").resolved_manifest
+    st = manifest.stat()
+    os.utime(manifest, ns=(st.st_atime_ns, st.st_mtime_ns + 10_000_000))
+    assert mgr.run_tool("dispatch_skill", "greet", {"name": "amy", "greeting": "yo"}) == "yo amy"
+    assert calls["status"] == 2
+
+    mgr._on_runtime_changed("dispatch_skill")
+    assert tool_dispatch.stats()["entries"] == 0
+    mgr.run_tool("dispatch_skill", "greet", {"name": "x"})
+    assert calls["status"] == 3
+
+
+_WHOAMI = """
+import time
+
+from adaos.sdk.data import skill_memory
+from adaos.services.agent_context import get_ctx
+
+
+def whoami(tag: str, delay: float = 0.05):
+    secrets = get_ctx().secrets
+    skill_memory.set("tag", tag)
+    time.sleep(delay)
+    return {"tag": skill_memory.get("tag"), "secrets": id(secrets), "same": get_ctx().secrets is secrets}
+"""
+
+
+def test_concurrent_tools_keep_their_own_secrets_and_memory():
+    from concurrent.futures import ThreadPoolExecutor
+
+    tool_dispatch.invalidate()
+    for name in ("who_a", "who_b"):
+        _install(name, source=_WHOAMI, tool="whoami")
+    ctx = get_ctx()
+    shared_secrets = ctx.secrets
+    mgr = SkillManager(git=ctx.git, paths=ctx.paths, caps=ctx.caps, bus=ctx.bus)
+    jobs = [("who_a", "a"), ("who_b", "b")] * 4
+    for name, tag in jobs[:2]:  # разрешение слота — заранее, последовательно
+        mgr.run_tool(name, None, {"tag": tag})
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda job: mgr.run_tool(job[0], None, {"tag": job[1]}), jobs))
+
+    assert [r["tag"] for r in results] == [tag for _name, tag in jobs]
+    assert all(r["same"] for r in results)
+    assert len({r["secrets"] for r, (name, _tag) in zip(results, jobs) if name == "who_a"}) == 1
+    assert results[0]["secrets"] != results[1]["secrets"] != id(shared_secrets)
+    assert ctx.secrets is shared_secrets
+    assert "ADAOS_SKILL_ENV_PATH" not in os.environ
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from adaos.services.skill.tool_executor import ToolExecutor, ToolQueueFull
+
+
+def test_per_skill_limit_and_fair_order():
+    order: list[str] = []
+    gate = threading.Event()
+
+    def slow(tag: str) -> str:
+        gate.wait(2)
+        order.append(tag)
+        return tag
+
+    def fast(tag: str) -> str:
+        order.append(tag)
+        return tag
+
+    async def scenario():
+        ex = ToolExecutor(workers=2, per_skill=1, queue_limit=8)
+        # "heavy" занимает один воркер, остальные его вызовы ждут в очереди
+        heavy = [asyncio.create_task(ex.run("heavy", slow, f"h{i}")) for i in range(3)]
+        await asyncio.sleep(0.05)
+        light = [asyncio.create_task(ex.run("light", fast, f"l{i}")) for i in range(3)]
+        results = await asyncio.gather(*light)
+        stats = ex.stats()
+        gate.set()
+        await asyncio.gather(*heavy)
+        return results, stats
+
+    results, stats = asyncio.run(scenario())
+    assert results == ["l0", "l1", "l2"]
+    # лёгкий навык отработал, пока тяжёлый держал свой единственный слот
+    assert order[:3] == ["l0", "l1", "l2"]
+    heavy = next(s for s in stats["skills"] if s["skill"] == "heavy")
+    assert heavy["running"] == 1 and heavy["queued"] == 2
+    assert stats["busy"] == 1 and stats["utilisation"] == 0.5
+
+
+def test_queue_overflow_and_errors():
+    gate = threading.Event()
+
+    def block() -> None:
+        gate.wait(2)
+
+    def boom() -> None:
+        raise ValueError("bad input")
+
+    async def scenario():
+        ex = ToolExecutor(workers=1, per_skill=1, queue_limit=1)
+        running = asyncio.create_task(ex.run("s", block))
+        await asyncio.sleep(0.02)
+        queued = asyncio.create_task(ex.run("s", block))
+        await asyncio.sleep(0)
+        with pytest.raises(ToolQueueFull):
+            await ex.run("s", block)
+        gate.set()
+        await asyncio.gather(running, queued)
+        with pytest.raises(ValueError):
+            await ex.run("s", boom)
+        return ex.stats()
+
+    stats = asyncio.run(scenario())
+    (row,) = stats["skills"]
+    assert row["completed"] == 3 and row["errors"] == 1 and row["rejected"] == 1
+    assert stats["busy"] == 0 and stats["queued"] == 0
+
+
+def test_loop_stays_responsive_while_tool_runs():
+    async def scenario():
+        ex = ToolExecutor(workers=1)
+        call = asyncio.create_task(ex.run("s", time.sleep, 0.2))
+        t0 = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lag = time.perf_counter() - t0
+        await call
+        return lag
+
+    assert asyncio.run(scenario()) < 0.1
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+from adaos.services.agent_context import get_ctx
+from adaos.services.capacity import install_skill_in_capacity
+from adaos.services.scenario import webspace_runtime as ws_runtime
+from adaos.services.scenario.webspace_runtime import WebspaceScenarioRuntime, schedule_webspace_rebuild
+
+
+def _write_webui(name: str, apps: list[str]) -> None:
+    skill_dir = get_ctx().paths.skills_dir() / name
+    skill_dir.mkdir(parents=True, exist_ok=True)
+    (skill_dir / "webui.json").write_text(json.dumps({"apps": [{"id": a, "title": a} for a in apps]}), encoding="utf-8")
+
+
+def test_webui_is_parsed_once_until_file_changes(monkeypatch):
+    ctx = get_ctx()
+    _write_webui("cached_ui", ["one"])
+    install_skill_in_capacity("cached_ui", "1.0.0", active=True)
+    runtime = WebspaceScenarioRuntime(ctx)
+
+    parsed = []
+    original = WebspaceScenarioRuntime._parse_webui
+
+    def counting(self, path, skill_name, space):
+        parsed.append(skill_name)
+        return original(self, path, skill_name, space)
+
+    monkeypatch.setattr(WebspaceScenarioRuntime, "_parse_webui", counting)
+
+    first = runtime.compute_registry_for_webspace("default")
+    second = runtime.compute_registry_for_webspace("default")
+    assert "one" in [a["id"] for a in first.apps] and second.apps == first.apps
+    assert parsed.count("cached_ui") == 1
+
+    _write_webui("cached_ui", ["one", "two"])
+    third = runtime.compute_registry_for_webspace("default")
+    assert "two" in [a["id"] for a in third.apps]
+    assert parsed.count("cached_ui") == 2
+
+
+def test_burst_of_requests_collapses_into_one_rebuild(monkeypatch):
+    calls = []
+
+    async def fake_rebuild(self, webspace_id):
+        calls.append(webspace_id)
+        await asyncio.sleep(0.05)
+
+    monkeypatch.setattr(WebspaceScenarioRuntime, "rebuild_webspace_async", fake_rebuild)
+
+    async def main():
+        for _ in range(10):
+            task = schedule_webspace_rebuild("ws-a", delay=0.02)
+        other = schedule_webspace_rebuild("ws-b", delay=0.02)
+        await asyncio.gather(task, other)
+        assert sorted(calls) == ["ws-a", "ws-b"]
+
+        # запрос во время пересборки — ровно ещё один проход
+        task = schedule_webspace_rebuild("ws-a", delay=0.0)
+        await asyncio.sleep(0.02)
+        schedule_webspace_rebuild("ws-a", delay=0.0)
+        schedule_webspace_rebuild("ws-a", delay=0.0)
+        await task
+        assert calls.count("ws-a") == 3
+        assert not ws_runtime._PENDING_REBUILDS
+
+    asyncio.run(main())
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+import y_py as Y
+
+from adaos.services.yjs import doc as ydoc_mod
+from adaos.services.yjs.doc import async_get_ydoc
+from adaos.services.yjs.store import get_ystore_for_webspace
+
+
+async def _set(webspace_id: str, key: str, value) -> None:
+    async with async_get_ydoc(webspace_id) as ydoc:
+        with ydoc.begin_transaction() as txn:
+            ydoc.get_map("data").set(txn, key, value)
+
+
+async def _replayed(webspace_id: str) -> dict:
+    ydoc = Y.YDoc()
+    await get_ystore_for_webspace(webspace_id).apply_updates(ydoc)
+    return dict(ydoc.get_map("data").items())
+
+
+def test_resident_doc_persists_only_deltas():
+    async def scenario():
+        store = get_ystore_for_webspace("ws-resident")
+        await _set("ws-resident", "big", "x" * 20_000)
+        for i in range(20):
+            await _set("ws-resident", "n", float(i))
+        async with async_get_ydoc("ws-resident") as ydoc:
+            with ydoc.begin_transaction() as txn:
+                ydoc.get_map("data").pop(txn, "big")
+        async with async_get_ydoc("ws-resident"):
+            pass  # без изменений ничего не пишется
+        sizes = [len(u) for u, _m, _t in store._updates]
+        return sizes, await _replayed("ws-resident")
+
+    sizes, state = asyncio.run(scenario())
+    assert len(sizes) == 22
+    assert max(sizes[1:]) < 100  # полная копия документа больше не дописывается
+    assert state == {"n": 19.0}
+
+
+def test_replica_catches_up_and_discards_failed_blocks():
+    async def scenario():
+        store = get_ystore_for_webspace("ws-catchup")
+        await _set("ws-catchup", "a", "1")
+
+        other = Y.YDoc()
+        await store.apply_updates(other)
+        before = Y.encode_state_vector(other)
+        with other.begin_transaction() as txn:
+            other.get_map("data").set(txn, "b", "2")
+        await store.write(Y.encode_state_as_update(other, before))
+
+        with pytest.raises(RuntimeError):
+            async with async_get_ydoc("ws-catchup") as ydoc:
+                with ydoc.begin_transaction() as txn:
+                    ydoc.get_map("data").set(txn, "c", "3")
+                raise RuntimeError("boom")
+
+        async with async_get_ydoc("ws-catchup") as ydoc:
+            return dict(ydoc.get_map("data").items())
+
+    assert asyncio.run(scenario()) == {"a": "1", "b": "2"}
+
+
+def _live_room(monkeypatch, webspace_id: str) -> SimpleNamespace:
+    room = SimpleNamespace(
+        ydoc=Y.YDoc(),
+        ready=True,
+        _task_group=object(),
+        _thread_id=threading.get_ident(),
+        ystore=get_ystore_for_webspace(webspace_id),
+    )
+    monkeypatch.setattr(ydoc_mod, "_resolve_live_room", lambda ws: room)
+    return room
+
+
+def test_live_room_on_this_thread_is_mutated_directly(monkeypatch):
+    room = _live_room(monkeypatch, "ws-room")
+    with room.ydoc.begin_transaction() as txn:
+        room.ydoc.get_map("data").set(txn, "client", "1")
+
+    async def scenario():
+        await _set("ws-room", "k", "v")
+        async with async_get_ydoc("ws-room") as ydoc:
+            return dict(ydoc.get_map("data").items())
+
+    # блок видит состояние комнаты, изменения применяются к ней
+    assert asyncio.run(scenario()) == {"client": "1", "k": "v"}
+    assert dict(room.ydoc.get_map("data").items()) == {"client": "1", "k": "v"}
+    assert room.ystore._updates == []  # пишет сама комната, через свой поток updates
+
+
+def test_failed_block_on_live_room_changes_nothing(monkeypatch):
+    room = _live_room(monkeypatch, "ws-room-fail")
+    transactions = []
+    # чтение состояния комнаты тоже открывает транзакцию — пустые не считаем
+    room.ydoc.observe_after_transaction(lambda event: transactions.append(ydoc_mod._transaction_update(event)))
+
+    async def scenario():
+        seq = room.ystore.seq
+        with pytest.raises(RuntimeError):
+            async with async_get_ydoc("ws-room-fail") as ydoc:
+                with ydoc.begin_transaction() as txn:
+                    ydoc.get_map("data").set(txn, "partial", "1")
+                raise RuntimeError("boom")
+        return seq, room.ystore.seq
+
+    before, after = asyncio.run(scenario())
+    assert before == after
+    assert [u for u in transactions if u] == [] and dict(room.ydoc.get_map("data").items()) == {}
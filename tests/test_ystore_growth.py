@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import asyncio
+
+import y_py as Y
+
+from adaos.services.yjs.doc import async_get_ydoc, get_ydoc
+from adaos.services.yjs.store import AdaosMemoryYStore, get_ystore_for_webspace
+
+
+def _set(ydoc: Y.YDoc, n: int) -> None:
+    with ydoc.begin_transaction() as txn:
+        ydoc.get_map("data").set(txn, f"key{n % 50}", {"n": float(n)})
+
+
+def test_10k_small_mutations_keep_the_log_bounded():
+    async def scenario():
+        store = get_ystore_for_webspace("ws-growth")
+        peak = 0
+        for n in range(10_000):
+            async with async_get_ydoc("ws-growth") as ydoc:
+                _set(ydoc, n)
+            peak = max(peak, store._mem_bytes)
+        await asyncio.sleep(0.05)
+        ydoc = Y.YDoc()
+        await store.apply_updates(ydoc)
+        return peak, len(store._updates), ydoc.get_map("data")["key49"]
+
+    peak, entries, last = asyncio.run(scenario())
+    assert peak < 256 * 1024
+    assert entries <= 257
+    assert last == {"n": 9999.0}
+
+
+def test_sync_get_ydoc_writes_deltas_and_compacts(monkeypatch):
+    monkeypatch.setenv("ADAOS_YSTORE_MAX_UPDATES", "16")
+    store = get_ystore_for_webspace("ws-sync-growth")
+    with get_ydoc("ws-sync-growth") as ydoc:
+        with ydoc.begin_transaction() as txn:
+            ydoc.get_map("data").set(txn, "big", "x" * 20_000)
+    for n in range(40):
+        with get_ydoc("ws-sync-growth") as ydoc:
+            _set(ydoc, n)
+    with get_ydoc("ws-sync-growth"):
+        pass
+
+    assert store._compactions >= 1  # компактизация не теряется вместе с циклом asyncio.run
+    assert len(store._updates) <= 17
+    assert store._mem_bytes < 2 * 20_000  # документ не дублируется на каждом выходе
+
+
+def test_store_drops_empty_and_repeated_updates():
+    async def scenario():
+        store = AdaosMemoryYStore("ws-dedup")
+        src = Y.YDoc()
+        before = Y.encode_state_vector(src)
+        with src.begin_transaction() as txn:
+            src.get_map("data").set(txn, "k", "v")
+        update = Y.encode_state_as_update(src, before)
+        await store.write(update)
+        await store.write(b"\x00\x00")
+        await store.write(update)  # эхо комнаты
+        return len(store._updates), store.stats()["deduplicated"]
+
+    assert asyncio.run(scenario()) == (1, 2)
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import asyncio
+
+import y_py as Y
+
+from adaos.services.yjs.store import (
+    AdaosMemoryYStore,
+    ystore_journal_path_for_webspace,
+    ystore_path_for_webspace,
+)
+
+
+def _edit(ydoc: Y.YDoc, key: str, value: str) -> bytes:
+    before = Y.encode_state_vector(ydoc)
+    with ydoc.begin_transaction() as txn:
+        ydoc.get_map("data").set(txn, key, value)
+    return Y.encode_state_as_update(ydoc, before)
+
+
+async def _restore(webspace_id: str) -> dict:
+    store = AdaosMemoryYStore(webspace_id, mode="journal")
+    ydoc = Y.YDoc()
+    await store.apply_updates(ydoc)
+    store.close()
+    return dict(ydoc.get_map("data").items())
+
+
+def test_journal_survives_restart_without_backup():
+    async def scenario():
+        store = AdaosMemoryYStore("ws-journal", mode="journal")
+        src = Y.YDoc()
+        for i in range(5):
+            await store.write(_edit(src, f"k{i}", str(i)))
+        store.close()  # "падение" процесса: снапшот не писали
+        assert not ystore_path_for_webspace("ws-journal").exists()
+        return await _restore("ws-journal")
+
+    assert asyncio.run(scenario()) == {f"k{i}": str(i) for i in range(5)}
+
+
+def test_compaction_folds_journal_into_snapshot():
+    async def scenario():
+        store = AdaosMemoryYStore("ws-compact", mode="journal")
+        src = Y.YDoc()
+        for i in range(10):
+            await store.write(_edit(src, "k", str(i)))
+        await store.compact()
+        assert len(store._updates) == 1
+        assert ystore_path_for_webspace("ws-compact").exists()
+        assert not ystore_journal_path_for_webspace("ws-compact").exists()
+        await store.write(_edit(src, "tail", "x"))
+        store.close()
+        return await _restore("ws-compact")
+
+    assert asyncio.run(scenario()) == {"k": "9", "tail": "x"}
+
+
+def test_truncated_journal_tail_is_ignored():
+    async def scenario():
+        store = AdaosMemoryYStore("ws-torn", mode="journal")
+        src = Y.YDoc()
+        await store.write(_edit(src, "a", "1"))
+        store.close()
+        with open(ystore_journal_path_for_webspace("ws-torn"), "ab") as fh:
+            fh.write(b"\x00\x00\x10\x00partial")
+        return await _restore("ws-torn")
+
+    assert asyncio.run(scenario()) == {"a": "1"}
+
+
+def test_writes_after_torn_tail_survive_two_restarts():
+    async def scenario():
+        src = Y.YDoc()
+        store = AdaosMemoryYStore("ws-torn2", mode="journal")
+        await store.write(_edit(src, "a", "1"))
+        store.close()
+        with open(ystore_journal_path_for_webspace("ws-torn2"), "ab") as fh:
+            fh.write(b"\x00\x00\x10\x00partial")
+
+        # первый перезапуск: хвост отрезается до дозаписи
+        store = AdaosMemoryYStore("ws-torn2", mode="journal")
+        await store.apply_updates(Y.YDoc())
+        await store.write(_edit(src, "b", "2"))
+        await asyncio.gather(*(store.write(_edit(src, f"c{i}", str(i))) for i in range(3)))
+        store.close()
+
+        first = await _restore("ws-torn2")
+        second = await _restore("ws-torn2")
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    expected = {"a": "1", "b": "2", "c0": "0", "c1": "1", "c2": "2"}
+    assert first == expected and second == expected
+
+
+def test_memory_log_is_compacted_by_count(monkeypatch):
+    monkeypatch.setenv("ADAOS_YSTORE_MAX_UPDATES", "16")
+
+    async def scenario():
+        store = AdaosMemoryYStore("ws-mem")
+        src = Y.YDoc()
+        for i in range(100):
+            await store.write(_edit(src, f"k{i % 7}", str(i)))
+            await asyncio.sleep(0)
+        if store._compaction is not None:
+            await store._compaction
+        stats = store.stats()
+        ydoc = Y.YDoc()
+        await store.apply_updates(ydoc)
+        return stats, dict(ydoc.get_map("data").items())
+
+    stats, data = asyncio.run(scenario())
+    assert stats["mode"] == "memory"
+    assert stats["compactions"] >= 1
+    assert stats["updates"] <= 17
+    assert stats["bytes"] > 0
+    assert data == {f"k{j}": str(max(i for i in range(100) if i % 7 == j)) for j in range(7)}
+    assert not ystore_path_for_webspace("ws-mem").exists()
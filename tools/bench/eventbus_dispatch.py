@@ -0,0 +1,93 @@
+"""
+Micro-benchmark: LocalEventBus.publish (prefix trie) vs. the former linear scan.
+
+    python tools/bench/eventbus_dispatch.py [--events 20000]
+
+Для каждого размера (10/100/1000 подписок) публикуется одинаковый поток
+событий; обработчики синхронные и пустые, так что измеряется только
+стоимость диспетчеризации.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from threading import RLock
+from typing import Callable, Dict, List
+
+from adaos.domain import Event
+from adaos.services.eventbus import LocalEventBus
+
+_ROOTS = ["skills", "scenarios", "tg.input", "sys", "ui", "io.out", "nlp.intent", "webspace", "net.subnet", "weather"]
+
+
+class LinearScanBus:
+    """Копия прежнего алгоритма publish: копия всех списков под локом + startswith по каждому префиксу."""
+
+    def __init__(self) -> None:
+        self._subs: Dict[str, List[Callable]] = {}
+        self._lock = RLock()
+
+    def subscribe(self, type_prefix: str, handler: Callable) -> None:
+        with self._lock:
+            self._subs.setdefault(type_prefix, []).append(handler)
+
+    def publish(self, event: Event) -> None:
+        with self._lock:
+            pairs = [(p, hs[:]) for p, hs in self._subs.items()]
+        for prefix, handlers in pairs:
+            if prefix != "*" and prefix != "" and not event.type.startswith(prefix):
+                continue
+            for h in handlers:
+                h(event)
+
+
+def _prefixes(n: int, rnd: random.Random) -> List[str]:
+    out = []
+    for i in range(n):
+        root = _ROOTS[i % len(_ROOTS)]
+        out.append(f"{root}.skill_{i // len(_ROOTS)}.")
+    return out
+
+
+def _events(count: int, prefixes: List[str], rnd: random.Random) -> List[Event]:
+    evs = []
+    for i in range(count):
+        if i % 4 == 0:
+            topic = rnd.choice(prefixes) + "changed"
+        else:
+            topic = f"{rnd.choice(_ROOTS)}.unrelated_{i % 50}.tick"
+        evs.append(Event(type=topic, payload={}, source="bench", ts=0.0))
+    return evs
+
+
+def _run(bus, events: List[Event]) -> float:
+    started = time.perf_counter()
+    for ev in events:
+        bus.publish(ev)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=20000)
+    args = ap.parse_args()
+
+    print(f"{'subs':>6} {'linear us/evt':>14} {'trie us/evt':>12} {'speedup':>8}")
+    for size in (10, 100, 1000):
+        rnd = random.Random(size)
+        prefixes = _prefixes(size, rnd)
+        events = _events(args.events, prefixes, rnd)
+        linear, trie = LinearScanBus(), LocalEventBus()
+        for p in prefixes:
+            linear.subscribe(p, lambda ev: None)
+            trie.subscribe(p, lambda ev: None)
+        t_linear = _run(linear, events)
+        t_trie = _run(trie, events)
+        print(
+            f"{size:>6} {t_linear / len(events) * 1e6:>14.2f} {t_trie / len(events) * 1e6:>12.2f} {t_linear / t_trie:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark: Rasa NLU parse latency, process per utterance vs. resident worker.
+
+    python tools/bench/nlu_worker.py [--utterances 20] [--burst 16] [--load-ms 800]
+    python tools/bench/nlu_worker.py --python <venv python> --model <interpreter_latest.tar.gz>
+
+Без ``--python/--model`` используется поддельный пакет rasa: «модель»
+загружается ``--load-ms`` мс, разбор — ``--parse-ms`` мс. "before" повторяет
+прежний RasaNLURuntime.parse (новый процесс и загрузка модели на каждую
+фразу), "after" — NLUWorker; "burst" отправляет ``--burst`` фраз сразу и
+показывает эффект батчинга.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+from pathlib import Path
+
+_FAKE_RASA = """
+import json, os, time
+
+class Interpreter:
+    @classmethod
+    def load(cls, path):
+        time.sleep(float(os.environ["BENCH_LOAD_MS"]) / 1000.0)
+        return cls()
+
+    def parse(self, text):
+        time.sleep(float(os.environ["BENCH_PARSE_MS"]) / 1000.0)
+        return {"text": text, "intent": {"name": "greet", "confidence": 0.9}, "entities": []}
+"""
+
+# прежний helper из RasaNLURuntime.parse (ветка Rasa 2.x)
+_ONESHOT = r"""
+import json, sys
+from rasa.nlu.model import Interpreter
+print(json.dumps(Interpreter.load(sys.argv[1]).parse(sys.argv[2]), ensure_ascii=False))
+"""
+
+
+def _pct(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+def _row(name: str, samples: list[float], wall: float) -> None:
+    print(f"{name:>8} {len(samples):>6} {_pct(samples, 0.5):>10.1f} {_pct(samples, 0.99):>10.1f} {wall:>10.1f}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--utterances", type=int, default=20)
+    ap.add_argument("--burst", type=int, default=16)
+    ap.add_argument("--load-ms", type=float, default=800.0)
+    ap.add_argument("--parse-ms", type=float, default=5.0)
+    ap.add_argument("--python", default=None)
+    ap.add_argument("--model", default=None)
+    args = ap.parse_args()
+
+    from adaos.services.interpreter.worker import NLUWorker
+
+    env = dict(os.environ)
+    if args.python and args.model:
+        python, model = Path(args.python), Path(args.model)
+    else:
+        root = Path(tempfile.mkdtemp(prefix="adaos-bench-nlu-"))
+        pkg = root / "rasa" / "nlu"
+        pkg.mkdir(parents=True)
+        (root / "rasa" / "__init__.py").write_text("", encoding="utf-8")
+        (pkg / "__init__.py").write_text("", encoding="utf-8")
+        (pkg / "model.py").write_text(textwrap.dedent(_FAKE_RASA), encoding="utf-8")
+        model = root / "interpreter_latest.tar.gz"
+        model.write_text(json.dumps({}), encoding="utf-8")
+        python = Path(sys.executable)
+        env.update(PYTHONPATH=str(root), BENCH_LOAD_MS=str(args.load_ms), BENCH_PARSE_MS=str(args.parse_ms))
+
+    texts = [f"включи свет номер {i}" for i in range(args.utterances)]
+    print(f"{'mode':>8} {'n':>6} {'p50 ms':>10} {'p99 ms':>10} {'wall ms':>10}")
+
+    samples = []
+    started = time.perf_counter()
+    for text in texts:
+        t0 = time.perf_counter()
+        proc = subprocess.run([str(python), "-c", _ONESHOT, str(model), text], env=env, capture_output=True, check=True)
+        json.loads(proc.stdout.decode("utf-8").strip().splitlines()[-1])
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    _row("before", samples, (time.perf_counter() - started) * 1000.0)
+
+    worker = NLUWorker(python, lambda: model, env=env)
+    try:
+        t0 = time.perf_counter()
+        worker.parse("прогрев", timeout=600)
+        print(f"{'(load)':>8} {1:>6} {(time.perf_counter() - t0) * 1000.0:>10.1f}")
+
+        samples = []
+        started = time.perf_counter()
+        for text in texts:
+            t0 = time.perf_counter()
+            worker.parse(text, timeout=60)
+            samples.append((time.perf_counter() - t0) * 1000.0)
+        _row("after", samples, (time.perf_counter() - started) * 1000.0)
+
+        samples = []
+        started = time.perf_counter()
+        futures = [(time.perf_counter(), worker.submit(text)) for text in texts[: args.burst]]
+        for t0, fut in futures:
+            fut.result(60)
+            samples.append((time.perf_counter() - t0) * 1000.0)
+        _row("burst", samples, (time.perf_counter() - started) * 1000.0)
+        st = worker.stats()
+        print(f"worker: batches={st['batches']} avg_batch={st['avg_batch']} p50={st['p50_ms']}ms p99={st['p99_ms']}ms")
+    finally:
+        worker.close()
+
+
+if __name__ == "__main__":
+    main()
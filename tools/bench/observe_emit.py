@@ -0,0 +1,76 @@
+"""
+Benchmark: observe emit path with per-event load_config() vs. config_snapshot().
+
+    python tools/bench/observe_emit.py [--events 5000]
+
+"before" повторяет прежнюю логику _serialize_event/_emit_wrapper при
+незаполненном ctx.config (CLI, скрипты, тесты): node.yaml читается и
+парсится дважды на событие. "after" — текущий _emit_wrapper.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=5000)
+    args = ap.parse_args()
+
+    os.environ["ADAOS_BASE_DIR"] = tempfile.mkdtemp(prefix="adaos-bench-")
+    os.environ.setdefault("ADAOS_TESTING", "1")
+
+    from adaos.apps.bootstrap import init_ctx
+    from adaos.services import observe
+    from adaos.services.node_config import load_config
+
+    ctx = init_ctx()
+    object.__setattr__(ctx, "config", None)
+
+    async def _noop_emit(topic, payload, **kw):
+        return None
+
+    def serialize_before(topic, payload, kwargs):
+        conf = load_config()
+        return {
+            "ts": time.time(),
+            "topic": topic,
+            "payload": payload,
+            "trace": kwargs.get("trace_id"),
+            "source": kwargs.get("source"),
+            "actor": kwargs.get("actor"),
+            "node_id": conf.node_id,
+            "role": conf.role,
+        }
+
+    async def emit_before(topic, payload, **kwargs):
+        observe._ensure_trace(kwargs)
+        await _noop_emit(topic, payload, **kwargs)
+        event = serialize_before(topic, payload, kwargs)
+        conf = load_config()
+        observe._write_local(event)
+        await observe.BROADCAST.publish(event)
+        return conf.role
+
+    async def run(fn) -> float:
+        started = time.perf_counter()
+        for i in range(args.events):
+            await fn("bench.tick", {"i": i}, source="bench")
+        observe._WRITER.flush()
+        return time.perf_counter() - started
+
+    observe._ORIG_EMIT = _noop_emit
+    t_before = asyncio.run(run(emit_before))
+    t_after = asyncio.run(run(observe._emit_wrapper))
+    n = args.events
+    print(f"{'variant':<8} {'events/s':>10} {'us/event':>10}")
+    print(f"{'before':<8} {n / t_before:>10.0f} {t_before / n * 1e6:>10.1f}")
+    print(f"{'after':<8} {n / t_after:>10.0f} {t_after / n * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark: cost of ui.notify routing for the publisher, blocking vs. queued.
+
+    python tools/bench/router_delivery.py [--notifications 20] [--delay-ms 300]
+
+Поднимается локальный HTTP-сервер, который отвечает на /io/tg/send и
+/api/io/console/print с задержкой ``--delay-ms`` (медленный Telegram API).
+"before" повторяет прежний RouterService._on_event: requests.post прямо в
+обработчике шины, поэтому каждый publish ждёт ответа. "after" —
+DeliveryPipeline: publish только ставит доставку в очередь адресата,
+доставка идёт в фоне по пулу соединений.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import requests
+
+
+def _pct(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+def _row(name: str, samples: list[float], wall: float) -> None:
+    print(f"{name:>8} {len(samples):>6} {_pct(samples, 0.5):>12.3f} {_pct(samples, 0.99):>12.3f} {wall:>10.1f}")
+
+
+def _server(delay_s: float) -> ThreadingHTTPServer:
+    class _Handler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:  # noqa: N802
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            time.sleep(delay_s)
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def log_message(self, *args) -> None:
+            pass
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--notifications", type=int, default=20)
+    ap.add_argument("--delay-ms", type=float, default=300.0)
+    args = ap.parse_args()
+
+    from adaos.services.router import delivery
+    from adaos.services.router.delivery import DeliveryPipeline
+
+    srv = _server(args.delay_ms / 1000.0)
+    base = f"http://127.0.0.1:{srv.server_address[1]}"
+    conf = SimpleNamespace(node_id="hub", subnet_id="sn-hub", role="hub", hub_url=None, token="t")
+    delivery._load_node_yaml = lambda base_dir=None: {}  # без node.yaml
+    print(f"{'mode':>8} {'n':>6} {'publish p50':>12} {'publish p99':>12} {'wall ms':>10}")
+
+    samples = []
+    started = time.perf_counter()
+    for i in range(args.notifications):
+        t0 = time.perf_counter()
+        requests.post(f"{base}/io/tg/send", json={"hub_id": "sn-hub", "text": f"msg {i}"}, timeout=3.0)
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    _row("before", samples, (time.perf_counter() - started) * 1000.0)
+
+    async def _after() -> None:
+        pipeline = DeliveryPipeline()
+        pipeline.bind(asyncio.get_running_loop())
+        samples = []
+        started = time.perf_counter()
+        for i in range(args.notifications):
+            t0 = time.perf_counter()
+            pipeline.notify(f"msg {i}", source="bench", conf=conf, api_base=base, routes=[("telegram", "hub")])
+            samples.append((time.perf_counter() - t0) * 1000.0)
+        while pipeline.stats()["telegram:hub"]["delivered"] + pipeline.stats()["telegram:hub"]["failed"] < args.notifications:
+            await asyncio.sleep(0.01)
+        _row("after", samples, (time.perf_counter() - started) * 1000.0)
+        st = pipeline.stats()["telegram:hub"]
+        print(f"delivery: delivered={st['delivered']} failed={st['failed']} p50={st['p50_ms']}ms p99={st['p99_ms']}ms")
+        await pipeline.close()
+
+    asyncio.run(_after())
+    srv.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark: hub → member tool proxy with requests.post vs. SubnetRpcClient.
+
+    python tools/bench/subnet_rpc.py [--calls 500] [--concurrency 16] [--delay-ms 20]
+
+Поднимает два локальных "member"-узла (uvicorn в отдельных процессах),
+которые отвечают как /api/tools/call после задержки. "before" повторяет
+прежний прокси: блокирующий requests.post прямо в обработчике (новое
+TCP-соединение на вызов, event loop хаба стоит), всегда на первую ноду.
+"after" — пул keep-alive соединений httpx и выбор ноды по
+загрузке/латентности; второй узел отвечает вчетверо медленнее.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import multiprocessing
+import socket
+import statistics
+import time
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _serve_member(port: int, delay_s: float) -> None:
+    import uvicorn
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    from adaos.services.registry.subnet_rpc import LOAD_HEADER
+
+    in_flight = 0
+
+    async def call(request):
+        nonlocal in_flight
+        body = await request.json()
+        in_flight += 1
+        try:
+            await asyncio.sleep(delay_s)
+        finally:
+            in_flight -= 1
+        return JSONResponse({"ok": True, "result": body.get("arguments")}, headers={LOAD_HEADER: str(in_flight)})
+
+    app = Starlette(routes=[Route("/api/tools/call", call, methods=["POST"])])
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def _start_member(delay_s: float) -> str:
+    port = _free_port()
+    proc = multiprocessing.get_context("spawn").Process(target=_serve_member, args=(port, delay_s), daemon=True)
+    proc.start()
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--calls", type=int, default=500)
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--delay-ms", type=float, default=20.0)
+    args = ap.parse_args()
+
+    import requests
+
+    from adaos.services.registry.subnet_rpc import SubnetRpcClient
+
+    delay = args.delay_ms / 1000.0
+    nodes = [
+        {"node_id": "fast", "base_url": _start_member(delay)},
+        {"node_id": "slow", "base_url": _start_member(delay * 4)},
+    ]
+    headers = {"X-AdaOS-Token": "bench", "Content-Type": "application/json"}
+
+    async def before(i: int) -> None:
+        url = f"{nodes[0]['base_url']}/api/tools/call"
+        body = {"tool": "bench:echo", "arguments": {"i": i}}
+        # как в прежнем call_tool: блокирующий вызов прямо в event loop
+        r = requests.post(url, json=body, headers=headers, timeout=10)
+        r.json()
+
+    client = SubnetRpcClient(max_attempts=2)
+
+    async def after(i: int) -> None:
+        r = await client.call_tool(nodes, {"tool": "bench:echo", "arguments": {"i": i}}, token="bench", timeout=10)
+        assert r.status == 200
+
+    async def run(fn) -> tuple[float, list[float]]:
+        sem = asyncio.Semaphore(args.concurrency)
+        lat: list[float] = []
+
+        async def one(i: int) -> None:
+            async with sem:
+                t0 = time.perf_counter()
+                await fn(i)
+                lat.append(time.perf_counter() - t0)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.calls)))
+        return time.perf_counter() - started, sorted(lat)
+
+    async def bench() -> None:
+        # прогрев: холодный старт uvicorn и первое соединение не должны попасть в замер
+        for i in range(10):
+            await before(i)
+            for node in nodes:
+                await client.call_tool([node], {"tool": "bench:echo", "arguments": {}}, token="bench", timeout=10)
+        t_before, lat_before = await run(before)
+        t_after, lat_after = await run(after)
+        await client.aclose()
+        n = args.calls
+        print(f"{'variant':<8} {'calls/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+        for name, total, lat in (("before", t_before, lat_before), ("after", t_after, lat_after)):
+            p50 = statistics.median(lat) * 1000.0
+            p99 = lat[min(int(len(lat) * 0.99), len(lat) - 1)] * 1000.0
+            print(f"{name:<8} {n / total:>10.0f} {p50:>8.1f} {p99:>8.1f}")
+        for row in client.stats():
+            print(f"  {row['node_id']}: requests={row['requests']} ewma={row['latency_ms_ewma']}ms")
+
+    asyncio.run(bench())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: latency of one small async_get_ydoc mutation vs. document size.
+
+    python tools/bench/ydoc_mutation.py [--sizes 100,1000,10000] [--mutations 200]
+
+Документ заполняется ``size`` ключами в ``data``, затем ``--mutations`` раз
+меняется один ключ. "before" — ADAOS_YDOC_RESIDENT=0 (новый YDoc, replay
+всего лога, запись полного состояния на выходе), "after" — резидентная
+реплика (догоняет лог и пишет только delta). Показаны p50/p99 и сколько
+байт дописано в YStore на мутацию.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="100,1000,10000")
+    ap.add_argument("--mutations", type=int, default=200)
+    args = ap.parse_args()
+
+    os.environ["ADAOS_BASE_DIR"] = tempfile.mkdtemp(prefix="adaos-bench-")
+    os.environ.setdefault("ADAOS_TESTING", "1")
+
+    from adaos.apps.bootstrap import init_ctx
+    from adaos.services.yjs.doc import async_get_ydoc
+    from adaos.services.yjs.store import get_ystore_for_webspace
+
+    init_ctx()
+
+    async def run(webspace_id: str, size: int) -> tuple[list[float], float]:
+        async with async_get_ydoc(webspace_id) as ydoc:
+            data = ydoc.get_map("data")
+            with ydoc.begin_transaction() as txn:
+                for i in range(size):
+                    data.set(txn, f"key{i}", {"title": f"item {i}", "value": i})
+        store = get_ystore_for_webspace(webspace_id)
+        written = 0
+        samples: list[float] = []
+        for n in range(args.mutations):
+            before = store._mem_bytes
+            started = time.perf_counter()
+            async with async_get_ydoc(webspace_id) as ydoc:
+                with ydoc.begin_transaction() as txn:
+                    ydoc.get_map("data").set(txn, "counter", float(n))
+            samples.append((time.perf_counter() - started) * 1000.0)
+            written += max(store._mem_bytes - before, 0)
+        return samples, written / args.mutations
+
+    def pct(samples: list[float], q: float) -> float:
+        ordered = sorted(samples)
+        return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+    print(f"{'size':>7} {'mode':>7} {'p50 ms':>9} {'p99 ms':>9} {'mean ms':>9} {'B/mut':>9}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        for mode, resident in (("before", "0"), ("after", "1")):
+            os.environ["ADAOS_YDOC_RESIDENT"] = resident
+            samples, per_mut = asyncio.run(run(f"bench-{mode}-{size}", size))
+            print(
+                f"{size:>7} {mode:>7} {pct(samples, 0.5):>9.3f} {pct(samples, 0.99):>9.3f} "
+                f"{statistics.fmean(samples):>9.3f} {per_mut:>9.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Regression benchmark: YStore memory after many small YDoc mutations.
+
+    python tools/bench/ystore_growth.py [--mutations 10000] [--replay-mutations 2000] [--max-bytes 262144]
+
+Каждая мутация перезаписывает один ключ документа из ``--keys`` ключей.
+"before" повторяет прежний выход из контекста — ``encode_state_as_update``
+(полная копия документа в лог) плюс diff, применённый к комнате и
+сохранённый ею ещё раз. "replay" (ADAOS_YDOC_RESIDENT=0) и "resident" —
+текущие пути async_get_ydoc, "sync" — get_ydoc (replay и sync на каждом
+вызове переигрывают весь лог, поэтому их прогоны короче). Для каждого пути
+печатаются пиковый и итоговый размер лога; для текущих путей пик больше
+``--max-bytes`` даёт код выхода 1.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mutations", type=int, default=10_000)
+    ap.add_argument("--keys", type=int, default=200)
+    ap.add_argument("--max-bytes", type=int, default=256 * 1024)
+    ap.add_argument("--replay-mutations", type=int, default=2000)
+    ap.add_argument("--before-mutations", type=int, default=1000, help="the old path is O(n^2); keep it short")
+    args = ap.parse_args()
+
+    os.environ["ADAOS_BASE_DIR"] = tempfile.mkdtemp(prefix="adaos-bench-")
+    os.environ.setdefault("ADAOS_TESTING", "1")
+
+    import y_py as Y
+
+    from adaos.apps.bootstrap import init_ctx
+    from adaos.services.yjs.doc import async_get_ydoc, get_ydoc
+    from adaos.services.yjs.store import get_ystore_for_webspace
+
+    init_ctx()
+
+    def mutate(ydoc, n: int) -> None:
+        with ydoc.begin_transaction() as txn:
+            ydoc.get_map("data").set(txn, f"key{n % args.keys}", {"n": float(n)})
+
+    async def before(webspace_id: str, n: int) -> None:
+        store = get_ystore_for_webspace(webspace_id)
+        ydoc = Y.YDoc()
+        try:
+            await store.apply_updates(ydoc)
+        except BaseException:
+            pass
+        sv = Y.encode_state_vector(ydoc)
+        mutate(ydoc, n)
+        await store.encode_state_as_update(ydoc)
+        await store.write(Y.encode_state_as_update(ydoc, sv))
+
+    async def replay(webspace_id: str, n: int) -> None:
+        async with async_get_ydoc(webspace_id) as ydoc:
+            mutate(ydoc, n)
+
+    def sync(webspace_id: str, n: int) -> None:
+        with get_ydoc(webspace_id) as ydoc:
+            mutate(ydoc, n)
+
+    def run(name: str, count: int, resident: str, step) -> int:
+        os.environ["ADAOS_YDOC_RESIDENT"] = resident
+        webspace_id = f"growth-{name}"
+        store = get_ystore_for_webspace(webspace_id)
+        peak = 0
+        started = time.perf_counter()
+
+        async def drive_async() -> None:
+            nonlocal peak
+            for n in range(count):
+                await step(webspace_id, n)
+                peak = max(peak, store._mem_bytes)
+            await asyncio.sleep(0.1)  # дать завершиться фоновой компактизации
+
+        if asyncio.iscoroutinefunction(step):
+            asyncio.run(drive_async())
+        else:
+            for n in range(count):
+                step(webspace_id, n)
+                peak = max(peak, store._mem_bytes)
+        elapsed = time.perf_counter() - started
+        st = store.stats()
+        print(
+            f"{name:>9} {count:>7} {peak:>11} {st['bytes']:>11} {st['updates']:>8} "
+            f"{st['compactions']:>6} {st['deduplicated']:>6} {elapsed / count * 1000:>8.3f}"
+        )
+        return peak
+
+    asyncio.run(replay("warmup", 0))  # ленивый импорт Y-гейтвея не должен попасть в замер
+    print(f"{'path':>9} {'muts':>7} {'peak B':>11} {'final B':>11} {'updates':>8} {'folds':>6} {'dedup':>6} {'ms/mut':>8}")
+    run("before", args.before_mutations, "0", before)
+    failed = False
+    current = (
+        ("resident", args.mutations, "1", replay),
+        ("replay", args.replay_mutations, "0", replay),
+        ("sync", args.replay_mutations, "1", sync),
+    )
+    for name, count, resident, step in current:
+        if run(name, count, resident, step) > args.max_bytes:
+            failed = True
+    if failed:
+        print(f"FAIL: peak log size above {args.max_bytes} bytes", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())